@@ -0,0 +1,173 @@
+# app/cache/base.py
+"""
+Namespaced cache over a pluggable byte store.
+
+A Backend stores bytes under string keys with an optional TTL and can
+report how many entries and bytes live under a key prefix. Backends never
+raise on a lookup or store: an unreachable store behaves as a miss.
+
+Cache binds a backend to one namespace (the key prefix), encodes values
+with app.codec and counts hits and misses per namespace in app.metrics.
+Its `aget`/`aset` variants are for the event loop: on a blocking backend
+(a file or a network round trip) they run in a worker thread.
+"""
+from __future__ import annotations
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.codec import dumps_bytes, loads
+from app.metrics import get_metrics
+
+class Backend(ABC):
+    name = "base"
+    blocking = True  # calls may wait on disk or network; False only for in-process stores
+
+    @abstractmethod
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        ...
+
+    @abstractmethod
+    def set_many(self, items: Sequence[Tuple[str, bytes]], ttl_s: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self, prefix: str) -> int:
+        """Drop every key starting with `prefix`; returns how many were dropped."""
+
+    @abstractmethod
+    def usage(self, prefix: str) -> Tuple[int, int]:
+        """(entries, bytes of values) under `prefix`, expired entries excluded where cheap."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key])[0]
+
+    def set(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        self.set_many([(key, value)], ttl_s)
+
+    def close(self) -> None:
+        pass
+
+class LayeredBackend(Backend):
+    """A small per-process backend in front of a shared one; writes go to both."""
+
+    def __init__(self, near: Backend, far: Backend, near_ttl_s: Optional[float] = None):
+        self.near = near
+        self.far = far
+        self.near_ttl_s = near_ttl_s
+        self.name = f"{near.name}+{far.name}"
+        self.blocking = near.blocking or far.blocking
+
+    def _near_ttl(self, ttl_s: Optional[float]) -> Optional[float]:
+        if self.near_ttl_s is None:
+            return ttl_s
+        return self.near_ttl_s if ttl_s is None else min(ttl_s, self.near_ttl_s)
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        out = self.near.get_many(keys)
+        missing = [i for i, v in enumerate(out) if v is None]
+        if missing:
+            found = self.far.get_many([keys[i] for i in missing])
+            # far entries are re-cached near without their remaining TTL; near_ttl_s bounds that
+            fill = [(keys[i], v) for i, v in zip(missing, found) if v is not None]
+            if fill:
+                self.near.set_many(fill, self.near_ttl_s)
+            for i, v in zip(missing, found):
+                out[i] = v
+        return out
+
+    def set_many(self, items: Sequence[Tuple[str, bytes]], ttl_s: Optional[float] = None) -> None:
+        self.near.set_many(items, self._near_ttl(ttl_s))
+        self.far.set_many(items, ttl_s)
+
+    def delete(self, key: str) -> None:
+        self.near.delete(key)
+        self.far.delete(key)
+
+    def clear(self, prefix: str) -> int:
+        self.near.clear(prefix)
+        return self.far.clear(prefix)
+
+    def usage(self, prefix: str) -> Tuple[int, int]:
+        return self.far.usage(prefix)
+
+    def close(self) -> None:
+        self.near.close()
+        self.far.close()
+
+class Cache:
+    """One namespace of a backend, holding JSON-able values (and numpy arrays, stored as lists)."""
+
+    def __init__(self, namespace: str, backend: Backend, ttl_s: Optional[float] = None):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl_s = ttl_s  # default for set(); None => no expiry
+        self.prefix = f"{namespace}:"
+
+    def _count(self, hits: int, misses: int) -> None:
+        metrics = get_metrics()
+        if hits:
+            metrics.incr(f"cache.{self.namespace}.hit", hits)
+        if misses:
+            metrics.incr(f"cache.{self.namespace}.miss", misses)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        raw = self.backend.get_many([self.prefix + k for k in keys])
+        out = [None if r is None else loads(r) for r in raw]
+        hits = sum(r is not None for r in raw)
+        self._count(hits, len(raw) - hits)
+        return out
+
+    def set(self, key: str, value: Any, ttl_s: Optional[float] = None) -> None:
+        self.set_many({key: value}, ttl_s)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return (await self.aget_many([key]))[0]
+
+    async def aget_many(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        if not self.backend.blocking:
+            return self.get_many(keys)
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aset(self, key: str, value: Any, ttl_s: Optional[float] = None) -> None:
+        if not self.backend.blocking:
+            return self.set(key, value, ttl_s)
+        await asyncio.to_thread(self.set, key, value, ttl_s)
+
+    async def adelete(self, key: str) -> None:
+        if not self.backend.blocking:
+            return self.delete(key)
+        await asyncio.to_thread(self.delete, key)
+
+    def set_many(self, items: Dict[str, Any], ttl_s: Optional[float] = None) -> None:
+        ttl = self.ttl_s if ttl_s is None else ttl_s
+        if ttl is not None and ttl <= 0:
+            return
+        self.backend.set_many([(self.prefix + k, dumps_bytes(v)) for k, v in items.items()], ttl)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(self.prefix + key)
+
+    def clear(self) -> int:
+        return self.backend.clear(self.prefix)
+
+    def stats(self) -> Dict[str, Any]:
+        counters = get_metrics().snapshot()["counters"]
+        hits = counters.get(f"cache.{self.namespace}.hit", 0)
+        misses = counters.get(f"cache.{self.namespace}.miss", 0)
+        entries, nbytes = self.backend.usage(self.prefix)
+        return {
+            "backend": self.backend.name,
+            "entries": entries,
+            "bytes": nbytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        }
@@ -0,0 +1,73 @@
+# app/cache/memory.py
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from app.cache.base import Backend
+
+Entry = Tuple[float, bytes]  # (expires_at, value)
+
+class MemoryBackend(Backend):
+    """Per-process LRU bounded by entry count and value bytes."""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_items: int = 4096, max_bytes: int = 64 << 20,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_items = max(1, max_items)
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Entry] = OrderedDict()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= len(entry[1])
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        now = self.clock()
+        out: list[Optional[bytes]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    out.append(None)
+                elif entry[0] <= now:
+                    self._drop(key)
+                    out.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    out.append(entry[1])
+        return out
+
+    def set_many(self, items: Sequence[Tuple[str, bytes]], ttl_s: Optional[float] = None) -> None:
+        expires = self.clock() + ttl_s if ttl_s is not None else float("inf")
+        with self._lock:
+            for key, value in items:
+                self._drop(key)
+                self._entries[key] = (expires, value)
+                self.nbytes += len(value)
+            while self._entries and (len(self._entries) > self.max_items or self.nbytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._drop(key)
+
+    def clear(self, prefix: str) -> int:
+        with self._lock:
+            doomed = [k for k in self._entries if k.startswith(prefix)]
+            for k in doomed:
+                self._drop(k)
+        return len(doomed)
+
+    def usage(self, prefix: str) -> Tuple[int, int]:
+        now = self.clock()
+        with self._lock:
+            live = [v for k, (exp, v) in self._entries.items() if k.startswith(prefix) and exp > now]
+        return len(live), sum(len(v) for v in live)
@@ -0,0 +1,159 @@
+# app/cache/resp.py
+"""
+Cache backend speaking the Redis protocol (RESP2) over a plain socket, for
+Redis, Valkey, KeyDB, Dragonfly or any compatible stand-in. Only GET/MGET,
+SET ... PX, DEL, SCAN and STRLEN are used. No client library is needed.
+
+An unreachable server turns lookups into misses and stores into no-ops,
+and is retried after RETRY_AFTER_S rather than on every call.
+"""
+from __future__ import annotations
+import socket
+import threading
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlsplit
+
+from app.cache.base import Backend
+from app.metrics import get_metrics
+
+RETRY_AFTER_S = 5.0
+SCAN_COUNT = 500
+
+class RespError(Exception):
+    """An error reply from the server, or a malformed one."""
+
+def encode_command(*args: Any) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for a in args:
+        b = a if isinstance(a, bytes) else str(a).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+    return b"".join(out)
+
+def read_reply(f: Any) -> Any:
+    """One reply from a buffered binary reader; error replies are returned as RespError."""
+    line = f.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode("utf-8")
+    if kind == b"-":
+        return RespError(rest.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        n = int(rest)
+        if n < 0:
+            return None
+        data = f.read(n + 2)
+        if len(data) != n + 2:
+            raise ConnectionError("connection closed")
+        return data[:-2]
+    if kind == b"*":
+        n = int(rest)
+        return None if n < 0 else [read_reply(f) for _ in range(n)]
+    raise RespError(f"unexpected reply type {kind!r}")
+
+def _glob_escape(prefix: str) -> str:
+    return "".join("\\" + ch if ch in "*?[]\\" else ch for ch in prefix)
+
+class RespBackend(Backend):
+    name = "redis"
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", timeout_s: float = 1.0):
+        p = urlsplit(url)
+        self.host = p.hostname or "127.0.0.1"
+        self.port = p.port or 6379
+        self.password = unquote(p.password) if p.password else None
+        self.db = int(p.path.lstrip("/") or 0)
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _conn(self) -> Tuple[socket.socket, Any]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout_s)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = self._local.conn = (sock, sock.makefile("rb"))
+            setup = ([("AUTH", self.password)] if self.password else []) + ([("SELECT", self.db)] if self.db else [])
+            for reply in self._send(setup):
+                if isinstance(reply, RespError):
+                    raise reply
+        return conn
+
+    def _send(self, commands: Sequence[Tuple[Any, ...]]) -> List[Any]:
+        """Pipeline `commands` on this thread's connection; replies in order."""
+        if not commands:
+            return []
+        sock, reader = self._conn()
+        sock.sendall(b"".join(encode_command(*c) for c in commands))
+        return [read_reply(reader) for _ in commands]
+
+    def _call(self, commands: Sequence[Tuple[Any, ...]]) -> Optional[List[Any]]:
+        """Like _send, but None (and a back-off) when the server can't be reached."""
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return self._send(commands)
+        except (OSError, RespError):
+            get_metrics().incr("cache.backend_error")
+            self._disconnect()
+            self._down_until = time.monotonic() + RETRY_AFTER_S
+            return None
+
+    def _disconnect(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        replies = self._call([("MGET", *keys)])
+        if replies is None or not isinstance(replies[0], list):
+            return [None] * len(keys)
+        return [v if isinstance(v, bytes) else None for v in replies[0]]
+
+    def set_many(self, items: Sequence[Tuple[str, bytes]], ttl_s: Optional[float] = None) -> None:
+        if ttl_s is None:
+            self._call([("SET", k, v) for k, v in items])
+        else:
+            ms = max(1, int(ttl_s * 1000))
+            self._call([("SET", k, v, "PX", ms) for k, v in items])
+
+    def delete(self, key: str) -> None:
+        self._call([("DEL", key)])
+
+    def _scan(self, prefix: str) -> Optional[List[bytes]]:
+        keys: list[bytes] = []
+        cursor = b"0"
+        pattern = _glob_escape(prefix) + "*"
+        while True:
+            replies = self._call([("SCAN", cursor, "MATCH", pattern, "COUNT", SCAN_COUNT)])
+            if replies is None or not isinstance(replies[0], list):
+                return None
+            cursor, batch = replies[0]
+            keys.extend(batch)
+            if cursor in (b"0", "0", 0):
+                return keys
+
+    def clear(self, prefix: str) -> int:
+        keys = self._scan(prefix) or []
+        for i in range(0, len(keys), SCAN_COUNT):
+            self._call([("DEL", *keys[i:i + SCAN_COUNT])])
+        return len(keys)
+
+    def usage(self, prefix: str) -> Tuple[int, int]:
+        keys = self._scan(prefix) or []
+        sizes = self._call([("STRLEN", k) for k in keys]) or []
+        return len(keys), sum(s for s in sizes if isinstance(s, int))
+
+    def close(self) -> None:
+        self._disconnect()
@@ -0,0 +1,151 @@
+# app/cache/sqlite.py
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from app.cache.base import Backend
+from app.metrics import get_metrics
+
+SWEEP_EVERY = 256  # writes between expiry / size sweeps
+MAX_VARS = 500  # keys per IN (...) query, under SQLite's variable limit
+
+class SqliteBackend(Backend):
+    """
+    A cache file on local disk shared by every worker on the host (WAL mode,
+    so readers don't block the writer). Expired rows are skipped on read and
+    swept every SWEEP_EVERY writes, which also trims the oldest rows once the
+    values exceed `max_bytes`.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_bytes: int = 256 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._local = threading.local()
+        self._db_ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            if not self._db_ready:
+                c.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL
+                )
+                """)
+                c.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_stored ON cache_entries (stored_at)")
+                c.commit()
+                self._db_ready = True
+            self._local.conn = c
+        return c
+
+    def _failed(self) -> None:
+        get_metrics().incr("cache.backend_error")
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        found: dict[str, bytes] = {}
+        now = time.time()
+        try:
+            c = self._conn()
+            for i in range(0, len(keys), MAX_VARS):
+                chunk = list(keys[i:i + MAX_VARS])
+                marks = ",".join("?" * len(chunk))
+                rows = c.execute(
+                    f"SELECT key, value FROM cache_entries WHERE key IN ({marks})"
+                    " AND (expires_at IS NULL OR expires_at > ?)",
+                    (*chunk, now),
+                ).fetchall()
+                found.update(rows)
+        except sqlite3.Error:
+            self._failed()
+        return [found.get(k) for k in keys]
+
+    def set_many(self, items: Sequence[Tuple[str, bytes]], ttl_s: Optional[float] = None) -> None:
+        now = time.time()
+        expires = now + ttl_s if ttl_s is not None else None
+        try:
+            c = self._conn()
+            with c:
+                c.executemany(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, size, stored_at, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(k, v, len(v), now, expires) for k, v in items],
+                )
+            self._writes += len(items)
+            if self._writes >= SWEEP_EVERY:
+                self._writes = 0
+                self.sweep()
+        except sqlite3.Error:
+            self._failed()
+
+    def sweep(self) -> int:
+        """Drop expired rows, then the oldest ones while over `max_bytes`. Returns rows dropped."""
+        c = self._conn()
+        with c:
+            dropped = c.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)).rowcount
+            total = c.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            if total > self.max_bytes:
+                # oldest first until 90% of the cap, so the next writes don't sweep again at once
+                excess = total - int(self.max_bytes * 0.9)
+                dropped += c.execute("""
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, size, SUM(size) OVER (ORDER BY stored_at, key) AS running FROM cache_entries
+                    ) WHERE running - size < ?
+                )
+                """, (excess,)).rowcount
+        return dropped
+
+    def delete(self, key: str) -> None:
+        try:
+            c = self._conn()
+            with c:
+                c.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        except sqlite3.Error:
+            self._failed()
+
+    def _range(self, prefix: str) -> Tuple[str, str]:
+        # keys starting with prefix sort in [prefix, prefix + U+10FFFF)
+        return prefix, prefix + "\U0010ffff"
+
+    def clear(self, prefix: str) -> int:
+        try:
+            c = self._conn()
+            with c:
+                return c.execute("DELETE FROM cache_entries WHERE key >= ? AND key < ?", self._range(prefix)).rowcount
+        except sqlite3.Error:
+            self._failed()
+            return 0
+
+    def usage(self, prefix: str) -> Tuple[int, int]:
+        try:
+            row = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+                " WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?)",
+                (*self._range(prefix), time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            self._failed()
+            return 0, 0
+        return int(row[0]), int(row[1])
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
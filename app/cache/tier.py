@@ -0,0 +1,57 @@
+# app/cache/tier.py
+"""
+The configured cache tier, shared by the pipeline's caches:
+
+- CACHE_BACKEND=memory: per-process LRU (nothing shared, lost on restart)
+- CACHE_BACKEND=sqlite: one file on local disk (CACHE_PATH) shared by every
+  worker on the host and kept across restarts
+- CACHE_BACKEND=redis: a Redis-protocol server (CACHE_URL) shared by every
+  worker on every host
+
+Namespaces may put a small per-process LRU in front of a shared backend.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Dict
+
+from app.cache.base import Backend, Cache, LayeredBackend
+from app.cache.memory import MemoryBackend
+from app.cache.resp import RespBackend
+from app.cache.sqlite import SqliteBackend
+from app.deps import get_settings
+
+NEAR_TTL_S = 60.0  # a near copy may lag a shared update by this much
+
+@lru_cache(maxsize=1)
+def get_backend() -> Backend:
+    s = get_settings()
+    max_bytes = int(s.cache_max_mb * (1 << 20))
+    if s.cache_backend == "redis":
+        return RespBackend(s.cache_url)
+    if s.cache_backend == "sqlite":
+        return SqliteBackend(s.cache_path, max_bytes=max_bytes)
+    return MemoryBackend(max_items=1 << 20, max_bytes=max_bytes)
+
+_namespaces: Dict[str, Cache] = {}
+
+def get_shared_cache(namespace: str, near_items: int = 0) -> Cache:
+    """The cache for `namespace`, with a `near_items` per-process LRU in front of a shared backend."""
+    cache = _namespaces.get(namespace)
+    if cache is None:
+        backend = get_backend()
+        if near_items > 0 and not isinstance(backend, MemoryBackend):
+            backend = LayeredBackend(MemoryBackend(max_items=near_items), backend, near_ttl_s=NEAR_TTL_S)
+        cache = _namespaces[namespace] = Cache(namespace, backend)
+    return cache
+
+def register(cache: Cache) -> Cache:
+    """List a namespace that lives outside the shared tier (e.g. process-local) in cache_report()."""
+    _namespaces.setdefault(cache.namespace, cache)
+    return cache
+
+def cache_report() -> Dict[str, Any]:
+    """Per-namespace entries, bytes and hit rate, for /_cache."""
+    return {
+        "backend": get_backend().name,
+        "namespaces": {name: cache.stats() for name, cache in sorted(_namespaces.items())},
+    }
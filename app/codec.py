@@ -0,0 +1,18 @@
+# app/codec.py
+"""JSON encoding for responses and stored payloads (orjson; ~5-10x stdlib json)."""
+from __future__ import annotations
+from typing import Any
+
+import orjson
+
+_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def dumps_bytes(obj: Any) -> bytes:
+    return orjson.dumps(obj, option=_OPTS)
+
+def dumps(obj: Any) -> str:
+    # TEXT columns stay readable to sqlite's json functions
+    return orjson.dumps(obj, option=_OPTS).decode("utf-8")
+
+def loads(data: str | bytes) -> Any:
+    return orjson.loads(data)
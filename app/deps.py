@@ -3,12 +3,21 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from functools import lru_cache
-from typing import Literal, Dict
+from typing import Literal, Dict, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()  # reads .env if present
 
-SearchProvider = Literal["google", "brave", "serper"]
+SearchProvider = Literal["google", "brave", "serper", "local"]
+SEARCH_PROVIDERS = ("google", "brave", "serper", "local")
+EmbedBackendName = Literal["torch", "int8", "onnx"]
+EMBED_BACKENDS = ("torch", "int8", "onnx")
+VectorDtype = Literal["float32", "float16", "int8"]
+VECTOR_DTYPES = ("float32", "float16", "int8")
+CacheBackendName = Literal["memory", "sqlite", "redis"]
+CACHE_BACKENDS = ("memory", "sqlite", "redis")
+CheckModeName = Literal["fast", "balanced", "thorough"]
+CHECK_MODES = ("fast", "balanced", "thorough")  # cheapest first (app.logic.modes)
 
 @dataclass(frozen=True)
 class Settings:
@@ -17,10 +26,128 @@ class Settings:
     google_api_key: str | None = None
     brave_api_key: str | None = None
     serper_api_key: str | None = None
+    # several providers => concurrent fan-out with rank fusion
+    search_providers: Tuple[SearchProvider, ...] = ()
+    search_fanout_first_n: int = 2
+    search_hedge_s: float = 1.0
+    # claim + reformulations sent per check; 1 disables query expansion
+    max_search_queries: int = 3
+    # anytime verdicts: stop NLI once remaining premises can't change the label
+    verdict_early_exit: bool = False
+    # offline knowledge base built by `python -m app.search.local ingest`
+    local_kb_dir: str = "kb"
+    # admission control: /check and /ui/check
+    pipeline_max_inflight: int = 2
+    pipeline_max_queue: int = 8
+    pipeline_queue_timeout_s: float = 5.0
+    client_rate_per_min: float = 30.0
+    client_burst: int = 10
+    # admission control: /_nli, /_verdict, /_post
+    debug_max_inflight: int = 1
+    debug_max_queue: int = 2
+    debug_queue_timeout_s: float = 2.0
+    debug_rate_per_min: float = 6.0
+    debug_burst: int = 3
+    trust_forwarded_for: bool = False
+    # end-to-end latency budget for run_pipeline; <= 0 disables it
+    pipeline_budget_s: float = 4.0
+    # check modes (app.logic.modes): default tier, and the governor load per step down; <= 0 never downgrades
+    default_check_mode: CheckModeName = "balanced"
+    mode_downgrade_load: float = 1.5
+    # shared cache tier (app.cache) behind the search, redirect and page caches
+    cache_backend: CacheBackendName = "sqlite"
+    cache_path: str = "cache.db"
+    cache_url: str = "redis://127.0.0.1:6379/0"
+    cache_max_mb: float = 256.0
+    # extracted page paragraphs per canonical URL; ttl <= 0 disables it
+    page_cache_ttl_s: float = 6 * 3600
+    # search result cache; ttl <= 0 disables it
+    search_cache_ttl_s: float = 6 * 3600
+    search_cache_stale_s: float = 24 * 3600
+    search_cache_size: int = 512
+    # learned original -> final URL redirects (app.urls); <= 0 disables it
+    redirect_ttl_s: float = 7 * 24 * 3600
+    # fetcher DNS cache (app.fetch.dns) and connection pre-warming after search
+    dns_cache_ttl_s: float = 300.0
+    dns_negative_ttl_s: float = 30.0
+    fetch_prewarm: bool = True
+    persist_abandoned: bool = False  # finish and save runs whose client disconnected
+    # verdict cache per claim (app.store.verdicts); ttl <= 0 disables it and the refresher
+    verdict_cache_ttl_s: float = 3600.0
+    # background refresh of hot claims (app.logic.refresher); interval or budget <= 0 disables it
+    refresh_interval_s: float = 30.0
+    refresh_horizon_s: float = 300.0
+    refresh_min_requests: float = 5.0
+    refresh_budget_s: float = 120.0  # pipeline seconds per hour
+    # results retention (app.store.retention); days <= 0 keep forever, interval <= 0 disables the sweeper
+    result_retention_days: float = 0.0
+    result_retention_by_verdict: Tuple[Tuple[str, float], ...] = ()  # (verdict, days) overriding the above
+    degraded_retention_days: float = 30.0
+    retention_keep_viewed: bool = True  # a view of /r/{id} restarts its result's retention clock
+    retention_interval_s: float = 3600.0
+    retention_batch: int = 500
+    # shared model server (python -m app.nlp.server); unset => in-process models
+    model_server_socket: str | None = None
+    model_server_timeout_s: float = 30.0
+    # torch CPU threads per process (app.nlp.runtime); 0 => tune file, then cores / workers
+    torch_workers: int = 0
+    torch_threads: int = 0
+    torch_interop_threads: int = 0
+    torch_pin_cpus: bool = False
+    nli_batch: int = 0
+    torch_tune_file: str = "torch_tune.json"
+    # MiniLM runtime (app.nlp.embed_backends) and on-disk vector precision
+    embed_backend: EmbedBackendName = "torch"
+    embed_onnx_file: str = "onnx/model.onnx"
+    vector_store_dtype: VectorDtype = "float32"
+    # model lifecycle (app.nlp.lifecycle); 0 => unlimited / never unload
+    model_memory_budget_mb: float = 0.0
+    model_idle_unload_s: float = 0.0
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_providers(name: str) -> Tuple[str, ...]:
+    out: list[str] = []
+    for p in (os.getenv(name) or "").split(","):
+        p = p.strip().lower()
+        if p in SEARCH_PROVIDERS and p not in out:
+            out.append(p)
+    return tuple(out)
+
+def _env_days_by_verdict(name: str) -> Tuple[Tuple[str, float], ...]:
+    """`Unverified=7,False=365` -> (("Unverified", 7.0), ("False", 365.0)); malformed pairs are skipped."""
+    out: Dict[str, float] = {}
+    for pair in (os.getenv(name) or "").split(","):
+        label, _, days = pair.partition("=")
+        try:
+            out[label.strip().capitalize()] = float(days)
+        except ValueError:
+            continue
+    return tuple((label, days) for label, days in out.items() if label)
+
+def _env_choice(name: str, choices: Tuple[str, ...], default: str) -> str:
+    raw = (os.getenv(name) or default).strip().lower()
+    return raw if raw in choices else default
 
 def _read_env() -> Settings:
     provider = (os.getenv("SEARCH_PROVIDER") or "serper").lower()
-    if provider not in ("google", "brave", "serper"):
+    if provider not in SEARCH_PROVIDERS:
         provider = "serper"
     return Settings(
         search_provider=provider,  # type: ignore[assignment]
@@ -28,6 +155,63 @@ def _read_env() -> Settings:
         google_api_key=os.getenv("GOOGLE_API_KEY"),
         brave_api_key=os.getenv("BRAVE_API_KEY"),
         serper_api_key=os.getenv("SERPER_API_KEY"),
+        search_providers=_env_providers("SEARCH_PROVIDERS"),  # type: ignore[arg-type]
+        search_fanout_first_n=_env_int("SEARCH_FANOUT_FIRST_N", 2),
+        search_hedge_s=_env_float("SEARCH_HEDGE_S", 1.0),
+        max_search_queries=_env_int("MAX_SEARCH_QUERIES", 3),
+        verdict_early_exit=_env_bool("VERDICT_EARLY_EXIT", False),
+        local_kb_dir=os.getenv("LOCAL_KB_DIR") or "kb",
+        pipeline_max_inflight=_env_int("PIPELINE_MAX_INFLIGHT", 2),
+        pipeline_max_queue=_env_int("PIPELINE_MAX_QUEUE", 8),
+        pipeline_queue_timeout_s=_env_float("PIPELINE_QUEUE_TIMEOUT_S", 5.0),
+        client_rate_per_min=_env_float("CLIENT_RATE_PER_MIN", 30.0),
+        client_burst=_env_int("CLIENT_BURST", 10),
+        debug_max_inflight=_env_int("DEBUG_MAX_INFLIGHT", 1),
+        debug_max_queue=_env_int("DEBUG_MAX_QUEUE", 2),
+        debug_queue_timeout_s=_env_float("DEBUG_QUEUE_TIMEOUT_S", 2.0),
+        debug_rate_per_min=_env_float("DEBUG_RATE_PER_MIN", 6.0),
+        debug_burst=_env_int("DEBUG_BURST", 3),
+        trust_forwarded_for=_env_bool("TRUST_FORWARDED_FOR", False),
+        pipeline_budget_s=_env_float("PIPELINE_BUDGET_S", 4.0),
+        default_check_mode=_env_choice("DEFAULT_CHECK_MODE", CHECK_MODES, "balanced"),  # type: ignore[arg-type]
+        mode_downgrade_load=_env_float("MODE_DOWNGRADE_LOAD", 1.5),
+        cache_backend=_env_choice("CACHE_BACKEND", CACHE_BACKENDS, "sqlite"),  # type: ignore[arg-type]
+        cache_path=os.getenv("CACHE_PATH") or os.getenv("SEARCH_CACHE_PATH") or "cache.db",
+        cache_url=os.getenv("CACHE_URL") or "redis://127.0.0.1:6379/0",
+        cache_max_mb=_env_float("CACHE_MAX_MB", 256.0),
+        page_cache_ttl_s=_env_float("PAGE_CACHE_TTL_S", 6 * 3600),
+        search_cache_ttl_s=_env_float("SEARCH_CACHE_TTL_S", 6 * 3600),
+        search_cache_stale_s=_env_float("SEARCH_CACHE_STALE_S", 24 * 3600),
+        search_cache_size=_env_int("SEARCH_CACHE_SIZE", 512),
+        redirect_ttl_s=_env_float("REDIRECT_TTL_S", 7 * 24 * 3600),
+        dns_cache_ttl_s=_env_float("DNS_CACHE_TTL_S", 300.0),
+        dns_negative_ttl_s=_env_float("DNS_NEGATIVE_TTL_S", 30.0),
+        fetch_prewarm=_env_bool("FETCH_PREWARM", True),
+        persist_abandoned=_env_bool("PERSIST_ABANDONED_RESULTS", False),
+        verdict_cache_ttl_s=_env_float("VERDICT_CACHE_TTL_S", 3600.0),
+        refresh_interval_s=_env_float("REFRESH_INTERVAL_S", 30.0),
+        refresh_horizon_s=_env_float("REFRESH_HORIZON_S", 300.0),
+        refresh_min_requests=_env_float("REFRESH_MIN_REQUESTS", 5.0),
+        refresh_budget_s=_env_float("REFRESH_BUDGET_S", 120.0),
+        result_retention_days=_env_float("RESULT_RETENTION_DAYS", 0.0),
+        result_retention_by_verdict=_env_days_by_verdict("RESULT_RETENTION_BY_VERDICT"),
+        degraded_retention_days=_env_float("DEGRADED_RETENTION_DAYS", 30.0),
+        retention_keep_viewed=_env_bool("RETENTION_KEEP_VIEWED", True),
+        retention_interval_s=_env_float("RETENTION_INTERVAL_S", 3600.0),
+        retention_batch=_env_int("RETENTION_BATCH", 500),
+        model_server_socket=os.getenv("MODEL_SERVER_SOCKET") or None,
+        model_server_timeout_s=_env_float("MODEL_SERVER_TIMEOUT_S", 30.0),
+        torch_workers=_env_int("TORCH_WORKERS", _env_int("WEB_CONCURRENCY", 0)),
+        torch_threads=_env_int("TORCH_THREADS", 0),
+        torch_interop_threads=_env_int("TORCH_INTEROP_THREADS", 0),
+        torch_pin_cpus=_env_bool("TORCH_PIN_CPUS", False),
+        nli_batch=_env_int("NLI_BATCH", 0),
+        torch_tune_file=os.getenv("TORCH_TUNE_FILE") or "torch_tune.json",
+        embed_backend=_env_choice("EMBED_BACKEND", EMBED_BACKENDS, "torch"),  # type: ignore[arg-type]
+        embed_onnx_file=os.getenv("EMBED_ONNX_FILE") or "onnx/model.onnx",
+        vector_store_dtype=_env_choice("VECTOR_STORE_DTYPE", VECTOR_DTYPES, "float32"),  # type: ignore[arg-type]
+        model_memory_budget_mb=_env_float("MODEL_MEMORY_BUDGET_MB", 0.0),
+        model_idle_unload_s=_env_float("MODEL_IDLE_UNLOAD_S", 0.0),
     )
 
 @lru_cache(maxsize=1)
@@ -0,0 +1,297 @@
+# app/fetch/dns.py
+"""
+DNS caching and connection pre-warming behind the shared fetch client.
+
+DnsCache keeps positive answers for their record TTL (when `aiodns` is
+installed; otherwise DNS_CACHE_TTL_S) and failures for DNS_NEGATIVE_TTL_S,
+with concurrent lookups of one host sharing a single query.
+
+CachingBackend is an httpcore network backend that connects to cached
+addresses and can open connections ahead of time: `warm()` resolves, connects
+and (for https) completes the TLS handshake, then parks the stream until the
+pool asks for a connection to that host. PoolTransport puts an httpcore pool
+using that backend behind httpx, through the public APIs of both libraries.
+"""
+from __future__ import annotations
+import asyncio
+import contextlib
+import ipaddress
+import socket
+import ssl
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import httpcore
+import httpx
+from httpcore import AnyIOBackend, AsyncNetworkBackend, AsyncNetworkStream
+
+from app.cache.base import Cache
+from app.cache.memory import MemoryBackend
+from app.metrics import get_metrics
+
+MIN_TTL_S = 30.0  # floor for record TTLs; very short ones aren't worth a lookup per fetch
+MAX_ENTRIES = 2048
+WARM_TTL_S = 10.0  # parked connections older than this are closed, not handed out
+Entry = Tuple[Optional[List[str]], str]  # (addresses or None, error)
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+class DnsCache:
+    """
+    Answers live in a process-local "dns" cache namespace: a shared tier
+    would cost a round trip per connection for data the resolver (or the
+    OS cache) returns about as fast.
+    """
+
+    def __init__(self, ttl_s: float = 300.0, negative_ttl_s: float = 30.0, max_items: int = MAX_ENTRIES):
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.store = Cache("dns", MemoryBackend(max_items=max_items))
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def _query(self, host: str) -> Tuple[List[str], Optional[float]]:
+        """Addresses and the smallest record TTL, if the resolver reports one."""
+        try:
+            import aiodns  # optional: exposes record TTLs
+        except ImportError:
+            aiodns = None
+        if aiodns is not None:
+            try:
+                answers = await aiodns.DNSResolver().query(host, "A")
+                if answers:
+                    return [a.host for a in answers], float(min(a.ttl for a in answers))
+            except aiodns.error.DNSError:
+                pass  # fall through to the system resolver (hosts file, AAAA-only, ...)
+        infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        addrs: list[str] = []
+        for family, _, _, _, sockaddr in sorted(infos, key=lambda i: i[0] != socket.AF_INET):
+            if sockaddr[0] not in addrs:
+                addrs.append(sockaddr[0])
+        return addrs, None
+
+    async def _lookup(self, host: str) -> Entry:
+        metrics = get_metrics()
+        t0 = time.perf_counter()
+        try:
+            addrs, ttl = await self._query(host)
+            if not addrs:
+                raise socket.gaierror(f"no addresses for {host}")
+            ttl = self.ttl_s if ttl is None else min(self.ttl_s, max(MIN_TTL_S, ttl))
+            entry: Entry = (addrs, "")
+        except (OSError, UnicodeError) as e:
+            metrics.incr("dns.error")
+            ttl = self.negative_ttl_s
+            entry = (None, str(e) or type(e).__name__)
+        metrics.observe("dns.lookup", time.perf_counter() - t0)
+        if self.ttl_s > 0:
+            self.store.set(host, list(entry), ttl_s=ttl)
+        return entry
+
+    async def resolve(self, host: str) -> List[str]:
+        """Addresses for `host`, IPv4 first. Raises socket.gaierror (possibly cached)."""
+        if _is_ip(host):
+            return [host.strip("[]")]
+        metrics = get_metrics()
+        entry = self.store.get(host) if self.ttl_s > 0 else None
+        if entry is not None:
+            metrics.incr("dns.negative_hit" if entry[0] is None else "dns.hit")
+        else:
+            metrics.incr("dns.miss")
+            task = self._inflight.get(host)
+            if task is None or task.get_loop() is not asyncio.get_running_loop():
+                task = asyncio.ensure_future(self._lookup(host))
+                self._inflight[host] = task
+                task.add_done_callback(lambda t, h=host: self._inflight.pop(h, None) if self._inflight.get(h) is t else None)
+            entry = await asyncio.shield(task)
+        if entry[0] is None:
+            raise socket.gaierror(entry[1])
+        return list(entry[0])
+
+class _WarmStream(AsyncNetworkStream):
+    """A pre-connected stream; its TLS handshake is already done for `tls_host`."""
+
+    def __init__(self, inner: AsyncNetworkStream, tls_host: Optional[str]):
+        self.inner = inner
+        self.tls_host = tls_host
+
+    async def read(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+        return await self.inner.read(max_bytes, timeout)
+
+    async def write(self, buffer: bytes, timeout: Optional[float] = None) -> None:
+        await self.inner.write(buffer, timeout)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    async def start_tls(self, ssl_context: ssl.SSLContext, server_hostname: Optional[str] = None,
+                        timeout: Optional[float] = None) -> AsyncNetworkStream:
+        if self.tls_host is not None and self.tls_host == server_hostname:
+            return self.inner
+        return await self.inner.start_tls(ssl_context, server_hostname, timeout)
+
+    def get_extra_info(self, info: str) -> Any:
+        return self.inner.get_extra_info(info)
+
+class CachingBackend(AsyncNetworkBackend):
+    def __init__(self, dns: DnsCache, ssl_context: ssl.SSLContext, inner: Optional[AsyncNetworkBackend] = None):
+        self.dns = dns
+        self.ssl_context = ssl_context
+        self.inner = inner or AnyIOBackend()
+        self._parked: Dict[Tuple[str, int], List[Tuple[float, _WarmStream]]] = {}
+        self._warming: Dict[Tuple[str, int], asyncio.Task] = {}
+
+    async def _connect(self, host: str, port: int, timeout: Optional[float] = None,
+                       local_address: Optional[str] = None, socket_options: Optional[Iterable[Any]] = None
+                       ) -> AsyncNetworkStream:
+        try:
+            addrs = await self.dns.resolve(host)
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(f"dns: {host}: {e}") from e
+        last: Optional[Exception] = None
+        for addr in addrs[:3]:
+            try:
+                return await self.inner.connect_tcp(addr, port, timeout=timeout, local_address=local_address,
+                                                    socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last = e
+        assert last is not None
+        raise last
+
+    def _take_parked(self, key: Tuple[str, int]) -> Optional[_WarmStream]:
+        parked = self._parked.get(key) or []
+        while parked:
+            at, stream = parked.pop()
+            if time.monotonic() - at < WARM_TTL_S:
+                return stream
+            asyncio.ensure_future(stream.aclose())
+        return None
+
+    def _reap(self) -> None:
+        """Close parked streams past WARM_TTL_S, for every host: most warmed hosts are never asked for again."""
+        cutoff = time.monotonic() - WARM_TTL_S
+        for key in list(self._parked):
+            keep = []
+            for at, stream in self._parked[key]:
+                if at >= cutoff:
+                    keep.append((at, stream))
+                else:
+                    asyncio.ensure_future(stream.aclose())
+            if keep:
+                self._parked[key] = keep
+            else:
+                del self._parked[key]
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None,
+                          local_address: Optional[str] = None, socket_options: Optional[Iterable[Any]] = None
+                          ) -> AsyncNetworkStream:
+        key = (host, port)
+        pending = self._warming.get(key)
+        if pending is not None and not pending.done():
+            # a pre-warm is already connecting; waiting is cheaper than a second handshake
+            await asyncio.wait([pending], timeout=timeout)
+        stream = self._take_parked(key)
+        if stream is not None:
+            get_metrics().incr("fetch.warm_connection_used")
+            return stream
+        return await self._connect(host, port, timeout, local_address, socket_options)
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options: Optional[Iterable[Any]] = None) -> AsyncNetworkStream:
+        return await self.inner.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.inner.sleep(seconds)
+
+    async def _warm(self, host: str, port: int, tls: bool, timeout: float) -> None:
+        metrics = get_metrics()
+        t0 = time.perf_counter()
+        try:
+            stream = await self._connect(host, port, timeout)
+            if tls:
+                stream = await stream.start_tls(self.ssl_context, server_hostname=host, timeout=timeout)
+        except Exception:
+            metrics.incr("fetch.prewarm_failed")
+            return
+        metrics.observe("fetch.prewarm_connect", time.perf_counter() - t0)
+        self._reap()
+        self._parked.setdefault((host, port), []).append((time.monotonic(), _WarmStream(stream, host if tls else None)))
+
+    def warm(self, host: str, port: int, tls: bool, timeout: float = 3.0) -> Optional[asyncio.Task]:
+        """Start connecting to host:port in the background; no-op if already warming or parked."""
+        self._reap()
+        key = (host, port)
+        if key in self._warming and not self._warming[key].done():
+            return None
+        if self._parked.get(key):
+            return None
+        task = asyncio.ensure_future(self._warm(host, port, tls, timeout))
+        self._warming[key] = task
+        task.add_done_callback(lambda t: self._warming.pop(key, None) if self._warming.get(key) is t else None)
+        return task
+
+    async def aclose(self) -> None:
+        for streams in self._parked.values():
+            for _, s in streams:
+                try:
+                    await s.aclose()
+                except Exception:
+                    pass
+        self._parked.clear()
+
+# httpcore errors as the httpx exception of the same name (httpx mirrors httpcore's hierarchy)
+_HTTPCORE_ERRORS = (httpcore.TimeoutException, httpcore.NetworkError, httpcore.ProtocolError,
+                    httpcore.ProxyError, httpcore.UnsupportedProtocol)
+
+@contextlib.contextmanager
+def _as_httpx_errors(request: httpx.Request) -> Iterator[None]:
+    try:
+        yield
+    except _HTTPCORE_ERRORS as e:
+        for cls in type(e).__mro__:
+            mapped = getattr(httpx, cls.__name__, None)
+            if isinstance(mapped, type) and issubclass(mapped, httpx.TransportError):
+                raise mapped(str(e), request=request) from e
+        raise httpx.TransportError(str(e), request=request) from e
+
+class _PoolStream(httpx.AsyncByteStream):
+    def __init__(self, stream: Any, request: httpx.Request):
+        self.stream = stream
+        self.request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _as_httpx_errors(self.request):
+            async for chunk in self.stream:
+                yield chunk
+
+    async def aclose(self) -> None:
+        if hasattr(self.stream, "aclose"):
+            with _as_httpx_errors(self.request):
+                await self.stream.aclose()
+
+class PoolTransport(httpx.AsyncBaseTransport):
+    """An httpx transport over an httpcore connection pool, e.g. one built on CachingBackend."""
+
+    def __init__(self, pool: httpcore.AsyncConnectionPool):
+        self.pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        req = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(scheme=request.url.raw_scheme, host=request.url.raw_host,
+                             port=request.url.port, target=request.url.raw_path),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _as_httpx_errors(request):
+            resp = await self.pool.handle_async_request(req)
+        return httpx.Response(status_code=resp.status, headers=resp.headers,
+                              stream=_PoolStream(resp.stream, request), extensions=resp.extensions)
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
@@ -1,14 +1,26 @@
 # app/fetch/fetcher.py
 from __future__ import annotations
+import asyncio
 import re
-from typing import List, Optional
+import urllib.request
+import weakref
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
 
+import httpcore
 import httpx
 from bs4 import BeautifulSoup
 from readability import Document
 import trafilatura
 
+from app.cache.tier import get_shared_cache, register
+from app.deps import get_settings
+from app.fetch.dns import CachingBackend, DnsCache, PoolTransport
+from app.logic.deadline import Deadline
+from app.records import is_http_url
+from app.urls import canonicalize, get_redirects, url_key
+
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -22,6 +34,8 @@ HEADERS = {
 }
 
 TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+MIN_FETCH_S = 0.3  # below this a fetch cannot realistically finish
+MAX_CHUNKS = 200  # safety cap for pathological pages; the selector pre-ranks the rest
 BLOCKED_SCHEMES = {"javascript", "data"}
 BLOCKED_EXTS = {".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg"}
 
@@ -37,16 +51,113 @@ def _looks_blocked(url: str) -> bool:
         return True
     return False
 
-async def fetch_html(url: str) -> Optional[str]:
-    if _looks_blocked(url):
+PREWARM_MAX_HOSTS = 8
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, Optional[CachingBackend]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+@lru_cache(maxsize=1)
+def get_dns_cache() -> DnsCache:
+    s = get_settings()
+    dns = DnsCache(ttl_s=s.dns_cache_ttl_s, negative_ttl_s=s.dns_negative_ttl_s)
+    register(dns.store)
+    return dns
+
+def _uses_proxy() -> bool:
+    proxies = urllib.request.getproxies()  # HTTP(S)_PROXY / ALL_PROXY from the environment
+    return any(proxies.get(scheme) for scheme in ("http", "https", "all"))
+
+def _shared() -> Tuple[httpx.AsyncClient, Optional[CachingBackend]]:
+    """
+    One pooled client per event loop, connecting through the DNS cache. With
+    a proxy configured the stock transport is used instead (the proxy does
+    the lookups and connects), and there is nothing to pre-warm.
+    """
+    loop = asyncio.get_running_loop()
+    pair = _clients.get(loop)
+    if pair is None:
+        if _uses_proxy():
+            client = httpx.AsyncClient(headers=HEADERS, timeout=TIMEOUT, follow_redirects=True)
+            pair = _clients[loop] = (client, None)
+            return pair
+        ctx = httpx.create_ssl_context()
+        ctx.set_alpn_protocols(["http/1.1"])
+        backend = CachingBackend(get_dns_cache(), ctx)
+        limits = httpx.Limits()
+        pool = httpcore.AsyncConnectionPool(
+            ssl_context=ctx,
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=backend,
+        )
+        client = httpx.AsyncClient(headers=HEADERS, timeout=TIMEOUT, follow_redirects=True,
+                                   transport=PoolTransport(pool))
+        pair = _clients[loop] = (client, backend)
+    return pair
+
+def get_fetch_client() -> httpx.AsyncClient:
+    return _shared()[0]
+
+async def close_fetch_clients() -> None:
+    pair = _clients.pop(asyncio.get_running_loop(), None)
+    if pair is not None:
+        if pair[1] is not None:
+            await pair[1].aclose()
+        await pair[0].aclose()
+
+async def prewarm(urls: Iterable[str], max_hosts: int = PREWARM_MAX_HOSTS) -> int:
+    """
+    Resolve and connect (TCP + TLS) to the hosts the fetcher is about to hit,
+    in the background. Returns the number of hosts being warmed.
+    """
+    _, backend = _shared()
+    if backend is None:
+        return 0
+    seen: set[Tuple[str, int]] = set()
+    for target in await get_redirects().aresolve_many([str(u) for u in urls]):
+        if len(seen) >= max_hosts:
+            break
+        p = urlparse(target)
+        if p.scheme not in ("http", "https") or not p.hostname or _looks_blocked(p.geturl()):
+            continue
+        key = (p.hostname, p.port or (443 if p.scheme == "https" else 80))
+        if key not in seen:
+            seen.add(key)
+            backend.warm(key[0], key[1], tls=p.scheme == "https")
+    return len(seen)
+
+def _timeout(seconds: Optional[float]) -> httpx.Timeout:
+    if seconds is None:
+        return TIMEOUT
+    return httpx.Timeout(min(10.0, seconds), connect=min(5.0, seconds))
+
+async def fetch_html(url: str, timeout: Optional[float] = None) -> Optional[str]:
+    # go straight to the canonical / previously seen final URL
+    redirects = get_redirects()
+    target = await redirects.aresolve(url)
+    if _looks_blocked(target):
+        return None
+    client = get_fetch_client()
+    try:
+        resp = await client.get(target, timeout=_timeout(timeout))
+    except httpx.HTTPError:
+        if target == url:
+            raise
+        resp = None
+    if target != url and (resp is None or 400 <= resp.status_code < 500):
+        # some sites need the parameters or host we canonicalized away, or moved since the redirect was seen
+        if target != canonicalize(url):
+            await redirects.aforget(url)
+        resp = await client.get(url, timeout=_timeout(timeout))
+    final = str(resp.url)
+    if is_http_url(final):
+        await redirects.arecord(url, final)
+    ct = resp.headers.get("Content-Type", "")
+    if "text/html" not in ct and "application/xhtml+xml" not in ct:
         return None
-    async with httpx.AsyncClient(headers=HEADERS, timeout=TIMEOUT, follow_redirects=True) as client:
-        resp = await client.get(url)
-        ct = resp.headers.get("Content-Type", "")
-        if "text/html" not in ct and "application/xhtml+xml" not in ct:
-            return None
-        resp.raise_for_status()
-        return resp.text
+    resp.raise_for_status()
+    return resp.text
 
 def _clean_text(txt: str) -> str:
     txt = re.sub(r"\r\n|\r", "\n", txt)
@@ -87,7 +198,7 @@ def extract_main_text(html: str, base_url: str | None = None) -> Optional[str]:
         pass
     return None
 
-def _split_paragraphs(text: str) -> List[str]:
+def split_paragraphs(text: str, cap: Optional[int] = MAX_CHUNKS) -> List[str]:
     # Split on blank lines first
     parts = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
     out: list[str] = []
@@ -117,19 +228,38 @@ def _split_paragraphs(text: str) -> List[str]:
         if key not in seen:
             seen.add(key)
             deduped.append(p)
-    return deduped[:12]  # cap
+    return deduped[:cap] if cap else deduped
 
-async def get_paragraphs_for_url(url: str) -> List[str]:
-    html = await fetch_html(url)
+async def get_paragraphs_for_url(url: str, timeout: Optional[float] = None) -> List[str]:
+    html = await fetch_html(url, timeout=timeout)
     if not html:
         return []
     text = extract_main_text(html, base_url=url)
     if not text:
         return []
-    return _split_paragraphs(text)
+    return split_paragraphs(text)
 
-async def get_paragraphs_with_fallback(url: str, snippet: str | None) -> List[str]:
-    paras = await get_paragraphs_for_url(url)
+async def get_paragraphs_with_fallback(
+    url: str,
+    snippet: str | None,
+    deadline: Optional[Deadline] = None,
+    timeout: Optional[float] = None,
+) -> List[str]:
+    ttl = get_settings().page_cache_ttl_s
+    pages = get_shared_cache("pages") if ttl > 0 else None
+    if pages is not None:
+        cached = await pages.aget(url_key(url))
+        if cached:
+            return cached
+    if deadline is not None:
+        budget = deadline.timeout(timeout if timeout is not None else 10.0)
+        if budget < MIN_FETCH_S:
+            deadline.mark_degraded("fetch")
+            return [snippet] if snippet else []
+        timeout = budget
+    paras = await get_paragraphs_for_url(url, timeout=timeout)
     if paras:
+        if pages is not None:
+            await pages.aset(url_key(url), paras, ttl_s=ttl)
         return paras
     return [snippet] if snippet else []
@@ -0,0 +1,180 @@
+# app/logic/admission.py
+from __future__ import annotations
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Deque, Optional
+
+from app.deps import get_settings
+
+MAX_TRACKED_CLIENTS = 10_000
+
+class Rejected(Exception):
+    """Raised when a request is shed. Carries the HTTP status and a Retry-After hint."""
+
+    def __init__(self, status: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate_per_s: float, burst: int, now: float):
+        self.rate = rate_per_s
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Consume one token. Returns 0 on success, else seconds until a token is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        if self.rate <= 0:
+            return 60.0
+        return (1.0 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Per-client token buckets; least recently seen clients are forgotten past a cap."""
+
+    def __init__(self, rate_per_min: float, burst: int, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.rate_per_s = rate_per_min / 60.0
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def check(self, client: str) -> None:
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_s, self.burst, now)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        wait = bucket.take(now)
+        if wait > 0:
+            raise Rejected(429, "rate limit exceeded", wait)
+
+class Governor:
+    """
+    Caps concurrent work at `max_inflight` with a bounded FIFO wait queue.
+    Requests that find the queue full, or wait longer than `queue_timeout`,
+    are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, max_inflight: int, max_queue: int, queue_timeout: float):
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_ewma = 1.0  # seconds, refined as requests complete
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def load(self) -> float:
+        """Occupancy in [0, ~2]: >1 means requests are queueing."""
+        return (self.inflight + self.waiting) / self.max_inflight
+
+    def _retry_after(self) -> float:
+        return self._service_ewma * (self.waiting + 1) / self.max_inflight
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without queueing; False if busy or anyone is waiting."""
+        if self.inflight < self.max_inflight and not self._waiters:
+            self.inflight += 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        if self.inflight < self.max_inflight and not self._waiters:
+            self.inflight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Rejected(503, "server busy", self._retry_after())
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                # slot was handed over right at the deadline; keep it
+                return
+            raise Rejected(503, "server busy", self._retry_after())
+        except BaseException:
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+        finally:
+            if not fut.done():
+                fut.cancel()
+            try:
+                self._waiters.remove(fut)
+            except ValueError:
+                pass
+
+    def release(self) -> None:
+        # hand the slot straight to the next live waiter, else free it
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.inflight = max(0, self.inflight - 1)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_ewma = 0.8 * self._service_ewma + 0.2 * (time.monotonic() - started)
+            self.release()
+
+class Budget:
+    """A governor plus a per-client rate limiter guarding one class of endpoints."""
+
+    def __init__(self, governor: Governor, limiter: RateLimiter):
+        self.governor = governor
+        self.limiter = limiter
+
+    @asynccontextmanager
+    async def admit(self, client: str) -> AsyncIterator[None]:
+        self.limiter.check(client)
+        async with self.governor.slot():
+            yield
+
+@lru_cache(maxsize=1)
+def get_pipeline_budget() -> Budget:
+    s = get_settings()
+    return Budget(
+        Governor(s.pipeline_max_inflight, s.pipeline_max_queue, s.pipeline_queue_timeout_s),
+        RateLimiter(s.client_rate_per_min, s.client_burst),
+    )
+
+@lru_cache(maxsize=1)
+def get_debug_budget() -> Budget:
+    s = get_settings()
+    return Budget(
+        Governor(s.debug_max_inflight, s.debug_max_queue, s.debug_queue_timeout_s),
+        RateLimiter(s.debug_rate_per_min, s.debug_burst),
+    )
+
+def client_key(host: Optional[str], forwarded_for: Optional[str]) -> str:
+    if forwarded_for and get_settings().trust_forwarded_for:
+        first = forwarded_for.split(",")[0].strip()
+        if first:
+            return first
+    return host or "unknown"
@@ -1,10 +1,11 @@
 # app/logic/communicator.py
 from __future__ import annotations
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence
 from urllib.parse import urlparse
 import re
 
-from app.schemas import Source, VerdictLabel
+from app.records import Hit
+from app.schemas import VerdictLabel
 
 MAX_LEN = 600
 
@@ -17,7 +18,7 @@ def _domain(url: str | None) -> str:
     except Exception:
         return "source"
 
-def _pick_url(sources: List[Source], cites: Dict[str, List[int]]) -> Optional[str]:
+def _pick_url(sources: Sequence[Hit], cites: Dict[str, List[int]]) -> Optional[str]:
     # Prefer cited support, then cited contra, then any with evidence, else first source
     for key in ("support", "contra"):
         for i in (cites.get(key) or []):
@@ -38,7 +39,7 @@ def build_post(
     claim: str,
     label: VerdictLabel,
     rationale: str,
-    sources: List[Source],
+    sources: Sequence[Hit],
     cites: Dict[str, List[int]],
 ) -> str:
     url = _pick_url(sources, cites)
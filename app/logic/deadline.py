@@ -0,0 +1,44 @@
+# app/logic/deadline.py
+from __future__ import annotations
+import math
+import time
+from typing import List, Optional
+
+class Deadline:
+    """
+    Request-scoped latency budget. Stages ask it how long they may take and
+    record when they had to cut work short, which surfaces as `degraded`.
+    A budget of None (or <= 0) means unbounded.
+    """
+
+    def __init__(self, budget_s: Optional[float] = None):
+        self.started = time.monotonic()
+        self.expires_at = self.started + budget_s if budget_s and budget_s > 0 else None
+        self.degraded = False
+        self.reasons: List[str] = []
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at is not None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, cap: float, share: float = 1.0) -> float:
+        """Time a stage may spend: at most `cap`, and at most `share` of what is left."""
+        if self.expires_at is None:
+            return cap
+        return max(0.0, min(cap, self.remaining() * share))
+
+    def mark_degraded(self, reason: str) -> None:
+        self.degraded = True
+        if reason not in self.reasons:
+            self.reasons.append(reason)
@@ -0,0 +1,52 @@
+# app/logic/modes.py
+"""
+Check modes: per-request latency/quality trade-offs.
+
+A Profile fixes how much work one check does: how many sources and search
+queries, how much evidence per source, whether pages are fetched or only
+search snippets are used, how the evidence is scored, and the share of
+PIPELINE_BUDGET_S it may spend. "balanced" is the pipeline's historical
+behaviour.
+
+Under load the served mode is stepped down from the requested one, one
+step per MODE_DOWNGRADE_LOAD of governor occupancy; past "fast", NLI is
+replaced by the similarity-only heuristic.
+"""
+from __future__ import annotations
+import math
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Tuple
+
+from app.deps import CHECK_MODES
+from app.schemas import Mode, NliKind
+
+@dataclass(frozen=True)
+class Profile:
+    sources: int  # fused search results kept
+    per_source: int  # evidence paragraphs per source
+    max_total: int  # evidence paragraphs overall
+    fetch: bool  # False => score search snippets, fetch nothing
+    nli: NliKind
+    budget_factor: float  # multiplier on PIPELINE_BUDGET_S
+    max_queries: Optional[int] = None  # None => MAX_SEARCH_QUERIES
+
+PROFILES: Dict[Mode, Profile] = {
+    "fast": Profile(sources=3, per_source=1, max_total=3, fetch=False, nli="distilled", budget_factor=0.5, max_queries=1),
+    "balanced": Profile(sources=5, per_source=2, max_total=8, fetch=True, nli="full", budget_factor=1.0),
+    "thorough": Profile(sources=8, per_source=3, max_total=16, fetch=True, nli="full", budget_factor=3.0),
+}
+
+def downgrade_steps(load: float, threshold: float) -> int:
+    """Modes to step down: none at or below `threshold`, one more per `threshold` above it."""
+    if threshold <= 0 or load <= threshold:
+        return 0
+    return math.ceil(load / threshold) - 1
+
+def resolve_mode(requested: Mode, load: float = 0.0, threshold: float = 0.0) -> Tuple[Mode, Profile]:
+    """The mode actually served for `requested` at governor occupancy `load`, and its profile."""
+    i = CHECK_MODES.index(requested) - downgrade_steps(load, threshold)
+    mode: Mode = CHECK_MODES[max(0, i)]  # type: ignore[assignment]
+    profile = PROFILES[mode]
+    if i < 0:
+        profile = replace(profile, nli="similarity")
+    return mode, profile
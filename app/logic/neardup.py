@@ -0,0 +1,78 @@
+# app/logic/neardup.py
+from __future__ import annotations
+import hashlib
+import re
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+SHINGLE = 3  # words per shingle
+MAX_DISTANCE = 6  # Hamming distance at or below which two paragraphs are duplicates
+_BITS = np.arange(64, dtype=np.uint64)
+
+def _shingles(text: str) -> List[str]:
+    words = re.sub(r"\W+", " ", text).casefold().split()
+    if len(words) <= SHINGLE:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)]
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word shingles."""
+    shingles = _shingles(text)
+    if not shingles:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles],
+        dtype=np.uint64,
+    )
+    bits = (hashes[:, None] >> _BITS) & np.uint64(1)  # (n, 64)
+    votes = bits.sum(axis=0).astype(np.int64) * 2 - len(shingles)
+    out = 0
+    for i in np.flatnonzero(votes > 0):
+        out |= 1 << int(i)
+    return out
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class NearDupIndex:
+    """
+    SimHash index with LSH banding: each fingerprint is split into
+    max_distance + 1 bands, so by pigeonhole any fingerprint within
+    max_distance bits shares at least one band exactly. Only items sharing
+    a band are compared, which keeps lookups cheap as the index grows.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self._width = 64 // self.bands
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, Hashable]]] = {}
+
+    def _band_keys(self, fp: int) -> List[Tuple[int, int]]:
+        mask = (1 << self._width) - 1
+        return [(b, (fp >> (b * self._width)) & mask) for b in range(self.bands)]
+
+    def find(self, text: str) -> Optional[Hashable]:
+        """Key of an indexed near-duplicate of `text`, if any."""
+        return self._find(simhash(text))
+
+    def _find(self, fp: int) -> Optional[Hashable]:
+        for band in self._band_keys(fp):
+            for other, key in self._buckets.get(band, ()):
+                if hamming(fp, other) <= self.max_distance:
+                    return key
+        return None
+
+    def add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """
+        Index `text` under `key` unless it duplicates something already indexed.
+        Returns the key of the original when it is a duplicate, else None.
+        """
+        fp = simhash(text)
+        dup = self._find(fp)
+        if dup is not None:
+            return dup
+        for band in self._band_keys(fp):
+            self._buckets.setdefault(band, []).append((fp, key))
+        return None
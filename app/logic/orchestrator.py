@@ -1,33 +1,100 @@
 # app/logic/orchestrator.py
 from __future__ import annotations
-from typing import Dict, Any
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
 
+from app.deps import get_settings
+from app.fetch.fetcher import prewarm
+from app.logic.admission import get_pipeline_budget
+from app.logic.deadline import Deadline
+from app.logic.modes import resolve_mode
+from app.records import hit_dict
 from app.search.provider import get_search
+from app.search.rewrite import expand_queries, search_many
 from app.logic.selector import select_evidence
 from app.nlp.verdict import make_verdict
 from app.logic.communicator import build_post
+from app.schemas import Mode
 from app.store.db import save_result
+from app.store.verdicts import get_verdict_cache
 
-async def run_pipeline(claim: str) -> Dict[str, Any]:
+async def run_pipeline(claim: str, budget_s: Optional[float] = None, mode: Optional[Mode] = None) -> Dict[str, Any]:
+    settings = get_settings()
+    # the requested tier, stepped down while the pipeline governor is backed up
+    requested = mode or settings.default_check_mode
+    served, profile = resolve_mode(requested, get_pipeline_budget().governor.load(), settings.mode_downgrade_load)
+    if budget_s is None:
+        budget_s = settings.pipeline_budget_s * profile.budget_factor
+    deadline = Deadline(budget_s)
+    if served != requested or profile.nli == "similarity":
+        deadline.mark_degraded("load")
     search = get_search()
-    # 1) search
-    sources = await search(claim)
+    # 1) search: the claim plus a few reformulations, fused
+    queries = expand_queries(claim, profile.max_queries or settings.max_search_queries)
+    sources = (await search_many(search, queries, deadline=deadline, k=profile.sources))[:profile.sources]
+    if settings.fetch_prewarm and profile.fetch:
+        # DNS + TCP/TLS to the result hosts while the selector embeds the claim
+        await prewarm([str(s.url) for s in sources if not s.paragraphs])
     # 2) select evidence
-    picked = await select_evidence(claim, sources, per_source=2, max_total=8)
-    # 3) verdict
-    label, confidence, rationale, cites = make_verdict(claim, picked)
+    picked = await select_evidence(
+        claim, sources, per_source=profile.per_source, max_total=profile.max_total,
+        deadline=deadline, fetch=profile.fetch,
+    )
+    # 3) verdict, off the event loop; if this task is cancelled (client gone)
+    # the thread stops before its next NLI batch
+    cancel = threading.Event()
+    try:
+        label, confidence, rationale, cites = await asyncio.to_thread(
+            make_verdict, claim, picked, deadline=deadline, cancel=cancel, nli=profile.nli
+        )
+    finally:
+        cancel.set()
     # 4) communicator
     post = build_post(claim, label, rationale, picked, cites)
 
+    computed_at = datetime.now(timezone.utc)
+    ttl_s = settings.verdict_cache_ttl_s
+    cacheable = ttl_s > 0 and not deadline.degraded
     result: Dict[str, Any] = {
         "claim": claim,
         "verdict": label,
         "confidence": round(float(abs(confidence)), 3),
         "rationale": rationale,
         "post": post,
-        "sources": [s.model_dump(mode='json') for s in picked],
+        "sources": [hit_dict(s) for s in picked],
         "id": "",
+        "degraded": deadline.degraded,
+        "mode": served,
+        "computed_at": computed_at.isoformat(),
+        "fresh_until": (computed_at + timedelta(seconds=ttl_s)).isoformat() if cacheable else None,
     }
     rid = save_result(result)
     result["id"] = rid
     return result
+
+async def cached_verdict(claim: str, mode: Optional[Mode] = None) -> Optional[Dict[str, Any]]:
+    """
+    The claim's cached result, if fresh, or None. Every call counts towards
+    the claim's popularity, which drives background refreshes; counts are
+    buffered and written in batches off the event loop. Cheap, so callers
+    look here before taking a pipeline slot.
+    """
+    cache = get_verdict_cache()
+    if cache.count(claim):
+        await asyncio.to_thread(cache.flush)
+    return await cache.alookup(claim, mode or get_settings().default_check_mode)
+
+async def compute_verdict(claim: str, mode: Optional[Mode] = None) -> Dict[str, Any]:
+    """run_pipeline, remembering the result in the verdict cache."""
+    result = await run_pipeline(claim, mode=mode)
+    await get_verdict_cache().aremember(claim, result)
+    return result
+
+async def check_claim(claim: str, mode: Optional[Mode] = None) -> Dict[str, Any]:
+    """run_pipeline behind the per-claim verdict cache."""
+    cached = await cached_verdict(claim, mode)
+    if cached is not None:
+        return cached
+    return await compute_verdict(claim, mode=mode)
@@ -0,0 +1,178 @@
+# app/logic/refresher.py
+"""
+Background refresh of hot claims, so the first request after a cached
+verdict expires doesn't pay for the whole pipeline.
+
+Every REFRESH_INTERVAL_S the refresher asks the verdict cache for claims
+requested at least REFRESH_MIN_REQUESTS times recently (decayed count)
+whose verdict expires within REFRESH_HORIZON_S, and re-runs them one at a
+time. It stays out of the way of live traffic: a refresh only starts when
+the pipeline governor has a free slot and nobody is queued, and all
+refreshes together may use at most REFRESH_BUDGET_S of pipeline time per
+hour. Every worker runs a refresher; the budget's balance lives in the
+results database and each claim is leased before it is re-run, so workers
+share the budget and never refresh the same claim twice.
+"""
+from __future__ import annotations
+import asyncio
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.deps import get_settings
+from app.logic.admission import Governor, get_pipeline_budget
+from app.logic.orchestrator import run_pipeline
+from app.metrics import get_metrics
+from app.store import db
+from app.store.verdicts import VerdictCache, get_verdict_cache
+
+DUE_PER_TICK = 10  # claims considered per pass
+RETRY_AFTER_TICKS = 10  # a claim whose refresh didn't land is left alone this many passes, by every worker
+LEASE_S = 300.0  # a claim being refreshed is left to its worker this long (outlives any pipeline run)
+
+class ComputeBudget:
+    """
+    Seconds of work per hour, refilled continuously; a long job may overdraw
+    it. With `db_path` the balance is a row in that SQLite file, shared by
+    every process using it; otherwise it is kept in this process.
+    """
+
+    def __init__(self, seconds_per_hour: float, clock: Callable[[], float] = time.time,
+                 db_path: Optional[str] = None, name: str = "refresh"):
+        self.capacity = max(0.0, seconds_per_hour)
+        self.rate = self.capacity / 3600.0
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.db_path = db_path
+        self.name = name
+        self._db_ready = False
+
+    def _settle(self, spent: float) -> float:
+        """Refill up to now, take `spent` off, and return the balance."""
+        now = self.clock()
+        if self.db_path is None:
+            self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate) - spent
+            self.updated = now
+            return self.tokens
+        c = sqlite3.connect(self.db_path)
+        try:
+            with c:
+                if not self._db_ready:
+                    c.execute("""
+                    CREATE TABLE IF NOT EXISTS compute_budgets (
+                        name TEXT PRIMARY KEY,
+                        tokens REAL NOT NULL,
+                        updated REAL NOT NULL
+                    )
+                    """)
+                    self._db_ready = True
+                # one statement, so concurrent workers can't both spend the same refill
+                c.execute("""
+                INSERT INTO compute_budgets (name, tokens, updated) VALUES (:name, :cap - :spent, :now)
+                ON CONFLICT (name) DO UPDATE SET
+                    tokens = MIN(:cap, tokens + MAX(0, :now - updated) * :rate) - :spent,
+                    updated = MAX(updated, :now)
+                """, {"name": self.name, "cap": self.capacity, "rate": self.rate, "spent": spent, "now": now})
+                self.tokens = c.execute("SELECT tokens FROM compute_budgets WHERE name = ?", (self.name,)).fetchone()[0]
+        finally:
+            c.close()
+        return self.tokens
+
+    def available(self) -> bool:
+        return self._settle(0.0) > 0
+
+    def spend(self, seconds: float) -> None:
+        self._settle(seconds)
+
+class Refresher:
+    def __init__(
+        self,
+        cache: VerdictCache,
+        governor: Governor,
+        run: Callable[..., Awaitable[Dict[str, Any]]],
+        interval_s: float,
+        horizon_s: float,
+        min_requests: float,
+        budget: ComputeBudget,
+    ):
+        self.cache = cache
+        self.governor = governor
+        self.run = run
+        self.interval_s = interval_s
+        self.horizon_s = horizon_s
+        self.min_requests = min_requests
+        self.budget = budget
+        self._task: Optional[asyncio.Task] = None
+
+    async def tick(self) -> int:
+        """One pass: refresh what is due while budget and idle capacity last. Returns refreshes landed."""
+        metrics = get_metrics()
+        landed = 0
+        await asyncio.to_thread(self.cache.flush)  # this worker's buffered request counts
+        due = await asyncio.to_thread(self.cache.due, self.horizon_s, self.min_requests, DUE_PER_TICK)
+        for claim, mode in due:
+            if not await asyncio.to_thread(self.budget.available):
+                metrics.incr("refresh.budget_exhausted")
+                break
+            if not self.governor.try_acquire():
+                metrics.incr("refresh.yielded")
+                break
+            if not await asyncio.to_thread(self.cache.lease, claim, LEASE_S):
+                self.governor.release()
+                metrics.incr("refresh.leased_elsewhere")
+                continue
+            t0 = time.monotonic()
+            ok = False
+            try:
+                result = await self.run(claim, mode=mode)
+                ok = await self.cache.aremember(claim, result, refreshed=True)
+            except Exception:
+                metrics.incr("refresh.error")
+            finally:
+                self.governor.release()
+                elapsed = time.monotonic() - t0
+                metrics.observe("refresh.run", elapsed)
+            await asyncio.to_thread(self.budget.spend, elapsed)
+            if ok:
+                landed += 1
+                metrics.incr("refresh.ok")
+                await asyncio.to_thread(self.cache.release, claim)
+            else:
+                # failed or degraded: keep the lease a while so no worker burns the budget on it every pass
+                await asyncio.to_thread(self.cache.release, claim, RETRY_AFTER_TICKS * self.interval_s)
+                metrics.incr("refresh.failed")
+        return landed
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await self.tick()
+            except Exception:  # keep refreshing after a store hiccup
+                get_metrics().incr("refresh.error")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+def make_refresher() -> Optional[Refresher]:
+    """The configured refresher, or None when caching or refreshing is disabled."""
+    s = get_settings()
+    if s.verdict_cache_ttl_s <= 0 or s.refresh_interval_s <= 0 or s.refresh_budget_s <= 0:
+        return None
+    return Refresher(
+        cache=get_verdict_cache(),
+        governor=get_pipeline_budget().governor,
+        run=run_pipeline,
+        interval_s=s.refresh_interval_s,
+        horizon_s=s.refresh_horizon_s,
+        min_requests=s.refresh_min_requests,
+        budget=ComputeBudget(s.refresh_budget_s, db_path=db.DB_PATH),
+    )
@@ -1,62 +1,245 @@
 # app/logic/selector.py
 from __future__ import annotations
 import asyncio
-from typing import List
+import math
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 
-from app.schemas import Source
+from app.records import Hit, as_hit
+from app.urls import get_redirects, url_key
 from app.fetch.fetcher import get_paragraphs_with_fallback
+from app.logic.deadline import Deadline
+from app.logic.neardup import NearDupIndex
 from app.nlp.embed import embed_text, embed_texts
+from app.nlp.lexical import BM25, tokenize
+from app.nlp.spans import best_spans
 
 SIM_THRESHOLD = 0.25  # drop very weak matches
+MMR_LAMBDA = 0.7  # relevance vs. novelty trade-off in the global pick
+MMR_POOL_FACTOR = 4  # candidates considered per evidence slot
+LEXICAL_TOP_M = 12  # chunks per page that get embedded after BM25 pre-ranking
+FETCH_TIMEOUT_S = 10.0
+FETCH_SHARE = 0.6  # of the remaining request budget; the rest is left for NLI
+FULL_FETCH_S = 2.0  # below this budget, fetch proportionally fewer sources
+
+def _snippet_paras(s: Hit) -> List[str]:
+    return [s.snippet] if s.snippet else []
+
+async def _fetch_all(sources: List[Hit], deadline: Optional[Deadline]) -> List[List[str]]:
+    budget: Optional[float] = None
+    n_fetch = len(sources)
+    if deadline is not None and deadline.bounded:
+        budget = deadline.timeout(FETCH_TIMEOUT_S, share=FETCH_SHARE)
+        if budget < FULL_FETCH_S:
+            n_fetch = min(n_fetch, max(1, math.ceil(n_fetch * budget / FULL_FETCH_S)))
+        if n_fetch < len(sources):
+            deadline.mark_degraded("sources")
+
+    # sources that arrive with their text (local knowledge base) need no fetch;
+    # URLs that canonicalize or redirect to the same page share one download
+    to_fetch = [s for s in sources[:n_fetch] if not s.paragraphs]
+    finals = iter(await get_redirects().aresolve_many([str(s.url) for s in to_fetch]))
+    by_page: Dict[str, asyncio.Task] = {}
+    tasks: list[Optional[asyncio.Task]] = []
+    for s in sources[:n_fetch]:
+        if s.paragraphs:
+            tasks.append(None)
+            continue
+        page = url_key(next(finals))
+        if page not in by_page:
+            by_page[page] = asyncio.create_task(
+                get_paragraphs_with_fallback(str(s.url), s.snippet, deadline=deadline, timeout=budget)
+            )
+        tasks.append(by_page[page])
+    running = list(by_page.values())
+    if running:
+        try:
+            _, pending = await asyncio.wait(running, timeout=budget)
+        except asyncio.CancelledError:
+            # the request was abandoned: close in-flight downloads before unwinding
+            for t in running:
+                t.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+        if pending:
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            if deadline is not None:
+                deadline.mark_degraded("fetch")
+
+    out: list[List[str]] = []
+    for i, s in enumerate(sources):
+        t = tasks[i] if i < len(tasks) else None
+        if s.paragraphs:
+            out.append(list(s.paragraphs))
+        elif t is None or t.cancelled() or t.exception() is not None:
+            out.append(_snippet_paras(s))
+        else:
+            out.append(t.result())
+    return out
+
+def _lexical_prefilter(claim: str, paras: List[str], m: int = LEXICAL_TOP_M) -> List[str]:
+    """
+    Keep the `m` chunks of one page that best match the claim under BM25
+    (fitted on that page), in page order. Pages with no lexical overlap
+    fall back to their first `m` chunks.
+    """
+    if len(paras) <= m:
+        return paras
+    top = BM25.build([tokenize(p) for p in paras]).top(tokenize(claim), m)
+    if len(top) < m:
+        # pad with leading chunks so short matches don't shrink the candidate set
+        chosen = set(top)
+        top += [i for i in range(len(paras)) if i not in chosen][:m - len(top)]
+    return [paras[i] for i in sorted(top)]
+
+def _collapse_near_dups(
+    sources: List[Hit], all_paras: List[List[str]]
+) -> Tuple[List[List[str]], Dict[Tuple[int, int], List[str]]]:
+    """
+    Drop paragraphs that near-duplicate one already seen in a higher-ranked
+    source (wire stories, mirrors). Returns the surviving paragraphs per
+    source and, keyed by (source, paragraph), the URLs of collapsed copies.
+    """
+    index = NearDupIndex()
+    kept: list[List[str]] = []
+    mirrors: Dict[Tuple[int, int], List[str]] = {}
+    for i, (s, paras) in enumerate(zip(sources, all_paras)):
+        mine: list[str] = []
+        for p in paras:
+            dup = index.add((i, len(mine)), p)
+            if dup is None:
+                mine.append(p)
+            elif dup[0] != i:
+                urls = mirrors.setdefault(dup, [])
+                if str(s.url) not in urls:
+                    urls.append(str(s.url))
+        kept.append(mine)
+    return kept, mirrors
+
+def _mmr_select(
+    sims: np.ndarray,
+    vecs: np.ndarray,
+    owners: np.ndarray,
+    k: int,
+    per_source_max: int,
+    per_source_min: int = 0,
+    lam: float = MMR_LAMBDA,
+) -> List[int]:
+    """
+    Global top-k over every (source, paragraph) pair by maximal marginal
+    relevance: each step takes the paragraph maximising
+    lam * sim(claim) - (1 - lam) * max sim(already picked), subject to
+    per-source quotas. Sources below `per_source_min` are served first.
+    Returns indices into `sims` in pick order.
+    """
+    cand = np.flatnonzero(sims >= SIM_THRESHOLD)
+    if cand.size == 0 or k <= 0 or per_source_max <= 0:
+        return []
+    # only the best few per slot can ever win; partial sort instead of a full one
+    pool_size = min(cand.size, MMR_POOL_FACTOR * k)
+    if pool_size < cand.size:
+        cand = cand[np.argpartition(-sims[cand], pool_size - 1)[:pool_size]]
+    pool_sims = sims[cand]
+    pool_vecs = vecs[cand]
+    pool_owner = owners[cand]
+    counts = np.zeros(int(owners.max()) + 1, dtype=np.int64)
+    available = np.ones(cand.size, dtype=bool)
+    redundancy = np.zeros(cand.size, dtype=np.float32)
+
+    picked: List[int] = []
+    for _ in range(min(k, cand.size)):
+        mask = available & (counts[pool_owner] < per_source_max)
+        needy = mask & (counts[pool_owner] < per_source_min)
+        if needy.any():
+            mask = needy
+        if not mask.any():
+            break
+        score = np.where(mask, lam * pool_sims - (1.0 - lam) * redundancy, -np.inf)
+        j = int(np.argmax(score))
+        picked.append(int(cand[j]))
+        available[j] = False
+        counts[pool_owner[j]] += 1
+        redundancy = np.maximum(redundancy, pool_vecs @ pool_vecs[j])
+    return picked
 
 async def select_evidence(
     claim: str,
-    sources: List[Source],
+    sources: List[Hit],
     per_source: int = 2,
     max_total: int = 8,
-) -> List[Source]:
-    claim_vec = embed_text(claim)
+    deadline: Optional[Deadline] = None,
+    min_per_source: int = 0,
+    fetch: bool = True,
+) -> List[Hit]:
+    """
+    Pick the evidence paragraphs NLI will see. With fetch=False no page is
+    downloaded: sources are scored on their search snippets (or their local
+    knowledge-base text).
+    """
+    sources = [as_hit(s) for s in sources]
+    if not fetch:
+        claim_vec = await asyncio.to_thread(embed_text, claim)
+        all_paras = [list(s.paragraphs) or _snippet_paras(s) for s in sources]
+    else:
+        # fetch paragraphs concurrently, bounded by the request deadline; the
+        # claim is embedded off the event loop meanwhile so fetches can progress
+        fetching = asyncio.create_task(_fetch_all(sources, deadline))
+        try:
+            claim_vec = await asyncio.to_thread(embed_text, claim)
+        except BaseException:
+            fetching.cancel()
+            raise
+        all_paras = await fetching
+    # cheap lexical pass over whole pages; only the top chunks get embedded
+    all_paras = [_lexical_prefilter(claim, paras) for paras in all_paras]
 
-    # fetch paragraphs concurrently
-    tasks = [get_paragraphs_with_fallback(s.url, s.snippet) for s in sources]
-    all_paras = await asyncio.gather(*tasks)
+    # collapse cross-source near-duplicates, then embed everything in one batch
+    kept, mirrors = _collapse_near_dups(sources, all_paras)
+    flat = [p for paras in kept for p in paras]
+    owners = np.array([i for i, paras in enumerate(kept) for _ in paras], dtype=np.int64)
+    local = [j for paras in kept for j in range(len(paras))]
 
-    selected_sources: list[Source] = []
-    for s, paras in zip(sources, all_paras):
-        if not paras:
-            selected_sources.append(s)
-            continue
+    chosen: List[int] = []
+    if flat:
+        all_vecs = await asyncio.to_thread(embed_texts, flat)
+        sims = all_vecs @ claim_vec  # cosine because normalized
+        chosen = _mmr_select(sims, all_vecs, owners, max_total, per_source, min_per_source)
+    # NLI sees only the best sentence window of each picked paragraph
+    span_of: Dict[int, str] = {}
+    if chosen:
+        span_of = dict(zip(chosen, await asyncio.to_thread(best_spans, claim_vec, [flat[g] for g in chosen])))
 
-        para_vecs = embed_texts(paras)
-        sims = para_vecs @ claim_vec  # cosine because normalized
-        top_idx = np.argsort(-sims)[:per_source]
+    # regroup the global pick per source, best first within each source
+    picked_by_source: Dict[int, List[int]] = {}
+    for g in chosen:
+        picked_by_source.setdefault(int(owners[g]), []).append(g)
 
+    selected_sources: list[Hit] = []
+    for src_i, (s, paras) in enumerate(zip(sources, kept)):
+        if not paras:
+            selected_sources.append(Hit(title=s.title, url=s.url, snippet=s.snippet))
+            continue
         evidence: list[str] = []
-        for i in top_idx:
-            score = float(sims[i])
-            if score < SIM_THRESHOLD:
-                continue
-            text = paras[i].strip()
+        spans: list[str] = []
+        ev_sims: list[float] = []
+        seen_at: list[str] = []
+        for g in sorted(picked_by_source.get(src_i, []), key=lambda g: -sims[g]):
+            text = flat[g].strip()
             if len(text) > 500:
                 text = text[:497] + "..."
             evidence.append(text)
-
+            spans.append(span_of[g].strip())
+            ev_sims.append(float(sims[g]))
+            for url in mirrors.get((src_i, local[g]), []):
+                if url not in seen_at:
+                    seen_at.append(url)
         selected_sources.append(
-            Source(title=s.title, url=s.url, snippet=s.snippet, evidence=evidence)
+            Hit(
+                title=s.title, url=s.url, snippet=s.snippet, evidence=evidence,
+                mirrors=seen_at, spans=spans, sims=ev_sims,
+            )
         )
 
-    # cap total evidence across all sources
-    def total_evidence() -> int:
-        return sum(len(s.evidence) for s in selected_sources)
-
-    if total_evidence() > max_total:
-        # trim round-robin
-        while total_evidence() > max_total:
-            for s in selected_sources:
-                if s.evidence:
-                    s.evidence.pop()
-                if total_evidence() <= max_total:
-                    break
-
     return selected_sources
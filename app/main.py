@@ -1,13 +1,20 @@
 """FastAPI main application module."""
 
+import asyncio
 import os
+from typing import Any, Awaitable, Optional, Set
 from fastapi import FastAPI, Query, HTTPException, Request, Body, Form
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from app.deps import get_active_search_provider
+from starlette.concurrency import run_in_threadpool
+from app.deps import get_active_search_provider, get_settings
+from app.metrics import get_metrics
+from app.nlp.lifecycle import get_manager
+from app.logic.admission import Rejected, client_key, get_debug_budget, get_pipeline_budget
 from app.search.provider import get_search
-from app.store.db import init_db, load_result
-from app.schemas import CheckRequest
+from app.store.db import init_db, load_result, record_view, search_results
+from app.schemas import CheckRequest, CheckResult, Mode
+from app.records import hit_dict
 
 # Create FastAPI app instance
 app = FastAPI(
@@ -19,15 +26,123 @@ app = FastAPI(
 # Templates setup
 templates = Jinja2Templates(directory="app/web/templates")
 
+DISCONNECT_POLL_S = 0.25  # how often a running pipeline checks whether its client is still there
+CLIENT_CLOSED = 499  # nginx's "client closed request"; never actually seen by the client
+_abandoned: Set[asyncio.Task] = set()  # runs left to finish after a disconnect (PERSIST_ABANDONED_RESULTS)
+
+_refresher = None  # app.logic.refresher.Refresher while running
+_sweeper = None  # app.store.retention.RetentionSweeper while running
+
+
 @app.on_event("startup")
-def _startup():
+async def _startup():
+    global _refresher, _sweeper
     init_db()
+    from app.logic.refresher import make_refresher
+    from app.store.retention import make_sweeper
+    _refresher = make_refresher()
+    if _refresher is not None:
+        _refresher.start()
+    _sweeper = make_sweeper()
+    if _sweeper is not None:
+        _sweeper.start()
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    from app.fetch.fetcher import close_fetch_clients
+    if _refresher is not None:
+        await _refresher.stop()
+    if _sweeper is not None:
+        await _sweeper.stop()
+    await close_fetch_clients()
+
+
+@app.exception_handler(Rejected)
+async def _rejected(request: Request, exc: Rejected):
+    return JSONResponse(
+        status_code=exc.status,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _client(request: Request) -> str:
+    host = request.client.host if request.client else None
+    return client_key(host, request.headers.get("x-forwarded-for"))
+
+
+def _forget_abandoned(task: asyncio.Task) -> None:
+    _abandoned.discard(task)
+    if not task.cancelled():
+        task.exception()  # retrieved, so a failed run isn't logged as "never retrieved"
+
+
+async def _unless_disconnected(request: Request, work: Awaitable[Any]) -> Optional[Any]:
+    """
+    Await `work` as a task while polling for a client disconnect. If the client
+    goes away first, the task is cancelled (or, with PERSIST_ABANDONED_RESULTS,
+    left to finish and save in the background) and None is returned.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_S)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                break
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    metrics = get_metrics()
+    if get_settings().persist_abandoned:
+        metrics.incr("pipeline.abandoned_finished")
+        _abandoned.add(task)
+        task.add_done_callback(_forget_abandoned)
+        return None
+    metrics.incr("pipeline.cancelled")
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return None
 
 
 @app.get("/healthz")
 async def healthz():
     """Health check endpoint."""
-    return {"ok": True, "provider": get_active_search_provider()}
+    models = get_manager().report()
+    return {
+        "ok": True,
+        "provider": get_active_search_provider(),
+        "models": {"resident_bytes": models["resident_bytes"],
+                   "loaded": sorted(n for n, m in models["models"].items() if m["loaded"])},
+    }
+
+
+@app.get("/_models")
+async def _models():
+    """Resident model memory and per-model load state."""
+    return get_manager().report()
+
+
+@app.get("/_cache")
+async def _cache():
+    """Cache tier backend and per-namespace entries, bytes and hit rate."""
+    from app.cache.tier import cache_report
+    return await run_in_threadpool(cache_report)
+
+
+@app.get("/_store")
+def _store(detailed: bool = False):
+    """Results database size, free pages and result count; `detailed` adds bytes per table (slow)."""
+    from app.store.retention import size_report
+    return size_report(detailed=detailed)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-worker counters and timings (DNS lookups, connection pre-warming)."""
+    return get_metrics().snapshot()
 
 
 @app.get("/_search")
@@ -35,7 +150,7 @@ async def _search(q: str = Query(..., min_length=3, max_length=200)):
     """Debug search endpoint for testing search functionality."""
     search = get_search()
     results = await search(q)
-    return {"count": len(results), "items": [r.model_dump() for r in results]}
+    return {"count": len(results), "items": [hit_dict(r) for r in results]}
 
 
 @app.get("/_fetch")
@@ -53,49 +168,55 @@ async def _select(claim: str = Query(..., min_length=8, max_length=300)):
     search = get_search()
     sources = await search(claim)
     picked = await select_evidence(claim, sources, per_source=2, max_total=8)
-    return {"n_sources": len(picked), "items": [s.model_dump() for s in picked]}
+    return {"n_sources": len(picked), "items": [hit_dict(s) for s in picked]}
 
 
 @app.get("/_nli")
-def _nli(text: str = Query(..., min_length=5, max_length=800),
-         claim: str = Query(..., min_length=5, max_length=800)):
+async def _nli(request: Request,
+               text: str = Query(..., min_length=5, max_length=800),
+               claim: str = Query(..., min_length=5, max_length=800)):
     """Debug NLI endpoint for testing natural language inference."""
     from app.nlp.nli import score_one
-    probs = score_one(text, claim)
+    async with get_debug_budget().admit(_client(request)):
+        probs = await run_in_threadpool(score_one, text, claim)
     verdict = max(probs, key=probs.get)
     return {"probs": probs, "top": verdict}
 
 
 @app.get("/_verdict")
-async def _verdict(claim: str = Query(..., min_length=8, max_length=300)):
+async def _verdict(request: Request, claim: str = Query(..., min_length=8, max_length=300)):
     """Debug verdict endpoint for testing full search → selector → verdict pipeline."""
     from app.logic.selector import select_evidence
     from app.nlp.verdict import make_verdict
     
-    search = get_search()
-    sources = await search(claim)
-    picked = await select_evidence(claim, sources, per_source=2, max_total=8)
-    label, confidence, rationale, cites = make_verdict(claim, picked)
+    async with get_debug_budget().admit(_client(request)):
+        search = get_search()
+        sources = await search(claim)
+        picked = await select_evidence(claim, sources, per_source=2, max_total=8)
+        stats: dict = {}
+        label, confidence, rationale, cites = make_verdict(claim, picked, stats=stats)
     return {
         "label": label,
         "confidence": round(confidence, 3),
         "rationale": rationale,
         "cites": cites,
-        "sources": [s.model_dump() for s in picked],
+        "nli": stats,
+        "sources": [hit_dict(s) for s in picked],
     }
 
 
 @app.get("/_post")
-async def _post(claim: str = Query(..., min_length=8, max_length=300)):
+async def _post(request: Request, claim: str = Query(..., min_length=8, max_length=300)):
     """Debug post endpoint for testing full search → select → verdict → communicator pipeline."""
     from app.logic.selector import select_evidence
     from app.nlp.verdict import make_verdict
     from app.logic.communicator import build_post
     
-    search = get_search()
-    sources = await search(claim)
-    picked = await select_evidence(claim, sources, per_source=2, max_total=8)
-    label, confidence, rationale, cites = make_verdict(claim, picked)
+    async with get_debug_budget().admit(_client(request)):
+        search = get_search()
+        sources = await search(claim)
+        picked = await select_evidence(claim, sources, per_source=2, max_total=8)
+        label, confidence, rationale, cites = make_verdict(claim, picked)
     post = build_post(claim, label, rationale, picked, cites)
     return {
         "label": label,
@@ -105,39 +226,76 @@ async def _post(claim: str = Query(..., min_length=8, max_length=300)):
     }
 
 
+@app.get("/results/search")
+def results_search(q: str = Query(..., min_length=2, max_length=200),
+                   limit: int = Query(20, ge=1, le=100),
+                   offset: int = Query(0, ge=0, le=10000)):
+    """Full-text search over stored fact-checks (claim, rationale, evidence), best match first."""
+    return search_results(q, limit=limit, offset=offset)
+
+
+@app.get("/results/export")
+def results_export(since: Optional[str] = None, until: Optional[str] = None,
+                   verdict: Optional[str] = None, gzip: bool = False):
+    """Stream stored results as NDJSON (oldest first), optionally gzipped; see app.store.bulk."""
+    from app.store.bulk import gzip_chunks, iter_export, parse_when
+    try:
+        for value in (since, until):
+            parse_when(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    chunks = iter_export(since, until, verdict)
+    if gzip:
+        return StreamingResponse(gzip_chunks(chunks), media_type="application/gzip",
+                                 headers={"Content-Disposition": 'attachment; filename="results.ndjson.gz"'})
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+
 @app.get("/r/{rid}", response_class=HTMLResponse)
 def read_result(rid: str, request: Request):
     """View a shared fact-check result."""
     data = load_result(rid)
     if not data:
         raise HTTPException(status_code=404, detail="Result not found")
+    record_view(rid)
     return templates.TemplateResponse("result.html", {"request": request, "r": data})
 
 
-@app.post("/check")
-async def check(payload: CheckRequest = Body(...)):
+@app.post("/check", response_model=CheckResult, response_class=ORJSONResponse)
+async def check(request: Request, payload: CheckRequest = Body(...)):
     """Main fact-checking endpoint - processes claims and returns verdicts."""
-    from app.logic.orchestrator import run_pipeline
+    from app.logic.orchestrator import cached_verdict, compute_verdict
     
     claim = payload.claim.strip()
     if len(claim) < 8:
         raise HTTPException(status_code=400, detail="claim too short")
-    try:
-        result = await run_pipeline(claim)
-        return result
-    except Exception as e:
-        # Return structured fallback rather than 500
-        fallback = {
-            "claim": claim,
-            "verdict": "Unverified",
-            "confidence": 0.0,
-            "rationale": f"Pipeline error: {type(e).__name__}. Try again later or rephrase.",
-            "post": "Verdict: Unverified — Unable to verify due to a temporary error.",
-            "sources": [],
-            "id": "",
-        }
-        # do not save failing runs
-        return fallback
+
+    async def work():
+        budget = get_pipeline_budget()
+        # cache hits count towards the client's rate limit but never queue for a pipeline slot
+        budget.limiter.check(_client(request))
+        cached = await cached_verdict(claim, payload.mode)
+        if cached is not None:
+            return cached
+        async with budget.governor.slot():
+            try:
+                return await compute_verdict(claim, mode=payload.mode)
+            except Exception as e:
+                # Return structured fallback rather than 500; do not save failing runs
+                return {
+                    "claim": claim,
+                    "verdict": "Unverified",
+                    "confidence": 0.0,
+                    "rationale": f"Pipeline error: {type(e).__name__}. Try again later or rephrase.",
+                    "post": "Verdict: Unverified — Unable to verify due to a temporary error.",
+                    "sources": [],
+                    "id": "",
+                }
+
+    result = await _unless_disconnected(request, work())
+    if result is None:
+        return Response(status_code=CLIENT_CLOSED)
+    return result
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -147,11 +305,22 @@ def home(request: Request):
 
 
 @app.post("/ui/check", response_class=HTMLResponse)
-async def ui_check(request: Request, claim: str = Form(...)):
+async def ui_check(request: Request, claim: str = Form(...), mode: Optional[Mode] = Form(None)):
     """UI endpoint for HTMX form submission."""
-    from app.logic.orchestrator import run_pipeline
+    from app.logic.orchestrator import cached_verdict, compute_verdict
     
-    result = await run_pipeline(claim.strip())
+    async def work():
+        budget = get_pipeline_budget()
+        budget.limiter.check(_client(request))
+        cached = await cached_verdict(claim.strip(), mode)
+        if cached is not None:
+            return cached
+        async with budget.governor.slot():
+            return await compute_verdict(claim.strip(), mode=mode)
+
+    result = await _unless_disconnected(request, work())
+    if result is None:
+        return Response(status_code=CLIENT_CLOSED)
     return templates.TemplateResponse("_result_block.html", {"request": request, "r": result})
 
 
@@ -165,7 +334,9 @@ async def api_info():
         "endpoints": {
             "health": "/healthz",
             "check_claim": "/check",
-            "view_result": "/r/{id}"
+            "view_result": "/r/{id}",
+            "search_results": "/results/search?q=",
+            "export_results": "/results/export"
         }
     }
 
@@ -0,0 +1,128 @@
+# app/nlp/autotune.py
+"""
+Sweep workers x intra-op threads x NLI batch size on this machine and write
+the highest-throughput combination for app.nlp.runtime to pick up.
+
+    python -m app.nlp.autotune [--workers 1,2,4] [--threads 1,2,4] \
+        [--batches 4,8,16] [--seconds 5] [--out torch_tune.json]
+
+Each (workers, threads) cell starts that many processes, which load the NLI
+model once and then run every batch size in lock-step, so the aggregate
+pairs/s matches what that many uvicorn workers would sustain together.
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import queue
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.nlp.runtime import ThreadPlan, apply_plan, available_cpus, plan_threads
+
+PREMISE = (
+    "The Eiffel Tower was completed in 1889 as the entrance arch to the World's Fair "
+    "and stood as the tallest man-made structure in the world for four decades."
+)
+HYPOTHESIS = "The Eiffel Tower was built in the nineteenth century."
+LOAD_MARGIN_S = 300.0  # model load and warm-up allowance before a cell's first result
+RESULT_MARGIN_S = 30.0  # allowance past `seconds` for each later result
+POLL_S = 1.0  # how often a waiting cell checks for crashed workers
+
+def _ints(raw: str) -> List[int]:
+    return sorted({int(x) for x in raw.split(",") if x.strip()})
+
+def _bench_worker(plan: ThreadPlan, batches: Sequence[int], seconds: float, barrier: Any, out: Any) -> None:
+    apply_plan(plan)
+    from app.nlp.nli import score_pairs_local
+
+    score_pairs_local([(PREMISE, HYPOTHESIS)])  # load and warm up
+    for b in batches:
+        pairs = [(PREMISE, HYPOTHESIS)] * b
+        barrier.wait()
+        done, end = 0, time.monotonic() + seconds
+        while time.monotonic() < end:
+            score_pairs_local(pairs, batch_size=b)
+            done += b
+        out.put((b, done))
+
+def run_cell(workers: int, threads: int, batches: Sequence[int], seconds: float) -> Optional[Dict[int, float]]:
+    """
+    Aggregate pairs/s per batch size for `workers` processes of `threads`
+    threads, or None when a worker dies (OOM, bad thread count) or stalls.
+    """
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    out = ctx.Queue()
+    cpus = available_cpus()
+    procs = [
+        ctx.Process(
+            target=_bench_worker,
+            args=(plan_threads(cpus, workers, slot=i, threads=threads, pin=True), batches, seconds, barrier, out),
+        )
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    totals: Dict[int, float] = {b: 0.0 for b in batches}
+    failed = False
+    deadline = time.monotonic() + LOAD_MARGIN_S + seconds
+    try:
+        received = 0
+        while received < workers * len(batches):
+            try:
+                b, done = out.get(timeout=POLL_S)
+            except queue.Empty:
+                # a dead worker leaves the rest waiting at the barrier forever
+                if any(p.exitcode not in (None, 0) for p in procs) or time.monotonic() > deadline:
+                    failed = True
+                    break
+                continue
+            totals[b] += done / seconds
+            received += 1
+            deadline = time.monotonic() + seconds + RESULT_MARGIN_S
+    finally:
+        for p in procs:
+            if failed:
+                p.terminate()
+            p.join()
+    return None if failed else totals
+
+def pick_best(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Highest throughput; ties go to fewer workers, then fewer threads."""
+    return max(results, key=lambda r: (r["pairs_per_s"], -r["workers"], -r["threads"]))
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ncpu = len(available_cpus())
+    ap = argparse.ArgumentParser(prog="python -m app.nlp.autotune")
+    ap.add_argument("--workers", default=",".join(str(w) for w in (1, 2, 4) if w <= ncpu))
+    ap.add_argument("--threads", default=",".join(str(t) for t in (1, 2, 4, 8) if t <= ncpu))
+    ap.add_argument("--batches", default="4,8,16")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--out", default="torch_tune.json")
+    args = ap.parse_args(argv)
+
+    batches = _ints(args.batches)
+    results: list[Dict[str, Any]] = []
+    for w in _ints(args.workers):
+        for t in _ints(args.threads):
+            if w * t > ncpu:
+                continue  # oversubscribed by construction
+            totals = run_cell(w, t, batches, args.seconds)
+            if totals is None:
+                print(f"workers={w} threads={t}: failed (worker crashed or stalled)")
+                continue
+            for b, rate in totals.items():
+                results.append({"workers": w, "threads": t, "nli_batch": b, "pairs_per_s": round(rate, 2)})
+                print(f"workers={w} threads={t} batch={b}: {rate:.1f} pairs/s")
+    if not results:
+        raise SystemExit("no configuration fits this machine's cores")
+    best = pick_best(results)
+    config = {**{k: best[k] for k in ("workers", "threads", "nli_batch")}, "interop_threads": 1,
+              "cpus": ncpu, "pairs_per_s": best["pairs_per_s"], "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    print(f"best: {best} -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# app/nlp/bench_embed.py
+"""
+Embedding throughput and ranking parity per backend.
+
+    python -m app.nlp.bench_embed [--backends torch,int8,onnx] [--n 512] [--rounds 3]
+
+Embeds `n` paragraph-sized texts with each backend and reports texts/s, plus
+the cosine between each backend's vectors and torch's and how often the top
+match for a query set agrees with torch's.
+"""
+from __future__ import annotations
+import argparse
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.deps import EMBED_BACKENDS, get_settings
+from app.nlp.embed import MODEL_NAME
+from app.nlp.embed_backends import load_backend
+from app.nlp.runtime import configure_torch
+
+_WORDS = (
+    "the federal reserve held interest rates steady while inflation eased in several "
+    "regions as researchers reported new vaccine trial results and engineers completed "
+    "the bridge after years of delays caused by storms flooding and supply shortages"
+).split()
+
+def synthetic_texts(n: int, words: int = 60, seed: int = 0) -> List[str]:
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(_WORDS, size=words)).capitalize() + "." for _ in range(n)]
+
+def top1_agreement(ref: np.ndarray, other: np.ndarray, queries: np.ndarray, other_queries: np.ndarray) -> float:
+    """Fraction of queries whose best match is the same document under both backends."""
+    return float(np.mean((queries @ ref.T).argmax(axis=1) == (other_queries @ other.T).argmax(axis=1)))
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.nlp.bench_embed")
+    ap.add_argument("--backends", default=",".join(EMBED_BACKENDS))
+    ap.add_argument("--n", type=int, default=512)
+    ap.add_argument("--rounds", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    configure_torch()
+    docs = synthetic_texts(args.n)
+    queries = synthetic_texts(64, words=8, seed=1)
+    ref: Dict[str, np.ndarray] = {}
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        backend = load_backend(name, MODEL_NAME, get_settings().embed_onnx_file)
+        backend.encode(docs[:8])  # warm up
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            vecs = backend.encode(docs)
+        rate = args.n * args.rounds / (time.perf_counter() - t0)
+        qvecs = backend.encode(queries)
+        line = f"{name:>6} ({backend.name}): {rate:8.1f} texts/s"
+        if ref:
+            cos = float(np.mean(np.sum(vecs * ref["docs"], axis=1)))
+            agree = top1_agreement(ref["docs"], vecs, ref["queries"], qvecs)
+            line += f"  cos vs first={cos:.4f}  top1 agreement={agree:.0%}"
+        else:
+            ref = {"docs": vecs, "queries": qvecs}
+        print(line)
+
+if __name__ == "__main__":
+    main()
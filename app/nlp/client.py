@@ -0,0 +1,102 @@
+# app/nlp/client.py
+from __future__ import annotations
+import os
+import socket
+import threading
+import time
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.deps import get_settings
+from app.nlp.protocol import (
+    OP_ACK, OP_EMBED, OP_ERROR, OP_NLI, OP_OK, OP_OK_SHM, ProtocolError,
+    decode_matrix, encode_strings, recv_frame, send_frame,
+)
+
+RETRY_AFTER_S = 30.0  # after a failure, use in-process models this long before retrying
+
+class ModelServerError(RuntimeError):
+    pass
+
+class ModelClient:
+    """
+    Blocking client for app.nlp.server. Keeps one connection per thread
+    (requests are strictly request/response on a connection) and marks
+    the server down for RETRY_AFTER_S after a transport failure so callers
+    can fall back without paying a connect timeout on every call.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until and os.path.exists(self.path)
+
+    def _conn(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._local.sock = sock
+        return sock
+
+    def _drop(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _call(self, op: int, payload: bytes) -> np.ndarray:
+        try:
+            sock = self._conn()
+            send_frame(sock, op, payload)
+            rop, body = recv_frame(sock)
+        except (OSError, ProtocolError) as e:
+            self._drop()
+            self._down_until = time.monotonic() + RETRY_AFTER_S
+            raise ModelServerError(f"model server unreachable: {e}") from e
+        if rop == OP_ERROR:
+            raise ModelServerError(body.decode("utf-8", "replace"))
+        if rop not in (OP_OK, OP_OK_SHM):
+            self._drop()
+            raise ModelServerError(f"unexpected reply op {rop}")
+        try:
+            out = decode_matrix(rop, body)
+            if rop == OP_OK_SHM:
+                send_frame(sock, OP_ACK)  # the server unlinks the block on this (or on disconnect)
+        except (OSError, ProtocolError) as e:
+            self._drop()  # the server unlinks on disconnect
+            raise ModelServerError(f"model server reply unreadable: {e}") from e
+        return out
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self._call(OP_EMBED, encode_strings(texts))
+
+    def nli(self, pairs: Sequence[Tuple[str, str]]) -> np.ndarray:
+        """Rows of (entail, contradict, neutral)."""
+        return self._call(OP_NLI, encode_strings([x for pair in pairs for x in pair]))
+
+@lru_cache(maxsize=1)
+def _client(path: str, timeout: float) -> ModelClient:
+    return ModelClient(path, timeout)
+
+def get_client() -> Optional[ModelClient]:
+    """The shared client when MODEL_SERVER_SOCKET is set and the server looks up, else None."""
+    s = get_settings()
+    if not s.model_server_socket:
+        return None
+    client = _client(s.model_server_socket, s.model_server_timeout_s)
+    return client if client.available else None
+
+def nli_dicts(rows: np.ndarray) -> List[dict]:
+    return [{"entail": float(r[0]), "contradict": float(r[1]), "neutral": float(r[2])} for r in rows]
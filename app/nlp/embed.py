@@ -1,26 +1,39 @@
 # app/nlp/embed.py
 from __future__ import annotations
-from functools import lru_cache
+from typing import Any, ContextManager
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from app.deps import get_settings
+from app.nlp.client import ModelServerError, get_client
+from app.nlp.embed_backends import EmbedBackend, load_backend
+from app.nlp.lifecycle import get_manager
+from app.nlp.runtime import configure_torch
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
-@lru_cache(maxsize=1)
-def _load_model() -> SentenceTransformer:
+def _load_model() -> EmbedBackend:
     # CPU is fine for this model
-    return SentenceTransformer(MODEL_NAME)
+    configure_torch()
+    s = get_settings()
+    return load_backend(s.embed_backend, MODEL_NAME, s.embed_onnx_file)
+
+def _model() -> ContextManager[Any]:
+    mgr = get_manager()
+    mgr.register("embed", _load_model)
+    return mgr.use("embed")
 
 def embed_texts(texts: list[str]) -> np.ndarray:
-    model = _load_model()
-    vecs = model.encode(
-        texts,
-        batch_size=32,
-        convert_to_numpy=True,
-        normalize_embeddings=True,
-        show_progress_bar=False,
-    )
-    return vecs.astype("float32")
+    client = get_client()
+    if client is not None and texts:
+        try:
+            return client.embed(texts)
+        except ModelServerError:
+            pass  # fall back to the in-process model
+    return embed_texts_local(texts)
+
+def embed_texts_local(texts: list[str]) -> np.ndarray:
+    with _model() as backend:
+        return backend.encode(texts)
 
 def embed_text(text: str) -> np.ndarray:
     return embed_texts([text])[0]
@@ -0,0 +1,107 @@
+# app/nlp/embed_backends.py
+"""
+Interchangeable MiniLM runtimes behind one `encode(texts)` call, selected
+with EMBED_BACKEND:
+
+- torch: sentence-transformers in float32 (reference)
+- int8:  the same model with its Linear layers dynamically quantized to int8
+- onnx:  ONNX Runtime on the exported graph shipped in the model repo
+         (EMBED_ONNX_FILE picks a variant, e.g. a qint8 one); needs the
+         optional `onnxruntime` package and falls back to torch when it can't load
+
+All return L2-normalized float32 rows, so callers cannot tell them apart.
+"""
+from __future__ import annotations
+import warnings
+from abc import ABC, abstractmethod
+from typing import Dict, List, Type
+
+import numpy as np
+import torch
+
+BATCH_SIZE = 32
+MAX_LENGTH = 256  # MiniLM's own max_seq_length
+
+class EmbedBackend(ABC):
+    name = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text."""
+
+class TorchBackend(EmbedBackend):
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        with torch.inference_mode():
+            vecs = self.model.encode(
+                texts,
+                batch_size=BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+        return vecs.astype("float32")
+
+class Int8Backend(TorchBackend):
+    name = "int8"
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+class OnnxBackend(EmbedBackend):
+    name = "onnx"
+
+    def __init__(self, model_name: str, onnx_file: str = "onnx/model.onnx"):
+        super().__init__(model_name)
+        import onnxruntime as ort
+        from huggingface_hub import hf_hub_download
+        from transformers import AutoTokenizer
+
+        from app.nlp.runtime import get_plan
+
+        opts = ort.SessionOptions()
+        plan = get_plan()
+        opts.intra_op_num_threads = plan.intra_threads
+        opts.inter_op_num_threads = plan.interop_threads
+        self.session = ort.InferenceSession(
+            hf_hub_download(model_name, onnx_file), opts, providers=["CPUExecutionProvider"]
+        )
+        self.tok = AutoTokenizer.from_pretrained(model_name)
+        self.inputs = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        out: list[np.ndarray] = []
+        for i in range(0, len(texts), BATCH_SIZE):
+            enc = self.tok(texts[i:i + BATCH_SIZE], padding=True, truncation=True,
+                           max_length=MAX_LENGTH, return_tensors="np")
+            feed = {k: v.astype("int64") for k, v in enc.items() if k in self.inputs}
+            hidden = self.session.run(None, feed)[0]  # (batch, seq, dim)
+            mask = enc["attention_mask"][..., None].astype("float32")
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            out.append(pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None))
+        return np.concatenate(out).astype("float32") if out else np.zeros((0, 384), dtype="float32")
+
+BACKENDS: Dict[str, Type[EmbedBackend]] = {
+    "torch": TorchBackend,
+    "int8": Int8Backend,
+    "onnx": OnnxBackend,
+}
+
+def load_backend(name: str, model_name: str, onnx_file: str = "onnx/model.onnx") -> EmbedBackend:
+    if name == "onnx":
+        try:
+            return OnnxBackend(model_name, onnx_file)
+        except Exception as e:  # no onnxruntime, no graph on the hub, or a session that won't load
+            warnings.warn(f"EMBED_BACKEND=onnx unavailable ({e}); using torch", RuntimeWarning)
+            return TorchBackend(model_name)
+    return BACKENDS.get(name, TorchBackend)(model_name)
@@ -0,0 +1,88 @@
+# app/nlp/lexical.py
+from __future__ import annotations
+import math
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "by", "for",
+    "with", "from", "as", "is", "are", "was", "were", "be", "been", "it", "its",
+    "that", "this", "these", "those", "has", "have", "had", "do", "does", "did",
+}
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.casefold()) if len(w) > 1 and w not in STOPWORDS]
+
+class BM25:
+    """Okapi BM25 over a fixed set of token lists, with an inverted index."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # term -> (doc ids, tfs)
+        self.doc_len = np.zeros(0, dtype=np.float32)
+
+    @property
+    def n_docs(self) -> int:
+        return int(self.doc_len.shape[0])
+
+    @classmethod
+    def build(cls, docs: Sequence[List[str]], k1: float = 1.5, b: float = 0.75) -> "BM25":
+        bm = cls(k1, b)
+        raw: Dict[str, Tuple[List[int], List[int]]] = {}
+        for i, toks in enumerate(docs):
+            counts: Dict[str, int] = {}
+            for t in toks:
+                counts[t] = counts.get(t, 0) + 1
+            for t, tf in counts.items():
+                ids, tfs = raw.setdefault(t, ([], []))
+                ids.append(i)
+                tfs.append(tf)
+        bm.postings = {
+            t: (np.array(ids, dtype=np.int64), np.array(tfs, dtype=np.float32)) for t, (ids, tfs) in raw.items()
+        }
+        bm.doc_len = np.array([len(d) for d in docs], dtype=np.float32)
+        return bm
+
+    def scores(self, query: List[str]) -> np.ndarray:
+        out = np.zeros(self.n_docs, dtype=np.float32)
+        if not self.n_docs:
+            return out
+        avgdl = float(self.doc_len.mean()) or 1.0
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_len / avgdl)
+        for t in set(query):
+            hit = self.postings.get(t)
+            if hit is None:
+                continue
+            ids, tfs = hit
+            idf = math.log(1.0 + (self.n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            out[ids] += idf * tfs * (self.k1 + 1.0) / (tfs + norm[ids])
+        return out
+
+    def top(self, query: List[str], k: int) -> List[int]:
+        """Indices of the k best-scoring docs with a non-zero score, best first."""
+        s = self.scores(query)
+        nz = np.flatnonzero(s > 0)
+        if nz.size > k:
+            nz = nz[np.argpartition(-s[nz], k - 1)[:k]]
+        return [int(i) for i in nz[np.argsort(-s[nz], kind="stable")]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_len": self.doc_len.astype(int).tolist(),
+            "postings": {t: [ids.tolist(), tfs.astype(int).tolist()] for t, (ids, tfs) in self.postings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "BM25":
+        bm = cls(d["k1"], d["b"])
+        bm.doc_len = np.array(d["doc_len"], dtype=np.float32)
+        bm.postings = {
+            t: (np.array(ids, dtype=np.int64), np.array(tfs, dtype=np.float32)) for t, (ids, tfs) in d["postings"].items()
+        }
+        return bm
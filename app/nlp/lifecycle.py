@@ -0,0 +1,214 @@
+# app/nlp/lifecycle.py
+"""
+Loads models on demand and unloads them again, replacing the per-model
+`lru_cache` singletons.
+
+- MODEL_IDLE_UNLOAD_S: models unused this long are dropped by a reaper thread
+- MODEL_MEMORY_BUDGET_MB: loading a model first evicts least recently used,
+  idle models until its last known size fits
+- concurrent callers of a cold model share one load (single-flight)
+
+A model is never evicted while a caller holds it through `use()`.
+"""
+from __future__ import annotations
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.deps import get_settings
+
+REAPER_INTERVAL_S = 10.0
+
+def estimate_nbytes(obj: Any) -> int:
+    """Parameter and buffer bytes of torch modules found in `obj` (tuples, `.model` attributes)."""
+    try:
+        import torch
+    except ImportError:  # pragma: no cover
+        torch = None  # type: ignore[assignment]
+    if isinstance(obj, (tuple, list)):
+        return sum(estimate_nbytes(o) for o in obj)
+    if torch is not None and isinstance(obj, torch.nn.Module):
+        tensors = list(obj.parameters()) + list(obj.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    inner = getattr(obj, "model", None)
+    return estimate_nbytes(inner) if inner is not None and inner is not obj else 0
+
+def _release_memory() -> None:
+    gc.collect()
+    try:  # hand freed arenas back to the OS so RSS actually drops
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+@dataclass
+class _Slot:
+    loader: Callable[[], Any]
+    value: Any = None
+    nbytes: int = 0  # last measured size, kept after unload for budgeting
+    last_used: float = 0.0
+    users: int = 0
+    loading: Optional[threading.Event] = None
+    error: Optional[BaseException] = None
+    loads: int = 0
+
+@dataclass
+class ModelManager:
+    budget_bytes: int = 0  # 0 => unlimited
+    idle_timeout_s: float = 0.0  # 0 => never unload
+    sizer: Callable[[Any], int] = estimate_nbytes
+    clock: Callable[[], float] = time.monotonic
+    _slots: Dict[str, _Slot] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _reaper: Optional[threading.Thread] = None
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            self._slots.setdefault(name, _Slot(loader))
+
+    def _acquire(self, name: str) -> Any:
+        while True:
+            with self._lock:
+                slot = self._slots[name]
+                if slot.value is not None:
+                    slot.users += 1
+                    slot.last_used = self.clock()
+                    return slot.value
+                if slot.loading is None:
+                    slot.loading = threading.Event()
+                    slot.error = None
+                    evicted = self._make_room(slot.nbytes, keep=name)
+                    break
+                waiter = slot.loading
+            waiter.wait()
+            with self._lock:
+                if slot.value is None and slot.error is not None:
+                    raise slot.error
+        if evicted:
+            _release_memory()
+        try:
+            value = slot.loader()
+            nbytes = self.sizer(value)
+        except BaseException as e:
+            with self._lock:
+                slot.error = e
+                slot.loading.set()
+                slot.loading = None
+            raise
+        with self._lock:
+            slot.value, slot.nbytes, slot.loads = value, nbytes, slot.loads + 1
+            slot.users += 1
+            slot.last_used = self.clock()
+            evicted = self._make_room(0, keep=name)
+            slot.loading.set()
+            slot.loading = None
+        if evicted:
+            _release_memory()
+        self._ensure_reaper()
+        return value
+
+    def _release(self, name: str) -> None:
+        with self._lock:
+            slot = self._slots[name]
+            slot.users -= 1
+            slot.last_used = self.clock()
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Any]:
+        """The loaded model, pinned against eviction for the duration of the block."""
+        value = self._acquire(name)
+        try:
+            yield value
+        finally:
+            self._release(name)
+
+    def get(self, name: str) -> Any:
+        """The loaded model, without pinning (the caller's reference keeps it alive)."""
+        with self.use(name) as value:
+            return value
+
+    def _make_room(self, needed: int, keep: str) -> List[str]:
+        """Evict idle LRU models until resident + needed fits the budget. Caller holds the lock."""
+        if self.budget_bytes <= 0:
+            return []
+        evicted: list[str] = []
+        idle = sorted(
+            (n for n, s in self._slots.items() if s.value is not None and s.users == 0 and n != keep),
+            key=lambda n: self._slots[n].last_used,
+        )
+        for n in idle:
+            if self._resident() + needed <= self.budget_bytes:
+                break
+            self._slots[n].value = None
+            evicted.append(n)
+        return evicted
+
+    def _resident(self) -> int:
+        return sum(s.nbytes for s in self._slots.values() if s.value is not None)
+
+    def unload(self, name: str) -> bool:
+        with self._lock:
+            slot = self._slots.get(name)
+            if slot is None or slot.value is None or slot.users:
+                return False
+            slot.value = None
+        _release_memory()
+        return True
+
+    def sweep(self) -> List[str]:
+        """Unload models idle for longer than idle_timeout_s."""
+        if self.idle_timeout_s <= 0:
+            return []
+        now = self.clock()
+        with self._lock:
+            stale = [n for n, s in self._slots.items()
+                     if s.value is not None and not s.users and now - s.last_used >= self.idle_timeout_s]
+            for n in stale:
+                self._slots[n].value = None
+        if stale:
+            _release_memory()
+        return stale
+
+    def _ensure_reaper(self) -> None:
+        if self.idle_timeout_s <= 0 or self._reaper is not None:
+            return
+        interval = min(REAPER_INTERVAL_S, self.idle_timeout_s / 2)
+
+        def loop() -> None:
+            while True:
+                time.sleep(interval)
+                self.sweep()
+
+        self._reaper = threading.Thread(target=loop, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return self._resident()
+
+    def report(self) -> Dict[str, Any]:
+        now = self.clock()
+        with self._lock:
+            models = {
+                n: {
+                    "loaded": s.value is not None,
+                    "bytes": s.nbytes if s.value is not None else 0,
+                    "idle_s": round(now - s.last_used, 1) if s.value is not None else None,
+                    "in_use": s.users,
+                    "loads": s.loads,
+                }
+                for n, s in self._slots.items()
+            }
+            return {"resident_bytes": self._resident(), "budget_bytes": self.budget_bytes, "models": models}
+
+@lru_cache(maxsize=1)
+def get_manager() -> ModelManager:
+    s = get_settings()
+    return ModelManager(
+        budget_bytes=int(s.model_memory_budget_mb * 1024 * 1024),
+        idle_timeout_s=s.model_idle_unload_s,
+    )
@@ -1,18 +1,25 @@
 # app/nlp/nli.py
 from __future__ import annotations
-from functools import lru_cache
-from typing import List, Dict, Tuple
+from functools import partial
+from typing import Any, ContextManager, List, Dict, Optional, Tuple
 
 import torch
 import numpy as np
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
+from app.nlp.client import ModelServerError, get_client, nli_dicts
+from app.nlp.lifecycle import get_manager
+from app.nlp.runtime import configure_torch, get_plan
+
 MODEL_NAME = "MoritzLaurer/DeBERTa-v3-base-mnli"
+# ~3x faster on CPU, for the "fast" check mode (app.logic.modes)
+DISTILLED_MODEL_NAME = "cross-encoder/nli-MiniLM2-L6-H768"
+MODELS = {"full": ("nli", MODEL_NAME), "distilled": ("nli_distilled", DISTILLED_MODEL_NAME)}
 
-@lru_cache(maxsize=1)
-def _load() -> Tuple[AutoTokenizer, AutoModelForSequenceClassification, torch.device, Dict[str, int]]:
-    tok = AutoTokenizer.from_pretrained(MODEL_NAME)
-    mdl = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+def _load(model_name: str = MODEL_NAME) -> Tuple[AutoTokenizer, AutoModelForSequenceClassification, torch.device, Dict[str, int]]:
+    configure_torch()
+    tok = AutoTokenizer.from_pretrained(model_name)
+    mdl = AutoModelForSequenceClassification.from_pretrained(model_name)
     mdl.eval()
     device = torch.device("cpu")
     mdl.to(device)
@@ -25,23 +32,50 @@ def _load() -> Tuple[AutoTokenizer, AutoModelForSequenceClassification, torch.de
         assert any(needed in k for k in name_to_id.keys()), f"Label {needed} missing"
     return tok, mdl, device, name_to_id
 
+def _model(model: str = "full") -> ContextManager[Any]:
+    key, name = MODELS[model]
+    mgr = get_manager()
+    mgr.register(key, partial(_load, name))
+    return mgr.use(key)
+
 def _softmax(x: np.ndarray) -> np.ndarray:
     x = x - x.max(axis=-1, keepdims=True)
     e = np.exp(x)
     return e / e.sum(axis=-1, keepdims=True)
 
-def score_pairs(pairs: List[Tuple[str, str]], batch_size: int = 8) -> List[Dict[str, float]]:
+def score_pairs(
+    pairs: List[Tuple[str, str]], batch_size: Optional[int] = None, model: str = "full"
+) -> List[Dict[str, float]]:
     """
     pairs: list of (premise, hypothesis)
     returns: list of dicts with probs for 'entail', 'contradict', 'neutral'
+    batch_size defaults to the tuned NLI batch (see app.nlp.runtime).
+    model: "full" (DeBERTa) or "distilled" (MiniLM cross-encoder).
+    Uses the shared model server when MODEL_SERVER_SOCKET is set (it batches
+    on its own and serves the full model only), else the in-process model.
     """
-    tok, mdl, device, name_to_id = _load()
+    client = get_client()
+    if client is not None and pairs and model == "full":
+        try:
+            return nli_dicts(client.nli(pairs))
+        except ModelServerError:
+            pass  # fall back to the in-process model
+    return score_pairs_local(pairs, batch_size=batch_size, model=model)
+
+def score_pairs_local(
+    pairs: List[Tuple[str, str]], batch_size: Optional[int] = None, model: str = "full"
+) -> List[Dict[str, float]]:
+    with _model(model) as loaded:
+        return _score_loaded(loaded, pairs, batch_size or get_plan().nli_batch)
+
+def _score_loaded(loaded: Tuple[Any, ...], pairs: List[Tuple[str, str]], batch_size: int) -> List[Dict[str, float]]:
+    tok, mdl, device, name_to_id = loaded
     out: list[Dict[str, float]] = []
     for i in range(0, len(pairs), batch_size):
         chunk = pairs[i:i + batch_size]
         premises = [p for p, _ in chunk]
         hyps = [h for _, h in chunk]
-        with torch.no_grad():
+        with torch.inference_mode():
             enc = tok(
                 premises,
                 hyps,
@@ -63,8 +97,10 @@ def score_pairs(pairs: List[Tuple[str, str]], batch_size: int = 8) -> List[Dict[
             })
     return out
 
-def score_many(premises: List[str], hypothesis: str, batch_size: int = 8) -> List[Dict[str, float]]:
-    return score_pairs([(p, hypothesis) for p in premises], batch_size=batch_size)
+def score_many(
+    premises: List[str], hypothesis: str, batch_size: Optional[int] = None, model: str = "full"
+) -> List[Dict[str, float]]:
+    return score_pairs([(p, hypothesis) for p in premises], batch_size=batch_size, model=model)
 
 def score_one(premise: str, hypothesis: str) -> Dict[str, float]:
     return score_pairs([(premise, hypothesis)])[0]
@@ -0,0 +1,149 @@
+# app/nlp/protocol.py
+"""
+Wire format between uvicorn workers and the model server.
+
+Every frame is a 6-byte header (version u8, op u8, payload length u32,
+network order) followed by the payload. Strings are u32-length-prefixed
+UTF-8. Float results travel as raw little-endian float32, either inline or,
+for large batches, in a named shared-memory block. The server owns the
+block: the client copies it and answers OP_ACK, and the server unlinks it
+once acknowledged or once the connection drops, whichever comes first.
+Blocks orphaned by a crashed server are removed by `sweep_stale_blocks`.
+"""
+from __future__ import annotations
+import os
+import secrets
+import socket
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+VERSION = 1
+OP_PING = 0
+OP_EMBED = 1
+OP_NLI = 2
+OP_OK = 10  # inline float32 matrix
+OP_OK_SHM = 11  # float32 matrix in shared memory
+OP_ERROR = 12
+OP_ACK = 13  # client -> server: shared-memory reply copied, the block may go
+
+SHM_THRESHOLD = 256 * 1024  # bytes; larger results go through shared memory
+SHM_PREFIX = "factcheck-models-"  # block names: <prefix><server pid>-<random>
+SHM_DIR = "/dev/shm"
+_HEADER = struct.Struct("!BBI")
+_U32 = struct.Struct("!I")
+_MATRIX = struct.Struct("!II")  # rows, cols
+
+class ProtocolError(RuntimeError):
+    pass
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ProtocolError("connection closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+def send_frame(sock: socket.socket, op: int, payload: bytes = b"") -> None:
+    sock.sendall(_HEADER.pack(VERSION, op, len(payload)) + payload)
+
+def recv_frame(sock: socket.socket) -> Tuple[int, bytes]:
+    version, op, size = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if version != VERSION:
+        raise ProtocolError(f"unsupported protocol version {version}")
+    return op, _recv_exact(sock, size) if size else b""
+
+def encode_strings(items: Sequence[str]) -> bytes:
+    parts = [_U32.pack(len(items))]
+    for s in items:
+        b = s.encode("utf-8")
+        parts.append(_U32.pack(len(b)))
+        parts.append(b)
+    return b"".join(parts)
+
+def decode_strings(payload: bytes) -> List[str]:
+    (n,) = _U32.unpack_from(payload, 0)
+    pos = _U32.size
+    out: list[str] = []
+    for _ in range(n):
+        (size,) = _U32.unpack_from(payload, pos)
+        pos += _U32.size
+        out.append(payload[pos:pos + size].decode("utf-8"))
+        pos += size
+    return out
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    # the server owns every block; keep the client's resource tracker from
+    # unlinking (or warning about) one it only attached to
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+
+def encode_matrix(arr: np.ndarray) -> Tuple[int, bytes]:
+    """
+    Returns (op, payload), spilling to shared memory above SHM_THRESHOLD.
+    The caller owns a spilled block and must `release_matrix` it.
+    """
+    arr = np.ascontiguousarray(arr, dtype="<f4")
+    rows, cols = arr.shape
+    head = _MATRIX.pack(rows, cols)
+    if arr.nbytes < SHM_THRESHOLD:
+        return OP_OK, head + arr.tobytes()
+    name = f"{SHM_PREFIX}{os.getpid()}-{secrets.token_hex(6)}"
+    # still registered with this process's resource tracker, which unlinks it if we die first
+    shm = shared_memory.SharedMemory(name=name, create=True, size=arr.nbytes)
+    np.ndarray(arr.shape, dtype="<f4", buffer=shm.buf)[:] = arr
+    shm.close()
+    return OP_OK_SHM, head + name.encode("ascii")
+
+def release_matrix(op: int, payload: bytes) -> None:
+    """Unlink the shared-memory block behind an encode_matrix reply, if any."""
+    if op != OP_OK_SHM:
+        return
+    try:
+        shm = shared_memory.SharedMemory(name=payload[_MATRIX.size:].decode("ascii"))
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+def decode_matrix(op: int, payload: bytes) -> np.ndarray:
+    """A copy of the matrix; a shared-memory block is left for the server to unlink after OP_ACK."""
+    rows, cols = _MATRIX.unpack_from(payload, 0)
+    body = payload[_MATRIX.size:]
+    if op == OP_OK:
+        return np.frombuffer(body, dtype="<f4").reshape(rows, cols).astype("float32")
+    shm = shared_memory.SharedMemory(name=body.decode("ascii"))
+    _untrack(shm)
+    try:
+        return np.ndarray((rows, cols), dtype="<f4", buffer=shm.buf).astype("float32")
+    finally:
+        shm.close()
+
+def sweep_stale_blocks(shm_dir: str = SHM_DIR) -> int:
+    """Unlink blocks left by model servers that are no longer running. Returns how many."""
+    try:
+        names = [n for n in os.listdir(shm_dir) if n.startswith(SHM_PREFIX)]
+    except OSError:
+        return 0  # no /dev/shm (not Linux); nothing to sweep
+    removed = 0
+    for name in names:
+        try:
+            pid = int(name[len(SHM_PREFIX):].split("-", 1)[0])
+            os.kill(pid, 0)
+            continue  # owner alive
+        except ProcessLookupError:
+            pass
+        except (ValueError, PermissionError):
+            continue  # not ours to judge
+        try:
+            os.unlink(os.path.join(shm_dir, name))
+            removed += 1
+        except OSError:
+            pass
+    return removed
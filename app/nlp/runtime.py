@@ -0,0 +1,120 @@
+# app/nlp/runtime.py
+"""
+Torch CPU thread topology per process. With several uvicorn workers each
+worker gets cores // workers intra-op threads instead of every worker
+spawning an all-core pool, optionally pinned to its own CPU slice.
+
+Precedence: TORCH_* env vars, then the file written by
+`python -m app.nlp.autotune`, then the core-count split.
+"""
+from __future__ import annotations
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from app.deps import get_settings
+
+DEFAULT_NLI_BATCH = 8
+SLOT_LOCK_PREFIX = "factcheck-cpu-slot-"
+
+@dataclass(frozen=True)
+class ThreadPlan:
+    workers: int
+    intra_threads: int
+    interop_threads: int
+    nli_batch: int
+    cpus: Optional[Tuple[int, ...]] = None  # affinity set; None = unpinned
+
+def available_cpus() -> Tuple[int, ...]:
+    if hasattr(os, "sched_getaffinity"):
+        return tuple(sorted(os.sched_getaffinity(0)))
+    return tuple(range(os.cpu_count() or 1))
+
+def load_tuned(path: Optional[str]) -> Dict[str, Any]:
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def plan_threads(
+    cpus: Tuple[int, ...],
+    workers: int,
+    slot: int = 0,
+    threads: int = 0,
+    interop: int = 1,
+    nli_batch: int = DEFAULT_NLI_BATCH,
+    pin: bool = False,
+) -> ThreadPlan:
+    """`threads` <= 0 splits the cores evenly; `slot` picks this worker's CPU slice when pinning."""
+    workers = max(1, workers)
+    intra = threads if threads > 0 else max(1, len(cpus) // workers)
+    pinned = None
+    if pin and cpus:
+        start = (slot * intra) % len(cpus)
+        pinned = tuple(cpus[(start + i) % len(cpus)] for i in range(min(intra, len(cpus))))
+    return ThreadPlan(workers, intra, max(1, interop), max(1, nli_batch), pinned)
+
+def _claim_slot(workers: int) -> int:
+    """First free per-machine slot, held by an flock for the life of the process."""
+    try:
+        import fcntl
+    except ImportError:
+        return os.getpid() % workers
+    for i in range(workers):
+        fd = os.open(os.path.join(tempfile.gettempdir(), f"{SLOT_LOCK_PREFIX}{i}.lock"), os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return i  # fd deliberately left open: closing it releases the slot
+        except OSError:
+            os.close(fd)
+    return os.getpid() % workers
+
+@lru_cache(maxsize=1)
+def get_plan() -> ThreadPlan:
+    s = get_settings()
+    tuned = load_tuned(s.torch_tune_file)
+    workers = s.torch_workers or int(tuned.get("workers") or 1)
+    pin = s.torch_pin_cpus
+    return plan_threads(
+        available_cpus(),
+        workers,
+        slot=_claim_slot(workers) if pin else 0,
+        threads=s.torch_threads or int(tuned.get("threads") or 0),
+        interop=s.torch_interop_threads or int(tuned.get("interop_threads") or 1),
+        nli_batch=s.nli_batch or int(tuned.get("nli_batch") or DEFAULT_NLI_BATCH),
+        pin=pin,
+    )
+
+_applied: Optional[ThreadPlan] = None
+
+def apply_plan(plan: ThreadPlan) -> None:
+    """Configure torch (and affinity) for this process; only the first call takes effect."""
+    global _applied
+    if _applied is not None:
+        return
+    import torch
+
+    if plan.cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, plan.cpus)
+        except OSError:
+            pass
+    torch.set_num_threads(plan.intra_threads)
+    try:
+        torch.set_num_interop_threads(plan.interop_threads)
+    except RuntimeError:
+        pass  # inter-op pool already started; it can only be sized once
+    _applied = plan
+
+def configure_torch() -> ThreadPlan:
+    """Call before loading a model."""
+    plan = get_plan()
+    apply_plan(plan)
+    return plan
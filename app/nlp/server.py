@@ -0,0 +1,194 @@
+# app/nlp/server.py
+"""
+Out-of-process model server: one process owns MiniLM and DeBERTa and serves
+every uvicorn worker over a Unix domain socket, so model memory no longer
+scales with the worker count and requests from all workers are batched
+together.
+
+    python -m app.nlp.server --socket /tmp/factcheck-models.sock
+
+Workers pick it up through MODEL_SERVER_SOCKET and fall back to in-process
+models when the socket is missing or unresponsive.
+"""
+from __future__ import annotations
+import argparse
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.nlp.protocol import (
+    OP_ACK, OP_EMBED, OP_ERROR, OP_NLI, OP_OK, OP_OK_SHM, OP_PING, ProtocolError,
+    decode_strings, encode_matrix, recv_frame, release_matrix, send_frame, sweep_stale_blocks,
+)
+
+MAX_BATCH = 64  # items per model call, across all connections
+BATCH_WAIT_S = 0.005  # how long the first request waits for company
+
+EmbedFn = Callable[[List[str]], np.ndarray]
+NliFn = Callable[[List[Tuple[str, str]]], np.ndarray]  # rows of (entail, contradict, neutral)
+
+class _Job:
+    __slots__ = ("items", "done", "result", "error")
+
+    def __init__(self, items: Sequence[Any]):
+        self.items = items
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+
+class MicroBatcher:
+    """
+    Funnels concurrent submissions into one model call. The first job waits
+    up to `wait_s` for others to arrive, then everything queued (up to
+    `max_items`) runs as one batch and the rows are split back per job.
+    """
+
+    def __init__(self, run: Callable[[List[Any]], np.ndarray], max_items: int = MAX_BATCH, wait_s: float = BATCH_WAIT_S):
+        self.run = run
+        self.max_items = max_items
+        self.wait_s = wait_s
+        self.calls = 0
+        self._q: "queue.Queue[_Job]" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, items: Sequence[Any]) -> np.ndarray:
+        job = _Job(items)
+        self._q.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        assert job.result is not None
+        return job.result
+
+    def _collect(self) -> List[_Job]:
+        jobs = [self._q.get()]
+        n = len(jobs[0].items)
+        until = time.monotonic() + self.wait_s
+        while n < self.max_items:
+            left = until - time.monotonic()
+            try:
+                job = self._q.get(timeout=left) if left > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            jobs.append(job)
+            n += len(job.items)
+        return jobs
+
+    def _loop(self) -> None:
+        while True:
+            jobs = self._collect()
+            flat = [x for j in jobs for x in j.items]
+            try:
+                out = np.asarray(self.run(flat), dtype="float32") if flat else np.zeros((0, 0), dtype="float32")
+                self.calls += 1
+            except BaseException as e:  # the caller decides what to do with it
+                for j in jobs:
+                    j.error = e
+                    j.done.set()
+                continue
+            pos = 0
+            for j in jobs:
+                j.result = out[pos:pos + len(j.items)]
+                pos += len(j.items)
+                j.done.set()
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "ModelServer"
+
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        while True:
+            try:
+                op, payload = recv_frame(sock)
+            except (ProtocolError, OSError, struct.error):
+                return
+            try:
+                if op == OP_PING:
+                    send_frame(sock, OP_OK)
+                    continue
+                if op == OP_EMBED:
+                    out = self.server.embed.submit(decode_strings(payload))
+                elif op == OP_NLI:
+                    flat = decode_strings(payload)
+                    out = self.server.nli.submit(list(zip(flat[0::2], flat[1::2])))
+                else:
+                    raise ProtocolError(f"unknown op {op}")
+                rop, body = encode_matrix(out)
+            except OSError:
+                return
+            except Exception as e:
+                try:
+                    send_frame(sock, OP_ERROR, f"{type(e).__name__}: {e}".encode("utf-8"))
+                except OSError:
+                    return
+                continue
+            if not self._reply(sock, rop, body):
+                return
+
+    def _reply(self, sock: socket.socket, op: int, body: bytes) -> bool:
+        """Send a result; a shared-memory one is unlinked once acknowledged or the client is gone."""
+        try:
+            send_frame(sock, op, body)
+            return op != OP_OK_SHM or recv_frame(sock)[0] == OP_ACK
+        except (ProtocolError, OSError, struct.error):
+            return False
+        finally:
+            release_matrix(op, body)
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, embed_fn: EmbedFn, nli_fn: NliFn,
+                 max_batch: int = MAX_BATCH, wait_s: float = BATCH_WAIT_S):
+        if os.path.exists(path):
+            os.unlink(path)  # stale socket from a previous run
+        sweep_stale_blocks()  # and shared memory a crashed run left behind
+        self.embed = MicroBatcher(embed_fn, max_batch, wait_s)
+        self.nli = MicroBatcher(nli_fn, max_batch, wait_s)
+        super().__init__(path, _Handler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)  # type: ignore[arg-type]
+        except OSError:
+            pass
+
+def _nli_rows(pairs: List[Tuple[str, str]]) -> np.ndarray:
+    from app.nlp.nli import score_pairs_local
+    scores = score_pairs_local(pairs)
+    return np.array([[s["entail"], s["contradict"], s["neutral"]] for s in scores], dtype="float32").reshape(-1, 3)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from app.deps import get_settings
+    from app.nlp.embed import embed_texts_local
+
+    ap = argparse.ArgumentParser(prog="python -m app.nlp.server")
+    ap.add_argument("--socket", default=None, help="default: MODEL_SERVER_SOCKET")
+    ap.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    ap.add_argument("--wait-ms", type=float, default=BATCH_WAIT_S * 1000)
+    args = ap.parse_args(argv)
+    path = args.socket or get_settings().model_server_socket
+    if not path:
+        ap.error("no socket path; pass --socket or set MODEL_SERVER_SOCKET")
+
+    # load both models before accepting connections
+    embed_texts_local(["warm up"])
+    _nli_rows([("warm up", "warm up")])
+    with ModelServer(path, embed_texts_local, _nli_rows, args.max_batch, args.wait_ms / 1000) as srv:
+        print(f"model server listening on {path}")
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# app/nlp/spans.py
+from __future__ import annotations
+import re
+from typing import List
+
+import numpy as np
+
+from app.nlp.embed import embed_texts
+
+MAX_SENTENCES = 3  # longest window sent to NLI
+TOKEN_BUDGET = 96  # approximate NLI tokens per premise
+_SENT_RE = re.compile(r"(?<=[.!?])[\"')\]]?\s+(?=[\"'(\[]?[A-Z0-9])")
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENT_RE.split(text.strip()) if s.strip()]
+
+def approx_tokens(text: str) -> int:
+    # words and punctuation; close enough to DeBERTa's subword count for budgeting
+    return len(_TOKEN_RE.findall(text))
+
+def best_spans(
+    claim_vec: np.ndarray,
+    paragraphs: List[str],
+    max_sentences: int = MAX_SENTENCES,
+    token_budget: int = TOKEN_BUDGET,
+) -> List[str]:
+    """
+    For each paragraph, the window of 1..max_sentences consecutive sentences
+    that best matches the claim and fits `token_budget`. Paragraphs already
+    within budget are returned whole. All sentences go through the embedder
+    in a single batch.
+    """
+    split: list[List[str]] = []
+    for p in paragraphs:
+        sents = split_sentences(p) if approx_tokens(p) > token_budget else []
+        split.append(sents if len(sents) > 1 else [])
+    flat = [s for sents in split for s in sents]
+    if not flat:
+        return list(paragraphs)
+
+    vecs = embed_texts(flat)
+    lens = np.array([approx_tokens(s) for s in flat])
+    out: list[str] = []
+    offset = 0
+    for p, sents in zip(paragraphs, split):
+        if not sents:
+            out.append(p)
+            continue
+        n = len(sents)
+        sv = vecs[offset:offset + n]
+        sl = lens[offset:offset + n]
+        offset += n
+        best, best_score = (0, 1), -np.inf
+        for size in range(1, min(max_sentences, n) + 1):
+            for i in range(n - size + 1):
+                if size > 1 and sl[i:i + size].sum() > token_budget:
+                    continue
+                v = sv[i:i + size].sum(axis=0)
+                score = float(v @ claim_vec) / (float(np.linalg.norm(v)) or 1.0)
+                if score > best_score:
+                    best, best_score = (i, size), score
+        i, size = best
+        out.append(" ".join(sents[i:i + size]))
+    return out
@@ -1,28 +1,78 @@
 # app/nlp/verdict.py
 from __future__ import annotations
-from typing import List, Tuple, Dict
+import math
+import re
+import threading
+import time
+from typing import List, Sequence, Tuple, Dict, Optional
 import numpy as np
 
-from app.schemas import Source, VerdictLabel
+from app.deps import get_settings
+from app.records import Hit
+from app.schemas import NliKind, VerdictLabel
+from app.logic.deadline import Deadline
 from app.nlp.nli import score_many
 
 TH_TRUE = 0.60
 TH_FALSE = 0.60
 DELTA = 0.20
 
-def _flatten_evidence(sources: List[Source]) -> Tuple[List[str], List[int]]:
+NLI_BATCH = 8
+EARLY_EXIT_BATCH = 2  # premises scored between label checks in early-exit mode
+MIN_PREMISES = 2  # always score a few, even when the budget is spent
+# EWMA of seconds per NLI pair for each model, refined as batches run
+_premise_cost_s: Dict[str, float] = {"full": 0.15, "distilled": 0.05}
+# similarity-only scoring (nli="similarity"): cosine at or below the floor is no
+# evidence; above it, support grows linearly up to SIM_MAX_PROB at cosine 1
+SIM_FLOOR = 0.40
+SIM_MAX_PROB = 0.80
+NEGATION_RE = re.compile(r"\b(?:not|no|never|none|nor|false|fake|hoax|myth|debunked|denied)\b|n[’']t\b", re.I)
+
+class VerdictCancelled(Exception):
+    """make_verdict was told to stop; unscored batches were dropped."""
+
+def _flatten_evidence(sources: Sequence[Hit]) -> Tuple[List[str], List[int], List[float]]:
     premises: list[str] = []
     owner_idx: list[int] = []
+    sim_vals: list[float] = []
     for idx, s in enumerate(sources):
-        for ev in s.evidence or []:
+        spans = getattr(s, "spans", None) or []
+        sims = getattr(s, "sims", None) or []
+        for j, ev in enumerate(s.evidence or []):
             if not ev:
                 continue
-            txt = ev.strip()
+            # prefer the claim-focused sentence window over the whole paragraph,
+            # unless the window is too short to carry a premise on its own
+            span = (spans[j] if j < len(spans) and spans[j] else "").strip()
+            txt = span if len(span) >= 40 else ev.strip()
             if len(txt) < 40:
                 continue
             premises.append(txt)
             owner_idx.append(idx)
-    return premises, owner_idx
+            sim_vals.append(float(sims[j]) if j < len(sims) else 0.0)
+    return premises, owner_idx, sim_vals
+
+def _negated(txt: str) -> bool:
+    return len(NEGATION_RE.findall(txt)) % 2 == 1
+
+def _similarity_scores(premises: List[str], sims: List[float], claim: str) -> List[Dict[str, float]]:
+    """
+    NLI-shaped scores from claim similarity alone: a close paraphrase counts
+    as support, or as contradiction when exactly one side is negated. Far
+    cruder than NLI; used when the server sheds load below the fast mode.
+    """
+    claim_neg = _negated(claim)
+    out: list[Dict[str, float]] = []
+    for p, sim in zip(premises, sims):
+        strength = SIM_MAX_PROB * max(0.0, (sim - SIM_FLOOR) / (1.0 - SIM_FLOOR))
+        e, c = (0.0, strength) if _negated(p) != claim_neg else (strength, 0.0)
+        out.append({"entail": e, "contradict": c, "neutral": 1.0 - strength})
+    return out
+
+def _nli_scores(premises: List[str], claim: str, nli: NliKind, **kw) -> List[Dict[str, float]]:
+    if nli == "distilled":
+        kw["model"] = "distilled"
+    return score_many(premises, claim, **kw)
 
 def _verdict_from(E: float, C: float) -> VerdictLabel:
     if E >= TH_TRUE and (E - C) >= DELTA:
@@ -33,26 +83,120 @@ def _verdict_from(E: float, C: float) -> VerdictLabel:
         return "Misleading"
     return "Unverified"
 
+def _straddles(lo: float, hi: float, at: float) -> bool:
+    """True if [lo, hi] has points on both sides of a `>= at` test."""
+    return lo < at <= hi
+
+def _settled_label(sum_e: float, sum_c: float, scored: int, total: int) -> Optional[VerdictLabel]:
+    """
+    The label every possible completion agrees on, or None. Unscored
+    premises can move the final means anywhere inside
+    [sum/total, (sum + remaining)/total]; if that box crosses no decision
+    boundary of _verdict_from, scoring the rest cannot change the label.
+    """
+    rest = total - scored
+    e_lo, e_hi = sum_e / total, (sum_e + rest) / total
+    c_lo, c_hi = sum_c / total, (sum_c + rest) / total
+    d_lo, d_hi = e_lo - c_hi, e_hi - c_lo
+    if (_straddles(e_lo, e_hi, TH_TRUE) or _straddles(c_lo, c_hi, TH_FALSE)
+            or _straddles(e_lo, e_hi, 0.50) or _straddles(c_lo, c_hi, 0.50)
+            or _straddles(d_lo, d_hi, DELTA) or d_lo <= -DELTA < d_hi):
+        return None
+    return _verdict_from(e_lo, c_lo)
+
+def _score_incremental(
+    premises: List[str],
+    claim: str,
+    deadline: Optional[Deadline],
+    early_exit: bool,
+    cancel: Optional[threading.Event] = None,
+    nli: NliKind = "full",
+) -> Tuple[List[Dict[str, float]], Optional[VerdictLabel]]:
+    """
+    Score premises in order, in small batches. Stops when the deadline
+    leaves no room for another batch, or (early_exit) once the label is
+    settled. Returns the scores so far and the settled label, if any.
+    Raises VerdictCancelled before any batch once `cancel` is set.
+    """
+    bounded = deadline is not None and deadline.bounded
+    if bounded:
+        limit = max(MIN_PREMISES, math.floor(deadline.remaining() / _premise_cost_s[nli]))
+        if limit < len(premises):
+            deadline.mark_degraded("nli")
+            premises = premises[:limit]
+    batch = EARLY_EXIT_BATCH if early_exit else NLI_BATCH
+    scores: list[Dict[str, float]] = []
+    sum_e = sum_c = 0.0
+    for i in range(0, len(premises), batch):
+        if cancel is not None and cancel.is_set():
+            raise VerdictCancelled()
+        chunk = premises[i:i + batch]
+        if bounded and len(scores) >= MIN_PREMISES and deadline.remaining() < _premise_cost_s[nli] * len(chunk):
+            deadline.mark_degraded("nli")
+            break
+        t0 = time.monotonic()
+        out = _nli_scores(chunk, claim, nli, batch_size=len(chunk))
+        _premise_cost_s[nli] = 0.7 * _premise_cost_s[nli] + 0.3 * (time.monotonic() - t0) / len(chunk)
+        scores.extend(out)
+        sum_e += sum(s["entail"] for s in out)
+        sum_c += sum(s["contradict"] for s in out)
+        if early_exit and len(scores) < len(premises):
+            settled = _settled_label(sum_e, sum_c, len(scores), len(premises))
+            if settled is not None:
+                return scores, settled
+    return scores, None
+
 def _short(txt: str, n: int = 240) -> str:
     return txt if len(txt) <= n else txt[: n - 3] + "..."
 
 def make_verdict(
     claim: str,
-    sources: List[Source],
+    sources: Sequence[Hit],
+    deadline: Optional[Deadline] = None,
+    early_exit: Optional[bool] = None,
+    stats: Optional[Dict[str, int]] = None,
+    cancel: Optional[threading.Event] = None,
+    nli: NliKind = "full",
 ) -> Tuple[VerdictLabel, float, str, Dict[str, List[int]]]:
     """
     Returns: (label, confidence, rationale, cites)
+    - sources are Hit records (or anything with the same attributes, e.g. Source)
     - confidence = |E - C|
     - cites has indices of sources used, e.g. {"support":[0], "contra":[2]}
+    - with a bounded deadline, only as many premises as fit the budget are scored
+    - early_exit (default: VERDICT_EARLY_EXIT) scores premises by descending
+      similarity and stops once the rest cannot change the label
+    - stats, if given, receives {"premises": n, "nli_pairs": n_scored}
+    - cancel (for callers running this in a thread) is checked between NLI
+      batches; once set, remaining batches are dropped and VerdictCancelled
+      is raised
+    - nli picks the scorer: "full" (DeBERTa), "distilled" (MiniLM
+      cross-encoder) or "similarity" (no model; see _similarity_scores)
     """
-    premises, owners = _flatten_evidence(sources)
+    premises, owners, sims = _flatten_evidence(sources)
+    if stats is not None:
+        stats.update(premises=len(premises), nli_pairs=0)
     if not premises:
         return "Unverified", 0.0, "No strong evidence available from retrieved sources.", {}
 
-    scores = score_many(premises, claim)
+    if early_exit is None:
+        early_exit = get_settings().verdict_early_exit
+    settled: Optional[VerdictLabel] = None
+    if nli == "similarity":
+        scores = _similarity_scores(premises, sims, claim)
+    elif early_exit or cancel is not None or (deadline is not None and deadline.bounded):
+        # most similar first, so trimming or stopping drops the weakest evidence
+        order = sorted(range(len(premises)), key=lambda i: -sims[i])
+        premises = [premises[i] for i in order]
+        owners = [owners[i] for i in order]
+        scores, settled = _score_incremental(premises, claim, deadline, bool(early_exit), cancel, nli)
+    else:
+        scores = _nli_scores(premises, claim, nli)
+    if stats is not None:
+        stats["nli_pairs"] = 0 if nli == "similarity" else len(scores)
     E = float(np.mean([s["entail"] for s in scores]))
     C = float(np.mean([s["contradict"] for s in scores]))
-    label = _verdict_from(E, C)
+    label = settled or _verdict_from(E, C)
     confidence = float(abs(E - C))
 
     # pick top items for rationale
@@ -0,0 +1,63 @@
+# app/records.py
+"""
+Internal pipeline records. Search, selection and verdict pass these slotted
+dataclasses around; the Pydantic models in app.schemas are only for the
+API boundary. Public fields mirror `Source`, so code that reads attributes
+works on either.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+PUBLIC_FIELDS = ("title", "url", "snippet", "evidence", "paragraphs", "mirrors")
+
+def is_http_url(url: Any) -> bool:
+    """Cheap stand-in for HttpUrl validation on provider output."""
+    if not isinstance(url, str) or not url or any(c.isspace() for c in url):
+        return False
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and bool(parts.hostname)
+
+@dataclass(slots=True)
+class Hit:
+    """A search result, later carrying the evidence picked from it."""
+    title: str
+    url: str
+    snippet: Optional[str] = None
+    evidence: List[str] = field(default_factory=list)
+    # pre-extracted page text (local knowledge base); skips the fetch stage
+    paragraphs: List[str] = field(default_factory=list)
+    # other sources carrying near-identical copies of this source's evidence
+    mirrors: List[str] = field(default_factory=list)
+    # NLI premise per evidence item (best sentence window); never serialized
+    spans: List[str] = field(default_factory=list)
+    # claim similarity per evidence item; never serialized
+    sims: List[float] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "title": self.title, "url": self.url, "snippet": self.snippet, "evidence": self.evidence,
+            "paragraphs": self.paragraphs, "mirrors": self.mirrors,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Hit":
+        return cls(**{k: d[k] for k in PUBLIC_FIELDS if k in d})
+
+def as_hit(s: Any) -> Hit:
+    """A Hit for `s`, which may already be one or a `Source` from the API layer."""
+    if isinstance(s, Hit):
+        return s
+    return Hit(
+        title=s.title, url=str(s.url), snippet=s.snippet,
+        evidence=list(getattr(s, "evidence", None) or []),
+        paragraphs=list(getattr(s, "paragraphs", None) or []),
+        mirrors=[str(u) for u in getattr(s, "mirrors", None) or []],
+        spans=list(getattr(s, "spans", None) or []),
+        sims=list(getattr(s, "sims", None) or []),
+    )
+
+def hit_dict(s: Any) -> Dict[str, Any]:
+    """Public JSON shape of a Hit or Source."""
+    return as_hit(s).to_dict()
@@ -4,15 +4,23 @@ from typing import List, Literal
 from pydantic import BaseModel, Field, HttpUrl
 
 VerdictLabel = Literal["True", "False", "Misleading", "Unverified"]
+# latency/quality tier of a check (profiles in app.logic.modes)
+Mode = Literal["fast", "balanced", "thorough"]
+# how evidence is scored: DeBERTa, a distilled cross-encoder, or embedding similarity alone
+NliKind = Literal["full", "distilled", "similarity"]
 
 class CheckRequest(BaseModel):
     claim: str = Field(..., min_length=8, max_length=1000)
+    # unset => DEFAULT_CHECK_MODE; the server may serve a cheaper mode under load
+    mode: Mode | None = None
 
 class Source(BaseModel):
     title: str
     url: HttpUrl
     snippet: str | None = None
     evidence: List[str] = Field(default_factory=list)
+    # other sources carrying near-identical copies of this source's evidence
+    mirrors: List[HttpUrl] = Field(default_factory=list)
 
 class CheckResult(BaseModel):
     claim: str
@@ -22,3 +30,11 @@ class CheckResult(BaseModel):
     post: str
     sources: List[Source]
     id: str
+    degraded: bool = False
+    mode: Mode = "balanced"
+    # freshness: when the verdict was computed and how long it is served from cache
+    computed_at: str | None = None
+    fresh_until: str | None = None
+    cached: bool = False
+    # seconds since computed_at, on cache hits
+    age_s: float | None = None
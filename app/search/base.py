@@ -1,13 +1,26 @@
 # app/search/base.py
 from __future__ import annotations
-from urllib.parse import urlparse
-from app.schemas import Source
+from typing import Optional
+from app.logic.deadline import Deadline
+from app.records import Hit
+from app.urls import site_of
 
-def dedupe_by_domain(items: list[Source], k: int = 5) -> list[Source]:
+TIMEOUT_S = 10.0  # per provider call when the request has no budget
+BUDGET_SHARE = 0.4  # of the remaining request budget
+MIN_TIMEOUT_S = 0.3
+
+def provider_timeout(deadline: Optional[Deadline] = None) -> float:
+    # one provider call may spend its share of what the request has left, never less than the floor
+    if deadline is None:
+        return TIMEOUT_S
+    return max(MIN_TIMEOUT_S, deadline.timeout(TIMEOUT_S, share=BUDGET_SHARE))
+
+def dedupe_by_domain(items: list[Hit], k: int = 5) -> list[Hit]:
+    # canonical site: m./amp./www. variants of a host count as one domain
     seen: set[str] = set()
-    out: list[Source] = []
+    out: list[Hit] = []
     for s in items:
-        domain = urlparse(str(s.url)).netloc.lower()
+        domain = site_of(str(s.url))
         if domain and domain not in seen:
             seen.add(domain)
             out.append(s)
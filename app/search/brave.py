@@ -1 +1,38 @@
 """Brave Search API provider."""
+from __future__ import annotations
+import re
+import httpx
+from typing import List, Optional
+from app.deps import get_settings
+from app.logic.deadline import Deadline
+from app.records import Hit, is_http_url
+from .base import dedupe_by_domain, provider_timeout
+
+ENDPOINT = "https://api.search.brave.com/res/v1/web/search"
+
+def _strip_tags(txt: str | None) -> str | None:
+    # Brave highlights matches with <strong> in descriptions
+    return re.sub(r"<[^>]+>", "", txt) if txt else txt
+
+async def search_raw(query: str, deadline: Optional[Deadline] = None) -> List[Hit]:
+    """All web results in rank order, before domain dedupe."""
+    s = get_settings()
+    if not s.brave_api_key:
+        raise RuntimeError("BRAVE_API_KEY is not set")
+    headers = {"X-Subscription-Token": s.brave_api_key, "Accept": "application/json"}
+    params = {"q": query, "count": 10}
+    async with httpx.AsyncClient(timeout=provider_timeout(deadline)) as client:
+        r = await client.get(ENDPOINT, headers=headers, params=params)
+        r.raise_for_status()
+        data = r.json()
+    items: list[Hit] = []
+    for it in (data.get("web") or {}).get("results", [])[:10]:
+        title = _strip_tags(it.get("title")) or ""
+        link = it.get("url") or ""
+        snippet = _strip_tags(it.get("description"))
+        if title and is_http_url(link):
+            items.append(Hit(title=title, url=link, snippet=snippet))
+    return items
+
+async def search(query: str, deadline: Optional[Deadline] = None, k: int = 5) -> List[Hit]:
+    return dedupe_by_domain(await search_raw(query, deadline=deadline), k=k)
@@ -0,0 +1,105 @@
+# app/search/cache.py
+from __future__ import annotations
+import asyncio
+import re
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.cache.base import Cache, LayeredBackend
+from app.cache.memory import MemoryBackend
+from app.cache.sqlite import SqliteBackend
+from app.cache.tier import get_shared_cache
+from app.deps import get_settings
+from app.records import Hit, hit_dict
+
+Search = Callable[..., Awaitable[List[Hit]]]  # search(query, deadline=None, k=5)
+Entry = Tuple[float, List[Dict[str, Any]]]  # (stored_at, dumped sources)
+
+def normalize_query(query: str) -> str:
+    q = query.casefold()
+    q = re.sub(r"\s+", " ", q)
+    return q.strip(" \t\n.?!\"'")
+
+class SearchCache:
+    """
+    Search results keyed by (provider, k, normalized query), in the "search"
+    namespace of the cache tier (app.cache). Fresh entries (age < ttl) are
+    served as-is; stale ones (age < ttl + stale) are served immediately while
+    a background refresh runs. Concurrent misses for the same key share a
+    single upstream call, which runs under no caller's deadline: each caller
+    waits for it only as long as its own deadline allows.
+
+    Without `store`, entries live in a `max_items` LRU, backed by a private
+    SQLite file when `db_path` is given.
+    """
+
+    def __init__(self, ttl_s: float, stale_s: float, max_items: int = 512, db_path: Optional[str] = None,
+                 store: Optional[Cache] = None):
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        if store is None:
+            near = MemoryBackend(max_items=max(1, max_items))
+            store = Cache("search", LayeredBackend(near, SqliteBackend(db_path)) if db_path else near)
+        self.store = store
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def _lookup(self, key: str) -> Optional[Entry]:
+        entry = await self.store.aget(key)
+        return (float(entry[0]), entry[1]) if entry else None
+
+    async def _fill(self, key: str, search: Search, query: str, k: int) -> List[Dict[str, Any]]:
+        try:
+            items = await search(query, k=k)
+            payload = [hit_dict(s) for s in items]
+            if payload and self.ttl_s > 0:  # empty answers are often transient; don't pin them
+                await self.store.aset(key, [time.time(), payload], ttl_s=self.ttl_s + self.stale_s)
+            return payload
+        finally:
+            self._inflight.pop(key, None)
+
+    def _start(self, key: str, search: Search, query: str, k: int) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fill(key, search, query, k))
+            # retrieved even if every waiter gave up; a failed refresh leaves any stale entry in place
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def get_or_fetch(self, provider: str, query: str, search: Search, deadline=None, k: int = 5) -> List[Hit]:
+        key = f"{provider}:{k}:{normalize_query(query)}"
+        entry = await self._lookup(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < self.ttl_s:
+                return [Hit.from_dict(d) for d in entry[1]]
+            if age < self.ttl_s + self.stale_s:
+                self._start(key, search, query, k)  # refresh in the background; nobody waits for it
+                return [Hit.from_dict(d) for d in entry[1]]
+        task = self._start(key, search, query, k)
+        timeout = deadline.remaining() if deadline is not None and deadline.bounded else None
+        try:
+            payload = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            # the fill carries on for other waiters and the cache
+            deadline.mark_degraded("search")
+            raise
+        return [Hit.from_dict(d) for d in payload]
+
+def cached(cache: SearchCache, provider: str, search: Search) -> Search:
+    """Wrap a provider's `search(query, deadline=None, k=5)` with `cache`."""
+
+    async def cached_search(query: str, deadline=None, k: int = 5) -> List[Hit]:
+        return await cache.get_or_fetch(provider, query, search, deadline, k=k)
+
+    return cached_search
+
+@lru_cache(maxsize=1)
+def get_cache() -> SearchCache:
+    s = get_settings()
+    return SearchCache(
+        ttl_s=s.search_cache_ttl_s,
+        stale_s=s.search_cache_stale_s,
+        store=get_shared_cache("search", near_items=s.search_cache_size),
+    )
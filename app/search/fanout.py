@@ -0,0 +1,90 @@
+# app/search/fanout.py
+from __future__ import annotations
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from app.logic.deadline import Deadline
+from app.records import Hit
+from app.urls import url_key
+from .base import dedupe_by_domain
+
+RRF_K = 60  # standard reciprocal-rank-fusion damping constant
+
+Search = Callable[..., Awaitable[List[Hit]]]
+
+def _url_key(s: Hit) -> str:
+    return url_key(str(s.url))
+
+def rrf_merge(result_lists: Sequence[List[Hit]], k: int = RRF_K) -> List[Hit]:
+    """
+    Merge ranked lists by reciprocal-rank fusion: score(d) = sum 1 / (k + rank).
+    Ties keep the order in which items were first seen.
+    """
+    scores: Dict[str, float] = {}
+    first: Dict[str, Hit] = {}
+    for results in result_lists:
+        for rank, s in enumerate(results, start=1):
+            key = _url_key(s)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            if key not in first:
+                first[key] = s
+    order = {key: i for i, key in enumerate(first)}
+    ranked = sorted(first, key=lambda key: (-scores[key], order[key]))
+    return [first[key] for key in ranked]
+
+async def fanout_raw(
+    providers: Dict[str, Search],
+    query: str,
+    deadline: Optional[Deadline] = None,
+    first_n: int = 2,
+    hedge_s: float = 1.0,
+) -> List[Hit]:
+    """
+    Query every provider concurrently and fuse what comes back.
+    Returns as soon as `first_n` providers answered, or once `hedge_s` has
+    passed with at least one answer; slower providers are cancelled so a
+    single straggler can't hold up the search stage.
+    """
+    tasks = {asyncio.create_task(fn(query, deadline=deadline)): name for name, fn in providers.items()}
+    answered: Dict[str, List[Hit]] = {}
+    errors: List[BaseException] = []
+    pending = set(tasks)
+    hedge_at = time.monotonic() + hedge_s
+    try:
+        while pending and len(answered) < first_n:
+            timeout = None
+            if answered:
+                timeout = max(0.0, hedge_at - time.monotonic())
+            elif deadline is not None and deadline.bounded:
+                timeout = deadline.remaining()
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break  # hedge deadline passed (or request budget gone)
+            for t in done:
+                if t.exception() is not None:
+                    errors.append(t.exception())  # type: ignore[arg-type]
+                else:
+                    answered[tasks[t]] = t.result()
+    finally:
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if not answered:
+        if errors:
+            raise errors[0]
+        return []
+    # fuse in provider priority order so ties favour the preferred provider
+    return rrf_merge([answered[name] for name in providers if name in answered])
+
+def fanout(providers: Dict[str, Search], first_n: int = 2, hedge_s: float = 1.0, k: int = 5) -> Search:
+    """Build a `search(query, deadline=None, k=k)` over several raw providers."""
+    default_k = k
+
+    async def search(query: str, deadline: Optional[Deadline] = None, k: int = default_k) -> List[Hit]:
+        merged = await fanout_raw(providers, query, deadline=deadline, first_n=first_n, hedge_s=hedge_s)
+        return dedupe_by_domain(merged, k=k)
+
+    return search
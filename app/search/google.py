@@ -1 +1,33 @@
 """Google Custom Search Engine provider."""
+from __future__ import annotations
+import httpx
+from typing import List, Optional
+from app.deps import get_settings
+from app.logic.deadline import Deadline
+from app.records import Hit, is_http_url
+from .base import dedupe_by_domain, provider_timeout
+
+ENDPOINT = "https://www.googleapis.com/customsearch/v1"
+
+async def search_raw(query: str, deadline: Optional[Deadline] = None) -> List[Hit]:
+    """All results in rank order, before domain dedupe."""
+    s = get_settings()
+    if not s.google_api_key or not s.google_cse_id:
+        raise RuntimeError("GOOGLE_API_KEY and GOOGLE_CSE_ID must be set")
+    # google uses key params, not headers
+    params = {"key": s.google_api_key, "cx": s.google_cse_id, "q": query, "num": 10}
+    async with httpx.AsyncClient(timeout=provider_timeout(deadline)) as client:
+        r = await client.get(ENDPOINT, params=params)
+        r.raise_for_status()
+        data = r.json()
+    items: list[Hit] = []
+    for it in data.get("items", [])[:10]:
+        title = it.get("title") or ""
+        link = it.get("link") or ""
+        snippet = it.get("snippet")
+        if title and is_http_url(link):
+            items.append(Hit(title=title, url=link, snippet=snippet))
+    return items
+
+async def search(query: str, deadline: Optional[Deadline] = None, k: int = 5) -> List[Hit]:
+    return dedupe_by_domain(await search_raw(query, deadline=deadline), k=k)
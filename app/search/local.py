@@ -0,0 +1,171 @@
+# app/search/local.py
+"""
+Offline knowledge-base provider: hybrid BM25 + MiniLM retrieval over a
+locally ingested corpus of trusted documents.
+
+    python -m app.search.local ingest corpus.jsonl [--kb-dir kb]
+    python -m app.search.local query "The Earth orbits the Sun"
+
+Corpus lines are JSON objects with "title" and "text", plus "url" (a
+Wikipedia-style dump without urls gets en.wikipedia.org links built from
+the title). Results carry pre-extracted paragraphs, so the fetch stage is
+skipped for them.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote
+
+import numpy as np
+
+from app.deps import VECTOR_DTYPES, get_settings
+from app.fetch.fetcher import split_paragraphs
+from app.logic.deadline import Deadline
+from app.nlp.embed import embed_text, embed_texts
+from app.nlp.lexical import BM25, tokenize
+from app.nlp import vectors as vecstore
+from app.records import Hit, is_http_url
+from app.urls import url_key
+
+CHUNKS_FILE = "chunks.jsonl"
+BM25_FILE = "bm25.json"
+VECTORS_FILE = "vectors.npy"
+CANDIDATES = 50  # per retriever, before fusion
+RRF_K = 60
+MAX_DOCS = 10
+PARAS_PER_DOC = 4
+EMBED_BATCH = 256
+
+def _doc_url(rec: Dict[str, Any]) -> str:
+    url = rec.get("url") or ""
+    if url:
+        return url
+    title = (rec.get("title") or "").strip().replace(" ", "_")
+    return f"https://en.wikipedia.org/wiki/{quote(title)}"
+
+def _chunk(text: str) -> List[str]:
+    paras = split_paragraphs(text, cap=None)
+    # short encyclopedic entries may have no paragraph over the length floor
+    return paras or ([text.strip()] if text.strip() else [])
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def ingest(records: Iterable[Dict[str, Any]], kb_dir: str, vector_dtype: Optional[str] = None) -> int:
+    """
+    Chunk, index and embed `records` into `kb_dir`. Returns the chunk count.
+    Vectors are stored as `vector_dtype` (default: VECTOR_STORE_DTYPE).
+    """
+    os.makedirs(kb_dir, exist_ok=True)
+    chunks: list[Dict[str, Any]] = []
+    for doc_id, rec in enumerate(records):
+        title = (rec.get("title") or "").strip()
+        text = rec.get("text") or ""
+        if not title or not text:
+            continue
+        url = _doc_url(rec)
+        for para in _chunk(text):
+            chunks.append({"doc": doc_id, "title": title, "url": url, "text": para})
+
+    with open(os.path.join(kb_dir, CHUNKS_FILE), "w", encoding="utf-8") as f:
+        for c in chunks:
+            f.write(json.dumps(c, ensure_ascii=False) + "\n")
+    bm25 = BM25.build([tokenize(c["title"] + " " + c["text"]) for c in chunks])
+    with open(os.path.join(kb_dir, BM25_FILE), "w", encoding="utf-8") as f:
+        json.dump(bm25.to_dict(), f)
+
+    texts = [c["text"] for c in chunks]
+    parts = [embed_texts(texts[i:i + EMBED_BATCH]) for i in range(0, len(texts), EMBED_BATCH)]
+    vecs = np.concatenate(parts) if parts else np.zeros((0, 384), dtype="float32")
+    vecstore.save(os.path.join(kb_dir, VECTORS_FILE), vecs, vector_dtype or get_settings().vector_store_dtype)
+    return len(chunks)
+
+class LocalIndex:
+    def __init__(self, chunks: List[Dict[str, Any]], bm25: BM25, vecs: np.ndarray, scales: Optional[np.ndarray] = None):
+        self.chunks = chunks
+        self.bm25 = bm25
+        self.vecs = vecs  # memory-mapped (n_chunks, dim), float32/float16/int8
+        self.scales = scales  # per-row scales for int8 storage
+
+    @classmethod
+    def load(cls, kb_dir: str) -> "LocalIndex":
+        chunks = list(read_jsonl(os.path.join(kb_dir, CHUNKS_FILE)))
+        with open(os.path.join(kb_dir, BM25_FILE), encoding="utf-8") as f:
+            bm25 = BM25.from_dict(json.load(f))
+        vecs, scales = vecstore.load(os.path.join(kb_dir, VECTORS_FILE))
+        return cls(chunks, bm25, vecs, scales)
+
+    def _dense_top(self, query: str, k: int) -> List[int]:
+        if not len(self.chunks):
+            return []
+        sims = vecstore.dot(self.vecs, self.scales, embed_text(query))
+        k = min(k, sims.shape[0])
+        top = np.argpartition(-sims, k - 1)[:k]
+        return [int(i) for i in top[np.argsort(-sims[top], kind="stable")]]
+
+    def search(self, query: str, max_docs: int = MAX_DOCS) -> List[Hit]:
+        """Hybrid retrieval: BM25 and dense rankings fused by reciprocal rank, grouped per document."""
+        scores: Dict[int, float] = {}
+        for ranking in (self.bm25.top(tokenize(query), CANDIDATES), self._dense_top(query, CANDIDATES)):
+            for rank, i in enumerate(ranking, start=1):
+                scores[i] = scores.get(i, 0.0) + 1.0 / (RRF_K + rank)
+        by_doc: Dict[int, List[int]] = {}
+        for i in sorted(scores, key=lambda i: -scores[i]):
+            by_doc.setdefault(self.chunks[i]["doc"], []).append(i)
+
+        out: list[Hit] = []
+        for doc, hits in list(by_doc.items())[:max_docs]:
+            first = self.chunks[hits[0]]
+            paras = [self.chunks[i]["text"] for i in hits[:PARAS_PER_DOC]]
+            if is_http_url(first["url"]):
+                out.append(Hit(title=first["title"], url=first["url"], snippet=paras[0][:300], paragraphs=paras))
+        return out
+
+@lru_cache(maxsize=1)
+def get_index(kb_dir: Optional[str] = None) -> LocalIndex:
+    return LocalIndex.load(kb_dir or get_settings().local_kb_dir)
+
+async def search_raw(query: str, deadline: Optional[Deadline] = None) -> List[Hit]:
+    """All matching documents in rank order, before domain dedupe."""
+    # query embedding and BM25 are CPU work; keep them off the event loop
+    return await asyncio.to_thread(get_index().search, query)
+
+async def search(query: str, deadline: Optional[Deadline] = None, k: int = 5) -> List[Hit]:
+    # one trusted site can legitimately hold every hit; dedupe by URL, not domain
+    seen: set[str] = set()
+    out: list[Hit] = []
+    for hit in await search_raw(query, deadline=deadline):
+        key = url_key(hit.url)
+        if key not in seen:
+            seen.add(key)
+            out.append(hit)
+    return out[:k]
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.search.local")
+    ap.add_argument("--kb-dir", default=None)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ing = sub.add_parser("ingest", help="build the index from a JSONL corpus")
+    ing.add_argument("corpus")
+    ing.add_argument("--vector-dtype", choices=VECTOR_DTYPES, default=None)
+    q = sub.add_parser("query", help="run a retrieval against the index")
+    q.add_argument("text")
+    args = ap.parse_args(argv)
+    kb_dir = args.kb_dir or get_settings().local_kb_dir
+    if args.cmd == "ingest":
+        n = ingest(read_jsonl(args.corpus), kb_dir, args.vector_dtype)
+        print(f"indexed {n} chunks into {kb_dir}")
+    else:
+        for s in get_index(kb_dir).search(args.text):
+            print(f"{s.url}  {s.title}\n    {s.snippet}")
+
+if __name__ == "__main__":
+    main()
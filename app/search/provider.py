@@ -1,10 +1,38 @@
 # app/search/provider.py
 from __future__ import annotations
 from app.deps import get_settings
-from . import serper
+from . import brave, google, local, serper
+from .cache import cached, get_cache
+from .fanout import fanout
+
+PROVIDERS = {
+    "serper": serper.search,
+    "brave": brave.search,
+    "google": google.search,
+    "local": local.search,
+}
+
+RAW_PROVIDERS = {
+    "serper": serper.search_raw,
+    "brave": brave.search_raw,
+    "google": google.search_raw,
+    "local": local.search_raw,
+}
 
 def get_search():
-    provider = get_settings().search_provider
-    if provider == "serper":
-        return serper.search
-    raise NotImplementedError(f"search provider '{provider}' not implemented yet")
+    s = get_settings()
+    names = s.search_providers or (s.search_provider,)
+    if len(names) > 1:
+        # fan out to every provider and fuse; cache under the combination
+        search = fanout(
+            {name: RAW_PROVIDERS[name] for name in names},
+            first_n=s.search_fanout_first_n,
+            hedge_s=s.search_hedge_s,
+        )
+        provider = "+".join(names)
+    else:
+        provider = names[0]
+        search = PROVIDERS[provider]
+    if s.search_cache_ttl_s <= 0 or provider == "local":
+        return search  # the local index is already faster than the cache
+    return cached(get_cache(), provider, search)
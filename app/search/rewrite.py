@@ -0,0 +1,102 @@
+# app/search/rewrite.py
+from __future__ import annotations
+import asyncio
+import re
+from typing import Awaitable, Callable, List, Optional
+
+from app.logic.deadline import Deadline
+from app.records import Hit
+from .base import dedupe_by_domain
+from .cache import normalize_query
+from .fanout import rrf_merge
+
+Search = Callable[..., Awaitable[List[Hit]]]
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "by", "for",
+    "with", "from", "as", "into", "about", "than", "that", "this", "these", "those",
+    "it", "its", "is", "are", "was", "were", "be", "been", "being", "am", "do", "does",
+    "did", "has", "have", "had", "will", "would", "can", "could", "should", "may",
+    "might", "must", "shall", "there", "their", "they", "them", "he", "she", "we",
+    "you", "i", "his", "her", "our", "your", "which", "who", "whom", "what", "when",
+    "where", "why", "how", "all", "any", "some", "very", "just", "so", "also", "if",
+    "then", "claim", "claims", "said", "says", "according", "reportedly", "actually",
+    "really", "true", "false", "fact", "not", "no", "never",
+}
+DO_NOT_RE = re.compile(r"\b(?:do|does|did)(?:\s+not|n[’']t)\b", re.IGNORECASE)
+AUX_NOT_RE = re.compile(
+    r"\b(is|are|was|were|has|have|had|will|would|can|could|should)(?:\s+not|n[’']t)\b",
+    re.IGNORECASE,
+)
+IRREGULAR_RE = re.compile(r"\b(?:can[’']t|cannot|won[’']t)\b", re.IGNORECASE)
+BARE_NEGATION_RE = re.compile(r"\b(?:not|never|no\s+longer)\b", re.IGNORECASE)
+WORD_RE = re.compile(r"[A-Za-z0-9][\w'’-]*")
+MAX_KEYWORDS = 8
+
+def _squash(txt: str) -> str:
+    return re.sub(r"\s+", " ", txt).strip(" ,;:")
+
+def keyword_query(claim: str) -> str:
+    """Content words only, in claim order."""
+    words = [
+        w for w in WORD_RE.findall(claim)
+        if w.lower() not in STOPWORDS and not w.lower().endswith(("n't", "n’t"))
+    ]
+    return " ".join(words[:MAX_KEYWORDS])
+
+def negation_neutral(claim: str) -> str:
+    """Drop negations so 'X does not cause Y' retrieves the same coverage as 'X causes Y'."""
+    txt = DO_NOT_RE.sub("", claim)
+    txt = IRREGULAR_RE.sub(lambda m: "will" if m.group(0).lower().startswith("wo") else "can", txt)
+    txt = AUX_NOT_RE.sub(lambda m: m.group(1), txt)
+    txt = BARE_NEGATION_RE.sub("", txt)
+    return _squash(txt)
+
+def entity_query(claim: str) -> str:
+    """Capitalised names, acronyms and numbers; a lone sentence-initial word is not a name."""
+    picked: list[str] = []
+    for sentence in re.split(r"(?<=[.!?])\s+", claim):
+        tokens = WORD_RE.findall(sentence)
+        start = 0
+        run: list[str] = []
+        for i, tok in enumerate(tokens + [""]):
+            if tok and (tok[0].isupper() or tok[0].isdigit()):
+                if not run:
+                    start = i
+                run.append(tok)
+                continue
+            if run and run[0].lower() in STOPWORDS:
+                run = run[1:]  # "The Great Wall" -> "Great Wall"
+                start += 1
+            if run:
+                lone_initial = start == 0 and len(run) == 1 and not run[0].isupper() and not run[0][0].isdigit()
+                if not lone_initial:
+                    picked.append(" ".join(run))
+                run = []
+    return " ".join(dict.fromkeys(picked))
+
+def expand_queries(claim: str, max_queries: int = 3) -> List[str]:
+    """The claim itself plus distinct reformulations, up to `max_queries`."""
+    out = [claim]
+    seen = {normalize_query(claim)}
+    for variant in (keyword_query(claim), negation_neutral(claim), entity_query(claim)):
+        key = normalize_query(variant)
+        if len(key.split()) >= 2 and key not in seen:
+            seen.add(key)
+            out.append(variant)
+    return out[:max(1, max_queries)]
+
+async def search_many(
+    search: Search,
+    queries: List[str],
+    deadline: Optional[Deadline] = None,
+    k: int = 5,
+) -> List[Hit]:
+    """Run `queries` concurrently through `search`, fuse by rank and dedupe by URL and domain."""
+    if len(queries) == 1:
+        return await search(queries[0], deadline=deadline, k=k)
+    results = await asyncio.gather(*(search(q, deadline=deadline, k=k) for q in queries), return_exceptions=True)
+    lists = [r for r in results if not isinstance(r, BaseException)]
+    if not lists:
+        raise results[0]  # type: ignore[misc]
+    return dedupe_by_domain(rrf_merge(lists), k=k)
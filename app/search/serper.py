@@ -1,31 +1,33 @@
 # app/search/serper.py
 from __future__ import annotations
 import httpx
-from typing import List
+from typing import List, Optional
 from app.deps import get_settings
-from app.schemas import Source
-from .base import dedupe_by_domain
+from app.logic.deadline import Deadline
+from app.records import Hit, is_http_url
+from .base import dedupe_by_domain, provider_timeout
 
 ENDPOINT = "https://google.serper.dev/search"
 
-async def search(query: str) -> List[Source]:
+async def search_raw(query: str, deadline: Optional[Deadline] = None) -> List[Hit]:
+    """All organic results in rank order, before domain dedupe."""
     s = get_settings()
     if not s.serper_api_key:
         raise RuntimeError("SERPER_API_KEY is not set")
     headers = {"X-API-KEY": s.serper_api_key, "Content-Type": "application/json"}
     payload = {"q": query, "num": 10}
-    async with httpx.AsyncClient(timeout=10) as client:
+    async with httpx.AsyncClient(timeout=provider_timeout(deadline)) as client:
         r = await client.post(ENDPOINT, headers=headers, json=payload)
         r.raise_for_status()
         data = r.json()
-    items: list[Source] = []
+    items: list[Hit] = []
     for it in data.get("organic", [])[:10]:
         title = it.get("title") or ""
         link = it.get("link") or ""
         snippet = it.get("snippet")
-        if title and link:
-            try:
-                items.append(Source(title=title, url=link, snippet=snippet))
-            except Exception:
-                continue
-    return dedupe_by_domain(items, k=5)
+        if title and is_http_url(link):
+            items.append(Hit(title=title, url=link, snippet=snippet))
+    return items
+
+async def search(query: str, deadline: Optional[Deadline] = None, k: int = 5) -> List[Hit]:
+    return dedupe_by_domain(await search_raw(query, deadline=deadline), k=k)
@@ -0,0 +1,156 @@
+# app/store/bulk.py
+"""
+Bulk export and import of stored results as NDJSON, one result per line:
+
+    {"id": "...", "created_at": "...", "result": {...}}
+
+    python -m app.store.bulk export [--out results.ndjson.gz] [--since 2024-01-01] [--until ...] [--verdict False]
+    python -m app.store.bulk import results.ndjson.gz [--replace]
+
+Exports page through `results` by (created_at, id) keyset, EXPORT_BATCH
+rows per query on a fresh connection, so memory stays flat and no read
+transaction is held open for the whole table. Stored result_json is
+written out as-is, not re-encoded. Imports commit every IMPORT_BATCH rows.
+"""
+from __future__ import annotations
+import argparse
+import gzip
+import sys
+import zlib
+from datetime import datetime, timezone
+from typing import IO, Iterable, Iterator, Optional, Tuple
+
+from app.codec import dumps, loads
+from app.store import db
+
+EXPORT_BATCH = 1000
+IMPORT_BATCH = 5000
+GZIP_LEVEL = 6
+
+def parse_when(value: Optional[str]) -> Optional[str]:
+    """An ISO date or datetime as the UTC isoformat stored in created_at (naive means UTC)."""
+    if not value:
+        return None
+    try:
+        when = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"not an ISO date or datetime: {value!r}") from None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.astimezone(timezone.utc).isoformat()
+
+def iter_export(since: Optional[str] = None, until: Optional[str] = None, verdict: Optional[str] = None,
+                batch: int = EXPORT_BATCH) -> Iterator[bytes]:
+    """NDJSON for results created in [since, until) (and with `verdict`), oldest first; one chunk per batch."""
+    since, until = parse_when(since), parse_when(until)
+    where, params = ["(created_at, id) > (?, ?)"], []
+    if until:
+        where.append("created_at < ?")
+        params.append(until)
+    if verdict:
+        where.append("json_extract(result_json, '$.verdict') = ?")
+        params.append(verdict)
+    sql = (
+        f"SELECT id, created_at, result_json FROM results WHERE {' AND '.join(where)}"
+        " ORDER BY created_at, id LIMIT ?"
+    )
+    after: Tuple[str, str] = (since or "", "")
+    while True:
+        with db._conn() as c:
+            rows = c.execute(sql, (*after, *params, batch)).fetchall()
+        if not rows:
+            return
+        yield "".join(
+            f'{{"id":{dumps(r["id"])},"created_at":{dumps(r["created_at"])},"result":{r["result_json"]}}}\n'
+            for r in rows
+        ).encode("utf-8")
+        if len(rows) < batch:
+            return
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+    """`chunks` as one gzip stream, compressed as they arrive."""
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip header and trailer
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+def import_results(lines: Iterable[str | bytes], replace: bool = False, batch: int = IMPORT_BATCH) -> Tuple[int, int]:
+    """
+    Insert exported lines, committing every `batch` rows. Existing ids are
+    kept unless `replace`. Returns (written, skipped). A malformed line
+    raises ValueError; batches before it stay committed.
+    """
+    conflict = (
+        "DO UPDATE SET result_json = excluded.result_json, created_at = excluded.created_at" if replace
+        else "DO NOTHING"
+    )
+    sql = f"INSERT INTO results (id, result_json, created_at) VALUES (?, ?, ?) ON CONFLICT (id) {conflict}"
+    written = seen = 0
+    rows: list[tuple[str, str, str]] = []
+
+    def flush() -> int:
+        with db._conn() as c:
+            n = c.executemany(sql, rows).rowcount  # summed changes(); skipped conflicts count 0
+        rows.clear()
+        return n
+
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            rec = loads(line)
+            rid, created_at, result = str(rec["id"]), str(rec["created_at"]), rec["result"]
+            if not isinstance(result, dict):
+                raise TypeError("result is not an object")
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"line {lineno}: {e}") from None
+        result["id"] = rid
+        rows.append((rid, dumps(result), created_at))
+        seen += 1
+        if len(rows) >= batch:
+            written += flush()
+    if rows:
+        written += flush()
+    return written, seen - written
+
+def _open_in(path: str) -> IO[bytes]:
+    f = sys.stdin.buffer if path == "-" else open(path, "rb")
+    if f.peek(2)[:2] == b"\x1f\x8b":  # gzip magic
+        return gzip.open(f)  # type: ignore[return-value]
+    return f
+
+def main(argv: Optional[list[str]] = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.store.bulk")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="write results as NDJSON")
+    ex.add_argument("--out", default="-", help="file, or - for stdout; a .gz name compresses")
+    ex.add_argument("--since", default=None)
+    ex.add_argument("--until", default=None)
+    ex.add_argument("--verdict", default=None)
+    ex.add_argument("--gzip", action="store_true")
+    im = sub.add_parser("import", help="load NDJSON written by export (gzip is detected)")
+    im.add_argument("path", help="file, or - for stdin")
+    im.add_argument("--replace", action="store_true", help="overwrite results whose id already exists")
+    args = ap.parse_args(argv)
+    db.init_db()
+    if args.cmd == "export":
+        chunks = iter_export(args.since, args.until, args.verdict)
+        if args.gzip or args.out.endswith(".gz"):
+            chunks = gzip_chunks(chunks)
+        out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+    else:
+        with _open_in(args.path) as f:
+            written, skipped = import_results(f, replace=args.replace)
+        print(f"imported {written} results, skipped {skipped} existing", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
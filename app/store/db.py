@@ -1,10 +1,53 @@
 # app/store/db.py
 from __future__ import annotations
-import os, json, sqlite3, secrets
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+import html, os, re, sqlite3, secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from app.codec import dumps, loads
 
 DB_PATH = os.getenv("DB_PATH", "data.db")
+VIEW_RESOLUTION_S = 3600.0  # last_viewed_at granularity
+SEARCH_WEIGHTS = (10.0, 3.0, 1.0)  # bm25 weight of claim, rationale, evidence matches
+SNIPPET_TOKENS = 16
+_TERM_RE = re.compile(r"\w+\*?")
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"  # highlight sentinels, swapped for <mark> after escaping
+
+# Full-text index over each result's claim, rationale and evidence, kept in
+# step with `results` by triggers (rowid-aligned, so no id lookups).
+_EVIDENCE_SQL = """(
+    SELECT group_concat(e.value, char(10))
+    FROM json_each({row}.result_json, '$.sources') AS s, json_each(s.value, '$.evidence') AS e
+)"""
+_FTS_ROW_SQL = (
+    "json_extract({row}.result_json, '$.claim'), json_extract({row}.result_json, '$.rationale'), "
+    + _EVIDENCE_SQL
+)
+_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(
+        claim, rationale, evidence, tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS results_fts_insert AFTER INSERT ON results BEGIN
+        INSERT INTO results_fts (rowid, claim, rationale, evidence)
+        VALUES (NEW.rowid, {_FTS_ROW_SQL.format(row="NEW")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS results_fts_update AFTER UPDATE OF result_json ON results BEGIN
+        DELETE FROM results_fts WHERE rowid = OLD.rowid;
+        INSERT INTO results_fts (rowid, claim, rationale, evidence)
+        VALUES (NEW.rowid, {_FTS_ROW_SQL.format(row="NEW")});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS results_fts_delete AFTER DELETE ON results BEGIN
+        DELETE FROM results_fts WHERE rowid = OLD.rowid;
+    END
+    """,
+]
 
 def _conn() -> sqlite3.Connection:
     c = sqlite3.connect(DB_PATH, check_same_thread=False)
@@ -13,13 +56,28 @@ def _conn() -> sqlite3.Connection:
 
 def init_db() -> None:
     with _conn() as c:
+        # only applies to a new file; `python -m app.store.retention compact` converts an existing one
+        c.execute("PRAGMA auto_vacuum = INCREMENTAL")
         c.execute("""
         CREATE TABLE IF NOT EXISTS results (
             id TEXT PRIMARY KEY,
             result_json TEXT NOT NULL,
-            created_at TEXT NOT NULL
+            created_at TEXT NOT NULL,
+            last_viewed_at TEXT
         )
         """)
+        if "last_viewed_at" not in {row["name"] for row in c.execute("PRAGMA table_info(results)")}:
+            c.execute("ALTER TABLE results ADD COLUMN last_viewed_at TEXT")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_results_created ON results (created_at, id)")  # export keyset
+        fresh = c.execute("SELECT 1 FROM sqlite_master WHERE name = 'results_fts'").fetchone() is None
+        for stmt in _FTS_SCHEMA:
+            c.execute(stmt)
+        if fresh:
+            # results stored before the index existed; same transaction, so a crash can't leave it half-built
+            c.execute(
+                f"INSERT INTO results_fts (rowid, claim, rationale, evidence)"
+                f" SELECT rowid, {_FTS_ROW_SQL.format(row='results')} FROM results"
+            )
 
 def _gen_id(n_bytes: int = 6) -> str:
     # URL-safe short id ~8–10 chars
@@ -29,17 +87,80 @@ def _gen_id(n_bytes: int = 6) -> str:
 def save_result(result: Dict[str, Any]) -> str:
     rid = str(result.get("id") or _gen_id())
     result["id"] = rid
-    payload = json.dumps(result, ensure_ascii=False)
+    payload = dumps(result)
     with _conn() as c:
+        # an upsert keeps the row (and its rowid) in place, so the update trigger re-indexes it;
+        # REPLACE would delete it without firing delete triggers
         c.execute(
-            "INSERT OR REPLACE INTO results (id, result_json, created_at) VALUES (?, ?, ?)",
+            "INSERT INTO results (id, result_json, created_at) VALUES (?, ?, ?)"
+            " ON CONFLICT (id) DO UPDATE SET result_json = excluded.result_json, created_at = excluded.created_at",
             (rid, payload, datetime.now(timezone.utc).isoformat()),
         )
     return rid
 
+def record_view(rid: str) -> None:
+    """Note that a shared result was opened (app.store.retention can keep viewed results longer)."""
+    now = datetime.now(timezone.utc)
+    with _conn() as c:
+        # at most one write per result per VIEW_RESOLUTION_S, however often it is opened
+        c.execute(
+            "UPDATE results SET last_viewed_at = ? WHERE id = ? AND (last_viewed_at IS NULL OR last_viewed_at < ?)",
+            (now.isoformat(), rid, (now - timedelta(seconds=VIEW_RESOLUTION_S)).isoformat()),
+        )
+
 def load_result(rid: str) -> Optional[Dict[str, Any]]:
     with _conn() as c:
         row = c.execute("SELECT result_json FROM results WHERE id = ?", (rid,)).fetchone()
     if not row:
         return None
-    return json.loads(row["result_json"])
+    return loads(row["result_json"])
+
+def _match_query(text: str) -> str:
+    """User text as an FTS5 query: every word must match (`word*` for a prefix), operators are not parsed."""
+    terms = []
+    for t in _TERM_RE.findall(text):
+        word, prefix = t.rstrip("*"), t.endswith("*")
+        terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+def _marked(text: Optional[str]) -> str:
+    return html.escape(text or "").replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+def search_results(query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+    """
+    Stored results matching every word of `query`, best BM25 match first.
+    `claim` and `snippet` are HTML-escaped with matches wrapped in <mark>.
+    """
+    match = _match_query(query)
+    if not match:
+        return {"query": query, "items": [], "offset": offset, "has_more": False}
+    w_claim, w_rationale, w_evidence = SEARCH_WEIGHTS
+    with _conn() as c:
+        rows = c.execute(f"""
+        SELECT r.id, r.created_at,
+               json_extract(r.result_json, '$.verdict') AS verdict,
+               json_extract(r.result_json, '$.confidence') AS confidence,
+               m.claim, m.snippet, m.score
+        FROM (
+            SELECT rowid,
+                   highlight(results_fts, 0, ?, ?) AS claim,
+                   snippet(results_fts, -1, ?, ?, '…', {SNIPPET_TOKENS}) AS snippet,
+                   bm25(results_fts, {w_claim}, {w_rationale}, {w_evidence}) AS score
+            FROM results_fts WHERE results_fts MATCH ?
+            ORDER BY score LIMIT ? OFFSET ?
+        ) AS m JOIN results AS r ON r.rowid = m.rowid
+        ORDER BY m.score
+        """, (_MARK_OPEN, _MARK_CLOSE, _MARK_OPEN, _MARK_CLOSE, match, limit + 1, offset)).fetchall()
+    items: List[Dict[str, Any]] = [
+        {
+            "id": row["id"],
+            "claim": _marked(row["claim"]),
+            "verdict": row["verdict"],
+            "confidence": row["confidence"],
+            "created_at": row["created_at"],
+            "snippet": _marked(row["snippet"]),
+            "score": -row["score"],  # bm25() is lower-is-better; flip so higher ranks first
+        }
+        for row in rows[:limit]
+    ]
+    return {"query": query, "items": items, "offset": offset, "has_more": len(rows) > limit}
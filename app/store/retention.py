@@ -0,0 +1,240 @@
+# app/store/retention.py
+"""
+Retention for the results store, so data.db stops growing without bound.
+
+A Policy deletes results older than RESULT_RETENTION_DAYS, with per-verdict
+overrides (RESULT_RETENTION_BY_VERDICT; `<= 0` keeps that verdict forever)
+and a separate limit for degraded (partial) runs. With keep-if-viewed, a
+view of /r/{id} restarts the result's clock. Each rule walks `results` once
+by its (created_at, id) index, collecting RETENTION_BATCH candidate ids per
+read-only query, then deletes them by id in a short transaction with a pause
+in between, so the write lock is never held across a scan of history.
+
+Each sweep also prunes the verdict cache's claims table (cold, uncached
+claims and claims whose result was purged; see app.store.verdicts).
+
+The file is kept in auto_vacuum=INCREMENTAL mode: after a purge, free
+pages are handed back to the OS VACUUM_STEP_PAGES at a time.
+
+    python -m app.store.retention report
+    python -m app.store.retention purge
+    python -m app.store.retention compact   # one-off full VACUUM; converts an older file to incremental
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.deps import Settings, get_settings
+from app.metrics import get_metrics
+from app.store import db
+from app.store.verdicts import get_verdict_cache
+
+VACUUM_STEP_PAGES = 1024  # pages freed per incremental_vacuum step
+BATCH_PAUSE_S = 0.05  # between delete batches, so writers waiting on the lock get in
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+Rule = Tuple[str, str, Tuple[Any, ...]]  # (name, WHERE clause over results, params)
+
+@dataclass(frozen=True)
+class Policy:
+    max_age_days: float = 0.0  # <= 0 => keep forever
+    by_verdict: Tuple[Tuple[str, float], ...] = ()  # (verdict, days) replacing max_age_days for that verdict
+    degraded_days: float = 0.0
+    keep_viewed: bool = True
+
+    @classmethod
+    def from_settings(cls, s: Settings) -> "Policy":
+        return cls(
+            max_age_days=s.result_retention_days,
+            by_verdict=s.result_retention_by_verdict,
+            degraded_days=s.degraded_retention_days,
+            keep_viewed=s.retention_keep_viewed,
+        )
+
+    def _older(self, days: float, now: datetime) -> Tuple[str, Tuple[Any, ...]]:
+        cutoff = (now - timedelta(days=days)).isoformat()
+        if self.keep_viewed:
+            return "created_at < ? AND (last_viewed_at IS NULL OR last_viewed_at < ?)", (cutoff, cutoff)
+        return "created_at < ?", (cutoff,)
+
+    def rules(self, now: Optional[datetime] = None) -> List[Rule]:
+        now = now or datetime.now(timezone.utc)
+        verdict = "json_extract(result_json, '$.verdict')"
+        out: List[Rule] = []
+        if self.max_age_days > 0:
+            where, params = self._older(self.max_age_days, now)
+            overridden = tuple(label for label, _ in self.by_verdict)
+            if overridden:
+                where += f" AND COALESCE({verdict}, '') NOT IN ({','.join('?' * len(overridden))})"
+                params += overridden
+            out.append(("age", where, params))
+        for label, days in self.by_verdict:
+            if days > 0:
+                where, params = self._older(days, now)
+                out.append((f"verdict:{label}", f"{verdict} = ? AND {where}", (label, *params)))
+        if self.degraded_days > 0:
+            where, params = self._older(self.degraded_days, now)
+            out.append(("degraded", f"json_extract(result_json, '$.degraded') = 1 AND {where}", params))
+        return out
+
+def purge(policy: Policy, batch: int = 500, now: Optional[datetime] = None,
+          pause_s: float = BATCH_PAUSE_S) -> Dict[str, int]:
+    """Delete what `policy` no longer keeps, `batch` rows per transaction. Returns rows deleted per rule."""
+    metrics = get_metrics()
+    deleted: Dict[str, int] = {}
+    for name, where, params in policy.rules(now):
+        total = 0
+        after: Tuple[str, str] = ("", "")
+        while True:
+            with db._conn() as c:  # read only: no write lock while scanning
+                rows = c.execute(
+                    f"SELECT created_at, id FROM results WHERE (created_at, id) > (?, ?) AND {where}"
+                    " ORDER BY created_at, id LIMIT ?",
+                    (*after, *params, batch),
+                ).fetchall()
+            if not rows:
+                break
+            with db._conn() as c:
+                # re-checked per id, in case a row was re-saved or viewed since the scan
+                total += c.execute(
+                    f"DELETE FROM results WHERE id IN (SELECT value FROM json_each(?)) AND {where}",
+                    (json.dumps([r["id"] for r in rows]), *params),
+                ).rowcount
+            if len(rows) < batch:
+                break
+            after = (rows[-1]["created_at"], rows[-1]["id"])
+            time.sleep(pause_s)
+        if total:
+            metrics.incr("retention.deleted", total)
+        deleted[name] = total
+    return deleted
+
+def prune_claims(batch: int = 500) -> int:
+    """Drop cold and orphaned verdict-cache claims. Returns rows deleted."""
+    n = get_verdict_cache().prune(batch=batch)
+    if n:
+        get_metrics().incr("retention.claims_deleted", n)
+    return n
+
+def vacuum(max_pages: Optional[int] = None) -> int:
+    """Return free pages to the OS, a step at a time (incremental mode only). Returns pages freed."""
+    freed = 0
+    with db._conn() as c:
+        if c.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        while True:
+            step = min(c.execute("PRAGMA freelist_count").fetchone()[0], VACUUM_STEP_PAGES)
+            if max_pages is not None:
+                step = min(step, max_pages - freed)
+            if step <= 0:
+                break
+            c.execute(f"PRAGMA incremental_vacuum({int(step)})").fetchall()  # runs only as rows are stepped
+            freed += step
+    if freed:
+        get_metrics().incr("retention.pages_freed", freed)
+    return freed
+
+def compact() -> None:
+    """Full VACUUM, switching the file to incremental auto-vacuum. Rewrites the whole file: run it offline."""
+    c = db._conn()
+    try:
+        c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        c.execute("VACUUM")
+    finally:
+        c.close()
+
+def size_report(detailed: bool = False) -> Dict[str, Any]:
+    """File, WAL and free-page sizes plus the result count; `detailed` adds bytes per table and index."""
+    path = db.DB_PATH
+    with db._conn() as c:
+        page_size = c.execute("PRAGMA page_size").fetchone()[0]
+        pages = c.execute("PRAGMA page_count").fetchone()[0]
+        free = c.execute("PRAGMA freelist_count").fetchone()[0]
+        mode = c.execute("PRAGMA auto_vacuum").fetchone()[0]
+        results = c.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        report: Dict[str, Any] = {
+            "path": path,
+            "file_bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+            "wal_bytes": os.path.getsize(path + "-wal") if os.path.exists(path + "-wal") else 0,
+            "page_size": page_size,
+            "pages": pages,
+            "free_pages": free,
+            "free_bytes": free * page_size,
+            "auto_vacuum": AUTO_VACUUM_MODES.get(mode, str(mode)),
+            "results": results,
+        }
+        if detailed:
+            try:  # dbstat reads every page; needs SQLITE_ENABLE_DBSTAT_VTAB
+                rows = c.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC").fetchall()
+                report["tables"] = {name: nbytes for name, nbytes in rows}
+            except sqlite3.OperationalError:
+                report["tables"] = None
+    return report
+
+class RetentionSweeper:
+    """Purges and incrementally vacuums every `interval_s`, off the event loop."""
+
+    def __init__(self, policy: Policy, interval_s: float, batch: int):
+        self.policy = policy
+        self.interval_s = interval_s
+        self.batch = batch
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self) -> Dict[str, int]:
+        deleted = purge(self.policy, self.batch)
+        deleted["claims"] = prune_claims(self.batch)
+        vacuum()
+        return deleted
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except sqlite3.Error:  # locked or busy; try again next interval
+                get_metrics().incr("retention.error")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+def make_sweeper() -> Optional[RetentionSweeper]:
+    """The configured sweeper, or None when disabled. Runs without result rules too: claims still need pruning."""
+    s = get_settings()
+    if s.retention_interval_s <= 0:
+        return None
+    return RetentionSweeper(Policy.from_settings(s), s.retention_interval_s, max(1, s.retention_batch))
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.store.retention")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("report", help="database size, free pages and bytes per table")
+    sub.add_parser("purge", help="apply the configured retention policy, prune claims, then vacuum incrementally")
+    sub.add_parser("compact", help="full VACUUM into incremental auto-vacuum mode (blocks writers)")
+    args = ap.parse_args(argv)
+    db.init_db()
+    if args.cmd == "purge":
+        s = get_settings()
+        batch = max(1, s.retention_batch)
+        print(json.dumps({"deleted": purge(Policy.from_settings(s), batch),
+                          "claims_deleted": prune_claims(batch), "pages_freed": vacuum()}))
+    elif args.cmd == "compact":
+        compact()
+    if args.cmd != "purge":
+        print(json.dumps(size_report(detailed=True), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# app/store/verdicts.py
+"""
+Verdict cache and claim popularity, keyed by a normalized claim.
+
+Cached verdicts live in the "verdicts" namespace of the cache tier
+(app.cache): the result itself, its mode, and when it was computed and
+expires. The `claims` table in the results database only keeps the
+bookkeeping behind background refreshes: per claim, the latest result id,
+mode and expiry, and a request rate that decays with a HALF_LIFE_S
+half-life. The refresher (app.logic.refresher) uses the rate to find hot
+claims whose verdict is about to expire, and leases a claim in its row
+(`refreshing_until`) so only one worker re-runs it. The retention sweep
+(app.store.retention) prunes claims that went cold after their verdict
+expired, and claims whose result was purged, so the table stays bounded.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import re
+import sqlite3
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.cache.base import Cache
+from app.cache.memory import MemoryBackend
+from app.cache.tier import get_shared_cache
+from app.deps import CHECK_MODES, get_settings
+from app.store import db
+
+HALF_LIFE_S = 3600.0  # request-rate decay; a claim's score is ~requests in the last hour or two
+PRUNE_SCORE = 0.01  # an uncached claim whose score decays below this is forgotten (~7 half-lives idle)
+PRUNE_BATCH = 500
+NEAR_ITEMS = 1024  # cached verdicts also kept per process
+FLUSH_EVERY = 64  # buffered requests written in one transaction
+FLUSH_INTERVAL_S = 5.0  # ... or at least this often while requests arrive
+_WORD_RE = re.compile(r"\w+")
+
+def claim_key(claim: str) -> str:
+    """Case, punctuation and spacing don't make a different claim."""
+    return " ".join(_WORD_RE.findall(claim.lower()))
+
+class VerdictCache:
+    """
+    Claim popularity in the SQLite file at `db_path`; cached results in
+    `store`, or a private `max_items` LRU without one.
+    """
+
+    def __init__(self, db_path: str, ttl_s: float, half_life_s: float = HALF_LIFE_S,
+                 clock: Callable[[], float] = time.time, store: Optional[Cache] = None,
+                 max_items: int = NEAR_ITEMS):
+        self.db_path = db_path
+        self.ttl_s = ttl_s
+        self.half_life_s = half_life_s
+        self.clock = clock
+        self.store = store if store is not None else Cache("verdicts", MemoryBackend(max_items=max_items))
+        self._db_ready = False
+        self._pending: Dict[str, List[Any]] = {}  # claim key -> [claim, requests not yet written]
+        self._pending_n = 0
+        self._flushed_at = clock()
+
+    def _conn(self) -> sqlite3.Connection:
+        c = sqlite3.connect(self.db_path, check_same_thread=False)
+        c.row_factory = sqlite3.Row
+        # the decayed rate score, so filters and ordering on it run in SQL
+        c.create_function("decayed", 3, self._decayed, deterministic=True)
+        if not self._db_ready:
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS claims (
+                claim_key TEXT PRIMARY KEY,
+                claim TEXT NOT NULL,
+                mode TEXT,
+                result_id TEXT,
+                computed_at REAL,
+                expires_at REAL,
+                score REAL NOT NULL DEFAULT 0,
+                score_at REAL NOT NULL,
+                requests INTEGER NOT NULL DEFAULT 0,
+                refreshes INTEGER NOT NULL DEFAULT 0,
+                refreshing_until REAL
+            )
+            """)
+            if "refreshing_until" not in {row["name"] for row in c.execute("PRAGMA table_info(claims)")}:
+                c.execute("ALTER TABLE claims ADD COLUMN refreshing_until REAL")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_claims_expires ON claims (expires_at)")
+            self._db_ready = True
+        return c
+
+    def _decayed(self, score: float, score_at: float, now: float) -> float:
+        return score * 0.5 ** (max(0.0, now - score_at) / self.half_life_s)
+
+    def count(self, claim: str) -> bool:
+        """Buffer one request for `claim` in memory; True once the buffer is due for flush()."""
+        key = claim_key(claim)
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = [claim, 1]
+        else:
+            pending[1] += 1
+        self._pending_n += 1
+        return self._pending_n >= FLUSH_EVERY or self.clock() - self._flushed_at >= FLUSH_INTERVAL_S
+
+    def flush(self) -> int:
+        """Write buffered request counts in one transaction. Returns claims updated."""
+        pending, self._pending = self._pending, {}
+        self._pending_n, self._flushed_at = 0, self.clock()
+        if not pending:
+            return 0
+        now = self._flushed_at
+        with self._conn() as c:
+            c.executemany("""
+            INSERT INTO claims (claim_key, claim, score, score_at, requests) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (claim_key) DO UPDATE SET score = decayed(score, score_at, excluded.score_at) + excluded.score,
+                score_at = excluded.score_at, requests = requests + excluded.requests
+            """, [(key, claim, float(n), now, n) for key, (claim, n) in pending.items()])
+        return len(pending)
+
+    def record_request(self, claim: str) -> None:
+        """Count one request for `claim` and write it (with anything buffered) now."""
+        self.count(claim)
+        self.flush()
+
+    def _served(self, entry: Optional[Dict[str, Any]], mode: str) -> Optional[Dict[str, Any]]:
+        # entry is {"result", "mode", "computed_at", "expires_at"}
+        now = self.clock()
+        if entry is None or entry["expires_at"] <= now:
+            return None
+        if CHECK_MODES.index(entry["mode"]) < CHECK_MODES.index(mode):
+            return None
+        result = dict(entry["result"])
+        result["cached"] = True
+        result["age_s"] = round(now - entry["computed_at"], 1)
+        return result
+
+    def lookup(self, claim: str, mode: str) -> Optional[Dict[str, Any]]:
+        """The cached result for `claim` if still fresh and from `mode` or a more thorough one."""
+        if self.ttl_s <= 0:
+            return None
+        return self._served(self.store.get(claim_key(claim)), mode)
+
+    async def alookup(self, claim: str, mode: str) -> Optional[Dict[str, Any]]:
+        """lookup(), staying off the event loop on a blocking tier."""
+        if self.ttl_s <= 0:
+            return None
+        return self._served(await self.store.aget(claim_key(claim)), mode)
+
+    def _entry(self, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.ttl_s <= 0 or result.get("degraded") or not result.get("id"):
+            return None
+        now = self.clock()
+        return {"result": result, "mode": result.get("mode", "balanced"), "computed_at": now, "expires_at": now + self.ttl_s}
+
+    def _track(self, claim: str, entry: Dict[str, Any], refreshed: bool) -> None:
+        """Point the claim's row at the cached result, for refresh scheduling and pruning."""
+        with self._conn() as c:
+            c.execute("""
+            INSERT INTO claims (claim_key, claim, mode, result_id, computed_at, expires_at, score_at, refreshes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (claim_key) DO UPDATE SET mode = excluded.mode, result_id = excluded.result_id,
+                computed_at = excluded.computed_at, expires_at = excluded.expires_at,
+                refreshes = refreshes + excluded.refreshes
+            """, (claim_key(claim), claim, entry["mode"], entry["result"]["id"], entry["computed_at"],
+                  entry["expires_at"], entry["computed_at"], int(refreshed)))
+
+    def remember(self, claim: str, result: Dict[str, Any], refreshed: bool = False) -> bool:
+        """Cache a saved, non-degraded result for the claim. False if the result isn't cacheable."""
+        entry = self._entry(result)
+        if entry is None:
+            return False
+        self.store.set(claim_key(claim), entry, ttl_s=self.ttl_s)
+        self._track(claim, entry, refreshed)
+        return True
+
+    async def aremember(self, claim: str, result: Dict[str, Any], refreshed: bool = False) -> bool:
+        """remember(), staying off the event loop."""
+        entry = self._entry(result)
+        if entry is None:
+            return False
+        await self.store.aset(claim_key(claim), entry, ttl_s=self.ttl_s)
+        await asyncio.to_thread(self._track, claim, entry, refreshed)
+        return True
+
+    def due(self, horizon_s: float, min_score: float, limit: int = 10) -> List[Tuple[str, str]]:
+        """(claim, mode) of hot, unleased claims whose verdict expires within `horizon_s` (or has), hottest first."""
+        now = self.clock()
+        with self._conn() as c:
+            rows = c.execute("""
+            SELECT claim, mode FROM claims
+            WHERE result_id IS NOT NULL AND expires_at <= :until AND decayed(score, score_at, :now) >= :min
+                AND (refreshing_until IS NULL OR refreshing_until <= :now)
+            ORDER BY decayed(score, score_at, :now) DESC LIMIT :limit
+            """, {"until": now + horizon_s, "now": now, "min": min_score, "limit": limit}).fetchall()
+        return [(r["claim"], r["mode"]) for r in rows]
+
+    def lease(self, claim: str, lease_s: float) -> bool:
+        """Claim `claim` for refreshing for `lease_s`; False if another worker holds it."""
+        now = self.clock()
+        with self._conn() as c:
+            return c.execute("""
+            UPDATE claims SET refreshing_until = ?
+            WHERE claim_key = ? AND (refreshing_until IS NULL OR refreshing_until <= ?)
+            """, (now + lease_s, claim_key(claim), now)).rowcount == 1
+
+    def release(self, claim: str, hold_s: float = 0.0) -> None:
+        """End a lease; with `hold_s`, keep every worker off the claim that much longer."""
+        until = self.clock() + hold_s if hold_s > 0 else None
+        with self._conn() as c:
+            c.execute("UPDATE claims SET refreshing_until = ? WHERE claim_key = ?", (until, claim_key(claim)))
+
+    def prune(self, floor: float = PRUNE_SCORE, batch: int = PRUNE_BATCH) -> int:
+        """
+        Forget claims that are not cached (never, or expired) and have gone
+        cold, and claims whose result no longer exists. Candidates are
+        collected by claim_key keyset, then deleted by key `batch` at a time.
+        Returns rows deleted.
+        """
+        where = """(
+            (expires_at IS NULL OR expires_at <= :now) AND decayed(score, score_at, :now) < :floor
+            OR result_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM results r WHERE r.id = claims.result_id)
+        )"""
+        params: Dict[str, Any] = {"now": self.clock(), "floor": floor}
+        deleted, after = 0, ""
+        while True:
+            with self._conn() as c:
+                keys = [r[0] for r in c.execute(
+                    f"SELECT claim_key FROM claims WHERE claim_key > :after AND {where} ORDER BY claim_key LIMIT :batch",
+                    {**params, "after": after, "batch": batch},
+                )]
+            if not keys:
+                break
+            with self._conn() as c:
+                deleted += c.execute(
+                    f"DELETE FROM claims WHERE claim_key IN (SELECT value FROM json_each(:keys)) AND {where}",
+                    {**params, "keys": json.dumps(keys)},
+                ).rowcount
+            for key in keys:
+                self.store.delete(key)  # expired anyway, or its result is gone
+            if len(keys) < batch:
+                break
+            after = keys[-1]
+        return deleted
+
+@lru_cache(maxsize=1)
+def get_verdict_cache() -> VerdictCache:
+    return VerdictCache(db.DB_PATH, get_settings().verdict_cache_ttl_s,
+                        store=get_shared_cache("verdicts", near_items=NEAR_ITEMS))
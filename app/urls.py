@@ -0,0 +1,154 @@
+# app/urls.py
+"""
+URL canonicalization and a persisted redirect map, so the same article
+reached through tracking links, AMP/mobile variants or redirects is
+deduplicated, cached and fetched once.
+
+- canonicalize(url): a fetchable canonical URL (lowercase host, no default
+  port, fragment or tracking params, sorted query, AMP/mobile mapped to the
+  canonical page)
+- url_key(url): canonical identity for comparisons and cache keys (also
+  ignores scheme, `www.` and a trailing slash)
+- RedirectMap: original -> final URL learned from fetches, with a TTL
+"""
+from __future__ import annotations
+import re
+import time
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.cache.base import Cache, LayeredBackend
+from app.cache.memory import MemoryBackend
+from app.cache.sqlite import SqliteBackend
+from app.cache.tier import get_shared_cache
+from app.deps import get_settings
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "ref", "ref_src", "ref_url", "referrer", "cmpid", "ocid",
+    "smid", "smtyp", "spm", "s_cid", "guccounter", "guce_referrer", "guce_referrer_sig",
+    "amp", "outputtype",  # AMP toggles
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "at_", "itm_")
+MOBILE_PREFIXES = ("m.", "mobile.", "amp.")
+_AMP_CACHE_RE = re.compile(r"^/(?:amp/)?(?:[cvi]/)*(?:s/)?(?P<rest>[^/]+\..+)$")
+_AMP_PATH_RE = re.compile(r"(?:/amp/?$|/amp(?=/)|\.amp(?=\.html?$)|\.amp$)", re.I)
+
+def _split_host(netloc: str, scheme: str) -> Tuple[str, str]:
+    host = netloc.rsplit("@", 1)[-1].lower()
+    port = ""
+    if host.count(":") == 1:
+        host, port = host.split(":")
+    if (scheme, port) in (("http", "80"), ("https", "443")):
+        port = ""
+    return host.rstrip("."), port
+
+def _unwrap_amp_cache(host: str, path: str) -> Optional[str]:
+    """https://www.google.com/amp/s/x.com/a or https://x-com.cdn.ampproject.org/c/s/x.com/a -> https://x.com/a"""
+    if host.endswith(".cdn.ampproject.org") or (host.startswith(("google.", "www.google.")) and path.startswith("/amp/")):
+        m = _AMP_CACHE_RE.match(path)
+        if m:
+            return "https://" + m.group("rest")
+    return None
+
+def canonicalize(url: str) -> str:
+    """Canonical, still fetchable form of `url`; unparseable input is returned unchanged."""
+    try:
+        p = urlsplit(url.strip())
+    except ValueError:
+        return url
+    scheme = p.scheme.lower()
+    if scheme not in ("http", "https") or not p.netloc:
+        return url
+    host, port = _split_host(p.netloc, scheme)
+    inner = _unwrap_amp_cache(host, p.path)
+    if inner is not None:
+        return canonicalize(inner)
+    for prefix in MOBILE_PREFIXES:
+        if host.startswith(prefix) and host.count(".") >= 2:
+            host = host[len(prefix):]
+            break
+    path = _AMP_PATH_RE.sub("", p.path) or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    netloc = f"{host}:{port}" if port else host
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+def url_key(url: str) -> str:
+    """Identity of a page: canonical URL without scheme, `www.` or trailing slash."""
+    p = urlsplit(canonicalize(str(url)))
+    if not p.netloc:
+        return str(url).rstrip("/")
+    host = p.netloc[4:] if p.netloc.startswith("www.") else p.netloc
+    path = p.path.rstrip("/")
+    return f"{host}{path}?{p.query}" if p.query else f"{host}{path}"
+
+def site_of(url: str) -> str:
+    """Registrable-ish host for per-site dedupe (canonical host minus `www.`)."""
+    host = urlsplit(canonicalize(str(url))).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+class RedirectMap:
+    """
+    canonical original URL -> canonical final URL, in the "redirects"
+    namespace of the cache tier (app.cache). Without `store`, a `max_items`
+    LRU, backed by a private SQLite file when `db_path` is given.
+    """
+
+    def __init__(self, ttl_s: float, db_path: Optional[str] = None, max_items: int = 4096,
+                 store: Optional[Cache] = None):
+        self.ttl_s = ttl_s
+        if store is None:
+            near = MemoryBackend(max_items=max_items)
+            store = Cache("redirects", LayeredBackend(near, SqliteBackend(db_path)) if db_path else near)
+        self.store = store
+
+    def _final(self, src: str, hit: Optional[List[Any]]) -> str:
+        # hit is [dst, stored_at]
+        if hit is None or time.time() - hit[1] >= self.ttl_s:
+            return src
+        return hit[0]
+
+    def resolve(self, url: str) -> str:
+        """The known final URL for `url` (canonicalized), or its canonical form."""
+        src = canonicalize(url)
+        if self.ttl_s <= 0:
+            return src
+        return self._final(src, self.store.get(src))
+
+    async def aresolve_many(self, urls: Sequence[str]) -> List[str]:
+        """resolve() for each of `urls`, in one lookup that stays off the event loop."""
+        srcs = [canonicalize(u) for u in urls]
+        if self.ttl_s <= 0 or not srcs:
+            return srcs
+        return [self._final(src, hit) for src, hit in zip(srcs, await self.store.aget_many(srcs))]
+
+    async def aresolve(self, url: str) -> str:
+        return (await self.aresolve_many([url]))[0]
+
+    def _entry(self, url: str, final_url: str) -> Optional[Tuple[str, List[Any]]]:
+        src, dst = canonicalize(url), canonicalize(final_url)
+        if self.ttl_s <= 0 or src == dst:
+            return None
+        return src, [dst, time.time()]
+
+    def record(self, url: str, final_url: str) -> None:
+        entry = self._entry(url, final_url)
+        if entry is not None:
+            self.store.set(*entry, ttl_s=self.ttl_s)
+
+    async def arecord(self, url: str, final_url: str) -> None:
+        entry = self._entry(url, final_url)
+        if entry is not None:
+            await self.store.aset(*entry, ttl_s=self.ttl_s)
+
+    async def aforget(self, url: str) -> None:
+        """Drop a learned redirect that no longer works."""
+        await self.store.adelete(canonicalize(url))
+
+@lru_cache(maxsize=1)
+def get_redirects() -> RedirectMap:
+    return RedirectMap(ttl_s=get_settings().redirect_ttl_s, store=get_shared_cache("redirects", near_items=4096))
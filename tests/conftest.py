@@ -0,0 +1,12 @@
+"""Fixtures shared across test modules."""
+import pytest
+
+from app.store import db
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A throwaway results database; app.store.db points at it for the test."""
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "results.db"))
+    db.init_db()
+    return db
@@ -0,0 +1,103 @@
+"""Tests for admission control and rate limiting."""
+import asyncio
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from app.logic.admission import Budget, Governor, RateLimiter, Rejected, TokenBucket
+
+
+def test_token_bucket_refills():
+    """Test that a bucket drains to empty and refills with time."""
+    b = TokenBucket(rate_per_s=1.0, burst=2, now=0.0)
+    assert b.take(0.0) == 0.0
+    assert b.take(0.0) == 0.0
+    wait = b.take(0.0)
+    assert 0.9 < wait <= 1.0
+    assert b.take(1.0) == 0.0
+
+
+def test_rate_limiter_is_per_client():
+    """Test that one client exhausting its bucket does not affect another."""
+    rl = RateLimiter(rate_per_min=1, burst=2)
+    rl.check("a")
+    rl.check("a")
+    with pytest.raises(Rejected) as exc:
+        rl.check("a")
+    assert exc.value.status == 429
+    assert exc.value.retry_after >= 1
+    rl.check("b")
+
+
+def test_rate_limiter_caps_tracked_clients():
+    """Test that the bucket table stays bounded."""
+    rl = RateLimiter(rate_per_min=60, burst=1, max_clients=3)
+    for i in range(10):
+        rl.check(f"c{i}")
+    assert len(rl._buckets) == 3
+
+
+@pytest.mark.asyncio
+async def test_governor_queue_full_rejects_fast():
+    """Test that requests beyond in-flight + queue capacity get 503."""
+    gov = Governor(max_inflight=1, max_queue=1, queue_timeout=5.0)
+    await gov.acquire()
+    waiter = asyncio.create_task(gov.acquire())
+    await asyncio.sleep(0)
+    assert gov.waiting == 1
+    with pytest.raises(Rejected) as exc:
+        await gov.acquire()
+    assert exc.value.status == 503
+    gov.release()
+    await waiter
+    assert gov.inflight == 1
+    gov.release()
+    assert gov.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_governor_queue_deadline():
+    """Test that queued requests give up after the queue timeout."""
+    gov = Governor(max_inflight=1, max_queue=4, queue_timeout=0.05)
+    await gov.acquire()
+    with pytest.raises(Rejected) as exc:
+        await gov.acquire()
+    assert exc.value.status == 503
+    assert gov.waiting == 0
+    gov.release()
+    assert gov.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_governor_caps_concurrency():
+    """Test that no more than max_inflight slots run at once."""
+    gov = Governor(max_inflight=2, max_queue=10, queue_timeout=5.0)
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        async with gov.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(job() for _ in range(8)))
+    assert peak == 2
+    assert gov.inflight == 0
+
+
+def test_debug_endpoint_returns_retry_after():
+    """Test that shed requests get 429 with a Retry-After header."""
+    from app.main import app
+
+    budget = Budget(Governor(1, 0, 1.0), RateLimiter(rate_per_min=1, burst=1))
+    with patch("app.main.get_debug_budget", return_value=budget), \
+         patch("app.nlp.nli.score_one", return_value={"entail": 1.0, "contradict": 0.0, "neutral": 0.0}):
+        client = TestClient(app)
+        params = {"text": "Paris is in France.", "claim": "Paris is in France."}
+        assert client.get("/_nli", params=params).status_code == 200
+        response = client.get("/_nli", params=params)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,82 @@
+"""Tests for bulk NDJSON export and import of stored results."""
+import gzip
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.codec import dumps, loads
+from app.main import app
+from app.store import bulk, db
+
+
+def _seed(path, n):
+    """n results spread over January 2024, every third one False."""
+    with sqlite3.connect(path) as c:
+        c.executemany(
+            "INSERT INTO results (id, result_json, created_at) VALUES (?, ?, ?)",
+            [
+                (f"r{i:03d}", dumps({"id": f"r{i:03d}", "claim": f"claim {i}", "verdict": "False" if i % 3 == 0 else "True"}),
+                 f"2024-01-{1 + i % 28:02d}T00:00:00+00:00")
+                for i in range(n)
+            ],
+        )
+
+
+def _lines(chunks):
+    return [loads(line) for chunk in chunks for line in chunk.splitlines()]
+
+
+def test_export_pages_in_keyset_order_with_filters(store):
+    """Test that small batches still export every row once, in (created_at, id) order, honouring filters."""
+    _seed(store.DB_PATH, 50)
+    rows = _lines(bulk.iter_export(batch=7))
+    assert len(rows) == 50
+    assert [(r["created_at"], r["id"]) for r in rows] == sorted((r["created_at"], r["id"]) for r in rows)
+    assert rows[0]["result"]["claim"] == "claim 0"
+    window = _lines(bulk.iter_export(since="2024-01-10", until="2024-01-20", verdict="False", batch=3))
+    assert window and all(r["result"]["verdict"] == "False" for r in window)
+    assert all("2024-01-10" <= r["created_at"] < "2024-01-20" for r in window)
+    with pytest.raises(ValueError):
+        list(bulk.iter_export(since="last tuesday"))
+
+
+def test_gzip_round_trip_import(store, tmp_path, monkeypatch):
+    """Test that a gzipped export imports into an empty store, and re-importing skips existing ids."""
+    _seed(store.DB_PATH, 20)
+    blob = b"".join(bulk.gzip_chunks(bulk.iter_export(batch=6)))
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "copy.db"))
+    db.init_db()
+    lines = gzip.decompress(blob).splitlines()
+    assert bulk.import_results(lines, batch=8) == (20, 0)
+    assert db.load_result("r007")["claim"] == "claim 7"
+    assert db.search_results("claim")["items"]  # imported rows are indexed
+    assert bulk.import_results(lines[:5]) == (0, 5)
+    edited = loads(lines[0])
+    edited["result"]["claim"] = "edited"
+    assert bulk.import_results([dumps(edited)], replace=True) == (1, 0)
+    assert db.load_result(edited["id"])["claim"] == "edited"
+    with pytest.raises(ValueError, match="line 2"):
+        bulk.import_results([lines[1], b"{not json"])
+
+
+def test_cli_export_import(store, tmp_path, monkeypatch, capsys):
+    """Test the export and import commands through a .gz file."""
+    _seed(store.DB_PATH, 5)
+    out = str(tmp_path / "results.ndjson.gz")
+    bulk.main(["export", "--out", out, "--verdict", "True"])
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "copy.db"))
+    bulk.main(["import", out])
+    assert "imported 3 results" in capsys.readouterr().err
+
+
+def test_export_endpoint_streams_ndjson(store):
+    """Test /results/export as plain and gzipped NDJSON, and its date validation."""
+    _seed(store.DB_PATH, 4)
+    client = TestClient(app)
+    r = client.get("/results/export")
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert len(r.text.splitlines()) == 4
+    r = client.get("/results/export", params={"gzip": "true", "verdict": "False"})
+    assert len(gzip.decompress(r.content).splitlines()) == 2
+    assert client.get("/results/export", params={"since": "soon"}).status_code == 400
@@ -0,0 +1,193 @@
+"""Tests for the cache tier: memory, SQLite and Redis-protocol backends."""
+import fnmatch
+import socketserver
+import threading
+import time
+
+import pytest
+
+from app.cache.base import Backend, Cache, LayeredBackend
+from app.cache.memory import MemoryBackend
+from app.cache.resp import RespBackend, encode_command, read_reply
+from app.cache.sqlite import SqliteBackend
+from app.metrics import get_metrics
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metrics():
+    get_metrics().reset()
+    yield
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Just enough of a Redis server for RespBackend."""
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            try:
+                cmd = read_reply(self.rfile)
+            except ConnectionError:
+                return
+            name, args = cmd[0].upper(), cmd[1:]
+            now = time.monotonic()
+            live = lambda k: k in data and (data[k][1] is None or data[k][1] > now)  # noqa: E731
+            if name in (b"PING", b"SELECT"):
+                out = b"+OK\r\n"
+            elif name == b"MGET":
+                out = b"*%d\r\n" % len(args) + b"".join(
+                    b"$%d\r\n%s\r\n" % (len(data[k][0]), data[k][0]) if live(k) else b"$-1\r\n" for k in args
+                )
+            elif name == b"SET":
+                expires = now + int(args[3]) / 1000 if len(args) > 2 else None
+                data[args[0]] = (args[1], expires)
+                out = b"+OK\r\n"
+            elif name == b"DEL":
+                out = b":%d\r\n" % sum(data.pop(k, None) is not None for k in args)
+            elif name == b"SCAN":
+                keys = [k for k in data if live(k) and fnmatch.fnmatchcase(k.decode(), args[2].decode())]
+                out = b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys) + b"".join(b"$%d\r\n%s\r\n" % (len(k), k) for k in keys)
+            elif name == b"STRLEN":
+                out = b":%d\r\n" % (len(data[args[0]][0]) if live(args[0]) else 0)
+            else:
+                out = b"-ERR unknown command\r\n"
+            self.wfile.write(out)
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.data = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_memory_backend_evicts_lru_by_count_and_bytes():
+    """Test that the memory backend drops least recently used entries over its caps and expires by TTL."""
+    now = [0.0]
+    mem = MemoryBackend(max_items=2, max_bytes=10, clock=lambda: now[0])
+    mem.set("a", b"1234")
+    mem.set("b", b"5678")
+    assert mem.get("a") == b"1234"  # a is now most recent
+    mem.set("c", b"9")
+    assert mem.get("b") is None and mem.get("a") == b"1234"
+    mem.set("d", b"abcdefgh")
+    assert mem.nbytes <= 10 and mem.get("d") == b"abcdefgh"
+    mem.set("t", b"x", ttl_s=5)
+    now[0] = 6.0
+    assert mem.get("t") is None
+    assert mem.usage("d") == (1, 8)
+
+
+def test_sqlite_backend_is_shared_across_instances(tmp_path):
+    """Test that two backends on one file (as two workers would be) see each other's writes."""
+    path = str(tmp_path / "cache.db")
+    one, two = SqliteBackend(path), SqliteBackend(path)
+    one.set_many([("search:q", b"results"), ("pages:u", b"paragraphs")])
+    two.set("gone:x", b"1", ttl_s=-1)
+    assert two.get_many(["search:q", "pages:u", "gone:x", "nope"]) == [b"results", b"paragraphs", None, None]
+    assert two.usage("search:") == (1, 7)
+    assert one.clear("pages:") == 1
+    assert two.get("pages:u") is None
+
+
+def test_sqlite_sweep_trims_oldest_over_cap(tmp_path):
+    """Test that a sweep drops expired rows and then the oldest ones past max_bytes."""
+    backend = SqliteBackend(str(tmp_path / "cache.db"), max_bytes=100)
+    backend.set("x:expired", b"e", ttl_s=-1)
+    for i in range(10):
+        backend.set(f"x:{i}", b"v" * 20)
+    assert backend.sweep() >= 6
+    entries, nbytes = backend.usage("x:")
+    assert nbytes <= 90
+    assert backend.get("x:9") is not None and backend.get("x:0") is None
+
+
+def test_resp_backend_round_trip(resp_server):
+    """Test get/set/TTL/clear/usage against a Redis-protocol server."""
+    backend = RespBackend(f"redis://127.0.0.1:{resp_server.server_address[1]}/1")
+    backend.set_many([("search:a", b"one"), ("search:b", b"two"), ("pages:c", b"three")])
+    backend.set("search:t", b"short", ttl_s=0.05)
+    assert backend.get_many(["search:a", "search:b", "missing"]) == [b"one", b"two", None]
+    time.sleep(0.1)
+    assert backend.get("search:t") is None
+    assert backend.usage("search:") == (2, 6)
+    assert backend.clear("search:") == 2
+    assert backend.get("search:a") is None and backend.get("pages:c") == b"three"
+    backend.close()
+
+
+def test_resp_backend_down_server_is_a_miss():
+    """Test that an unreachable server turns lookups into misses and is not retried on every call."""
+    backend = RespBackend("redis://127.0.0.1:1/0", timeout_s=0.2)
+    backend.set("k", b"v")
+    assert backend.get("k") is None
+    assert backend.usage("") == (0, 0)
+    assert get_metrics().snapshot()["counters"]["cache.backend_error"] == 1
+
+
+def test_encode_command_frames_bulk_strings():
+    """Test the RESP request framing."""
+    assert encode_command("SET", "k", b"v\r\n") == b"*3\r\n$3\r\nSET\r\n$1\r\nk\r\n$3\r\nv\r\n\r\n"
+
+
+def test_cache_namespaces_and_stats():
+    """Test that namespaces share a backend without colliding and report their hit rate."""
+    backend = MemoryBackend()
+    search, pages = Cache("search", backend), Cache("pages", backend, ttl_s=60)
+    search.set("k", {"items": [1, 2]})
+    pages.set("k", ["para"])
+    assert search.get("k") == {"items": [1, 2]} and pages.get("k") == ["para"]
+    assert search.get("other") is None
+    pages.set("off", ["x"], ttl_s=0)  # ttl <= 0 stores nothing
+    assert pages.get("off") is None
+    stats = search.stats()
+    assert stats["entries"] == 1 and stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+    assert pages.clear() == 1 and search.get("k") is not None
+
+
+def test_layered_backend_fills_near_from_far(tmp_path):
+    """Test that a near miss is served from the shared backend and then kept near."""
+    far = SqliteBackend(str(tmp_path / "cache.db"))
+    far.set("search:q", b"shared")
+    near = MemoryBackend(max_items=8)
+    layered = LayeredBackend(near, far, near_ttl_s=60)
+    assert layered.get("search:q") == b"shared"
+    assert near.get("search:q") == b"shared"
+    layered.set("search:w", b"both", ttl_s=10)
+    assert near.get("search:w") == b"both" and far.get("search:w") == b"both"
+
+
+def test_backend_is_abstract():
+    """Test that a backend missing part of the interface cannot be instantiated."""
+    class GetOnly(Backend):
+        def get_many(self, keys):
+            return [None] * len(keys)
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+@pytest.mark.asyncio
+async def test_async_calls_leave_the_loop_only_for_blocking_backends(tmp_path):
+    """Test that aget/aset run SQLite work in a worker thread and memory work inline."""
+    loop_thread = threading.get_ident()
+    seen = []
+
+    class Spy(SqliteBackend):
+        def get_many(self, keys):
+            seen.append(threading.get_ident())
+            return super().get_many(keys)
+
+    far = Spy(str(tmp_path / "c.db"))
+    await Cache("t", far).aset("k", {"v": 1})
+    layered = Cache("t", LayeredBackend(MemoryBackend(), far))
+    assert layered.backend.blocking
+    assert await layered.aget("k") == {"v": 1}  # near miss, read from SQLite
+    assert seen and loop_thread not in seen
+    local = Cache("t", MemoryBackend())
+    await local.aset("k", [1])
+    assert await local.aget_many(["k", "nope"]) == [[1], None]
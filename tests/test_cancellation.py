@@ -0,0 +1,112 @@
+"""Tests for cancelling work when the client disconnects."""
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+
+from app import main
+from app.deps import Settings
+from app.metrics import get_metrics
+from app.nlp import verdict
+from app.records import Hit
+
+
+class _FakeRequest:
+    """Reports a disconnect from the `gone_after`-th poll on."""
+
+    def __init__(self, gone_after: int):
+        self.gone_after = gone_after
+        self.polls = 0
+
+    async def is_disconnected(self) -> bool:
+        self.polls += 1
+        return self.polls >= self.gone_after
+
+
+def test_make_verdict_drops_batches_once_cancelled():
+    """Test that a set cancel event stops make_verdict before any NLI batch."""
+    sources = [Hit(title="t", url="https://a.com", evidence=["a premise that is comfortably long enough to reach the NLI model"], sims=[0.9])]
+    cancel = threading.Event()
+    cancel.set()
+    with patch.object(verdict, "score_many") as score_many:
+        with pytest.raises(verdict.VerdictCancelled):
+            verdict.make_verdict("A claim.", sources, cancel=cancel)
+    score_many.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_cancels_inflight_fetches():
+    """Test that cancelling evidence fetching cancels the page downloads."""
+    from app.logic.selector import _fetch_all
+
+    started, cancelled = asyncio.Event(), []
+
+    async def slow(url, snippet, deadline=None, timeout=None):
+        started.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        return ["never"]
+
+    sources = [Hit(title="a", url="https://a.com/x"), Hit(title="b", url="https://b.com/y")]
+    with patch("app.logic.selector.get_paragraphs_with_fallback", slow):
+        task = asyncio.ensure_future(_fetch_all(sources, None))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    assert sorted(cancelled) == ["https://a.com/x", "https://b.com/y"]
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_pipeline():
+    """Test that a disconnected client's pipeline is cancelled and not awaited to the end."""
+    get_metrics().reset()
+    finished, cancelled = [], []
+
+    async def pipeline():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        finished.append(True)
+        return {"id": "x"}
+
+    with patch.object(main, "DISCONNECT_POLL_S", 0.01):
+        result = await main._unless_disconnected(_FakeRequest(gone_after=2), pipeline())
+    assert result is None
+    assert cancelled and not finished
+    assert get_metrics().snapshot()["counters"]["pipeline.cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_connected_client_gets_result():
+    """Test that the result is returned when the client stays connected."""
+    async def pipeline():
+        await asyncio.sleep(0.03)
+        return {"id": "x"}
+
+    with patch.object(main, "DISCONNECT_POLL_S", 0.01):
+        assert await main._unless_disconnected(_FakeRequest(gone_after=10**6), pipeline()) == {"id": "x"}
+
+
+@pytest.mark.asyncio
+async def test_abandoned_run_finishes_when_persisting():
+    """Test that PERSIST_ABANDONED_RESULTS lets an abandoned run complete in the background."""
+    done = asyncio.Event()
+
+    async def pipeline():
+        await asyncio.sleep(0.05)
+        done.set()
+        return {"id": "x"}
+
+    with patch.object(main, "DISCONNECT_POLL_S", 0.01), \
+         patch.object(main, "get_settings", return_value=Settings(persist_abandoned=True)):
+        result = await main._unless_disconnected(_FakeRequest(gone_after=1), pipeline())
+    assert result is None
+    await asyncio.wait_for(done.wait(), 1.0)
+    await asyncio.sleep(0)
+    assert not main._abandoned
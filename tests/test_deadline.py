@@ -0,0 +1,106 @@
+"""Tests for request deadline propagation."""
+import asyncio
+import math
+import time
+import pytest
+from unittest.mock import patch
+
+from app.logic.deadline import Deadline
+from app.records import Hit
+from app.schemas import Source
+
+
+def test_unbounded_deadline():
+    """Test that a missing budget never expires and passes caps through."""
+    d = Deadline(None)
+    assert not d.bounded
+    assert d.remaining() == math.inf
+    assert d.timeout(10.0, share=0.5) == 10.0
+    assert not d.expired()
+
+
+def test_bounded_deadline_shares():
+    """Test that stage timeouts are capped by the remaining budget share."""
+    d = Deadline(2.0)
+    assert d.bounded
+    assert d.timeout(10.0, share=0.5) <= 1.0
+    assert d.timeout(0.2) == 0.2
+    d.mark_degraded("fetch")
+    d.mark_degraded("fetch")
+    assert d.degraded and d.reasons == ["fetch"]
+
+
+def test_expired_deadline():
+    """Test that an elapsed budget reports zero time left."""
+    d = Deadline(0.01)
+    time.sleep(0.02)
+    assert d.expired()
+    assert d.timeout(10.0) == 0.0
+
+
+def test_provider_timeout_takes_a_budget_share_with_a_floor():
+    """Test that search providers share one budget-derived timeout rule."""
+    from app.search.base import MIN_TIMEOUT_S, TIMEOUT_S, provider_timeout
+    assert provider_timeout(None) == TIMEOUT_S
+    assert provider_timeout(Deadline(None)) == TIMEOUT_S
+    assert provider_timeout(Deadline(2.0)) <= 0.8
+    assert provider_timeout(Deadline(0.01)) == MIN_TIMEOUT_S
+
+
+@pytest.mark.asyncio
+async def test_fetch_stage_cut_short_falls_back_to_snippets():
+    """Test that slow fetches are abandoned at the deadline and snippets are used."""
+    from app.logic.selector import _fetch_all
+
+    async def slow(url, snippet, deadline=None, timeout=None):
+        await asyncio.sleep(5)
+        return ["never"]
+
+    sources = [Hit(title="a", url="https://a.com/x", snippet="snippet a")]
+    deadline = Deadline(0.2)
+    with patch("app.logic.selector.get_paragraphs_with_fallback", slow):
+        started = time.monotonic()
+        paras = await _fetch_all(sources, deadline)
+    assert time.monotonic() - started < 1.0
+    assert paras == [["snippet a"]]
+    assert deadline.degraded
+
+
+@pytest.mark.asyncio
+async def test_fetch_errors_fall_back_to_snippets():
+    """Test that one failing fetch does not sink the others."""
+    from app.logic.selector import _fetch_all
+
+    async def flaky(url, snippet, deadline=None, timeout=None):
+        if "bad" in url:
+            raise RuntimeError("boom")
+        return ["ok paragraph"]
+
+    sources = [
+        Hit(title="a", url="https://good.com/x", snippet="s1"),
+        Hit(title="b", url="https://bad.com/x", snippet="s2"),
+    ]
+    with patch("app.logic.selector.get_paragraphs_with_fallback", flaky):
+        paras = await _fetch_all(sources, None)
+    assert paras == [["ok paragraph"], ["s2"]]
+
+
+def test_verdict_scores_fewer_premises_when_budget_is_short():
+    """Test that NLI work is trimmed to the budget and flagged as degraded."""
+    from app.nlp import verdict
+
+    calls = []
+
+    def fake_score_many(premises, claim, batch_size=8):
+        calls.append(len(premises))
+        return [{"entail": 0.9, "contradict": 0.05, "neutral": 0.05} for _ in premises]
+
+    ev = "This is a sufficiently long premise about the claim under test here."
+    sources = [Source(title="t", url=f"https://s{i}.com", evidence=[ev, ev]) for i in range(10)]
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    with patch.object(verdict, "score_many", fake_score_many):
+        label, conf, _, _ = verdict.make_verdict("A claim.", sources, deadline=deadline)
+    assert sum(calls) == verdict.MIN_PREMISES
+    assert deadline.degraded
+    assert label == "True"
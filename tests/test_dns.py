@@ -0,0 +1,153 @@
+"""Tests for the fetcher's DNS cache, connection pre-warming and metrics."""
+import asyncio
+import socket
+from unittest.mock import patch
+
+import pytest
+
+from app.fetch import fetcher
+from app.fetch.dns import CachingBackend, DnsCache
+from app.metrics import get_metrics
+
+PAGE = b"<html><body>" + b"<p>" + b"Cached resolvers keep popular hosts warm. " * 10 + b"</p></body></html>"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metrics():
+    get_metrics().reset()
+    yield
+
+
+def _fake_query(table, calls):
+    async def query(self, host):
+        calls.append(host)
+        await asyncio.sleep(0.01)
+        if host not in table:
+            raise socket.gaierror("unknown host")
+        return table[host], None
+    return query
+
+
+@pytest.mark.asyncio
+async def test_positive_and_negative_answers_are_cached():
+    """Test that repeat lookups hit the cache, including failures."""
+    calls = []
+    dns = DnsCache(ttl_s=60, negative_ttl_s=60)
+    with patch.object(DnsCache, "_query", _fake_query({"a.test": ["10.0.0.1"]}, calls)):
+        assert await dns.resolve("a.test") == ["10.0.0.1"]
+        assert await dns.resolve("a.test") == ["10.0.0.1"]
+        for _ in range(2):
+            with pytest.raises(socket.gaierror):
+                await dns.resolve("missing.test")
+        assert await dns.resolve("127.0.0.1") == ["127.0.0.1"]
+    assert calls == ["a.test", "missing.test"]
+    counters = get_metrics().snapshot()["counters"]
+    assert counters["dns.hit"] == 1 and counters["dns.negative_hit"] == 1
+    assert get_metrics().snapshot()["timers"]["dns.lookup"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_query():
+    """Test single-flight resolution for a cold host."""
+    calls = []
+    dns = DnsCache()
+    with patch.object(DnsCache, "_query", _fake_query({"b.test": ["10.0.0.2"]}, calls)):
+        results = await asyncio.gather(*(dns.resolve("b.test") for _ in range(5)))
+    assert calls == ["b.test"]
+    assert all(r == ["10.0.0.2"] for r in results)
+
+
+async def _http_server():
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: %d\r\n\r\n" % len(PAGE) + PAGE)
+        await writer.drain()
+        writer.close()
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_prewarmed_connection_is_used_by_fetch(tmp_path):
+    """Test that fetch_html resolves via the cache and picks up the warm connection."""
+    from app.urls import RedirectMap
+
+    server, port = await _http_server()
+    calls = []
+    dns = DnsCache()
+    with patch.object(DnsCache, "_query", _fake_query({"news.test": ["127.0.0.1"]}, calls)), \
+         patch.object(fetcher, "get_dns_cache", return_value=dns), \
+         patch.object(fetcher, "get_redirects", return_value=RedirectMap(0, None)):
+        try:
+            url = f"http://news.test:{port}/story"
+            assert await fetcher.prewarm([url, url + "?utm_source=x"]) == 1
+            await asyncio.sleep(0.05)
+            html = await fetcher.fetch_html(url)
+        finally:
+            await fetcher.close_fetch_clients()
+            server.close()
+    assert "Cached resolvers" in html
+    assert calls == ["news.test"]
+    snap = get_metrics().snapshot()
+    assert snap["counters"]["fetch.warm_connection_used"] == 1
+    assert snap["timers"]["fetch.prewarm_connect"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dns_failure_surfaces_as_connect_error():
+    """Test that a cached NXDOMAIN becomes an httpcore ConnectError."""
+    import httpcore
+
+    dns = DnsCache()
+    backend = CachingBackend(dns, ssl_context=None)
+    with patch.object(DnsCache, "_query", _fake_query({}, [])):
+        with pytest.raises(httpcore.ConnectError):
+            await backend.connect_tcp("nowhere.test", 443)
+
+
+@pytest.mark.asyncio
+async def test_fetch_errors_are_httpx_errors():
+    """Test that the pool transport raises httpx exceptions, so callers never see httpcore ones."""
+    import httpx
+
+    dns = DnsCache()
+    with patch.object(DnsCache, "_query", _fake_query({}, [])), \
+         patch.object(fetcher, "get_dns_cache", return_value=dns):
+        try:
+            with pytest.raises(httpx.ConnectError):
+                await fetcher.get_fetch_client().get("http://nowhere.test/")
+        finally:
+            await fetcher.close_fetch_clients()
+
+
+@pytest.mark.asyncio
+async def test_proxy_environment_uses_stock_transport(monkeypatch):
+    """Test that HTTPS_PROXY keeps working: no custom transport, and nothing to pre-warm."""
+    monkeypatch.setenv("HTTPS_PROXY", "http://proxy.test:3128")
+    try:
+        assert fetcher._shared()[1] is None  # httpx's own transport, which honours the proxy
+        assert await fetcher.prewarm(["https://a.test/x"]) == 0
+    finally:
+        await fetcher.close_fetch_clients()
+
+
+@pytest.mark.asyncio
+async def test_stale_parked_streams_are_reaped_on_warm():
+    """Test that every warm() closes streams parked past WARM_TTL_S, for any host."""
+    from app.fetch import dns as dns_mod
+
+    class _Stream:
+        closed = False
+
+        async def aclose(self):
+            self.closed = True
+
+    backend = CachingBackend(DnsCache(), ssl_context=None)
+    old, fresh = _Stream(), _Stream()
+    now = dns_mod.time.monotonic()
+    backend._parked = {("old.test", 443): [(now - dns_mod.WARM_TTL_S - 1, old)],
+                       ("fresh.test", 443): [(now, fresh)]}
+    backend.warm("fresh.test", 443, tls=True)
+    await asyncio.sleep(0)
+    assert old.closed and not fresh.closed
+    assert list(backend._parked) == [("fresh.test", 443)]
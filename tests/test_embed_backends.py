@@ -0,0 +1,78 @@
+"""Tests for embedding backends and compact vector storage."""
+import numpy as np
+import pytest
+
+from app.nlp import vectors
+from app.nlp.bench_embed import synthetic_texts, top1_agreement
+
+
+def _unit_rows(n=200, dim=384, seed=0):
+    v = np.random.default_rng(seed).normal(size=(n, dim)).astype("float32")
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("dtype,tol", [("float32", 1e-6), ("float16", 2e-3), ("int8", 2e-2)])
+def test_quantized_dot_tracks_float32(dtype, tol):
+    """Test that similarities from compact storage stay close to float32."""
+    vecs, q = _unit_rows(), _unit_rows(1, seed=1)[0]
+    stored, scales = vectors.quantize(vecs, dtype)
+    assert stored.dtype == np.dtype(dtype)
+    assert np.abs(vectors.dot(stored, scales, q, chunk=37) - vecs @ q).max() < tol
+    assert np.abs(vectors.dequantize(stored, scales) - vecs).max() < tol
+
+
+def test_save_load_round_trip(tmp_path):
+    """Test that int8 scales persist next to the matrix and are dropped on rebuild."""
+    path = str(tmp_path / "vectors.npy")
+    vecs = _unit_rows(10)
+    vectors.save(path, vecs, "int8")
+    stored, scales = vectors.load(path)
+    assert isinstance(stored, np.memmap) and scales.shape == (10,)
+    vectors.save(path, vecs, "float16")
+    stored, scales = vectors.load(path)
+    assert stored.dtype == np.float16 and scales is None
+    assert not (tmp_path / "vectors.scales.npy").exists()
+
+
+@pytest.mark.parametrize("backend", ["int8", "onnx"])
+def test_backend_ranking_parity(backend):
+    """Test that optimized backends rank documents like the torch reference."""
+    from app.nlp.embed import MODEL_NAME
+    from app.nlp.embed_backends import OnnxBackend, TorchBackend, load_backend
+
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+    try:
+        ref = TorchBackend(MODEL_NAME)
+        other = load_backend(backend, MODEL_NAME)
+    except Exception as e:  # no weights offline
+        pytest.skip(f"model unavailable: {e}")
+    if backend == "onnx":
+        assert isinstance(other, OnnxBackend)
+    docs, queries = synthetic_texts(64), synthetic_texts(32, words=8, seed=1)
+    d_ref, d_other = ref.encode(docs), other.encode(docs)
+    assert np.mean(np.sum(d_ref * d_other, axis=1)) > 0.98
+    assert top1_agreement(d_ref, d_other, ref.encode(queries), other.encode(queries)) >= 0.9
+
+
+def test_onnx_load_failure_falls_back_to_torch():
+    """Test that any ONNX load error (not just a missing package) warns and falls back to torch."""
+    from unittest.mock import patch
+
+    from app.nlp import embed_backends
+
+    class FakeTorch(embed_backends.EmbedBackend):
+        name = "torch"
+
+        def encode(self, texts):
+            return np.zeros((len(texts), 384), dtype="float32")
+
+    def broken(*args, **kwargs):
+        raise FileNotFoundError("onnx/model.onnx not in repo")
+
+    with patch.object(embed_backends, "OnnxBackend", broken), patch.object(embed_backends, "TorchBackend", FakeTorch):
+        with pytest.warns(RuntimeWarning, match="using torch"):
+            backend = embed_backends.load_backend("onnx", "some/model")
+    assert backend.name == "torch"
+    with pytest.raises(TypeError):
+        embed_backends.EmbedBackend("some/model")  # abstract
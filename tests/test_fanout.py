@@ -0,0 +1,78 @@
+"""Tests for multi-provider fan-out and rank fusion."""
+import asyncio
+import time
+import pytest
+
+from app.schemas import Source
+from app.search.fanout import fanout, fanout_raw, rrf_merge
+
+
+def _src(url):
+    return Source(title=url, url=url)
+
+
+def _provider(urls, delay=0.0, fail=False):
+    async def search(query, deadline=None):
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("provider down")
+        return [_src(u) for u in urls]
+    return search
+
+
+def test_rrf_merge_rewards_agreement():
+    """Test that items ranked by several providers rise to the top."""
+    a = [_src("https://a.com/1"), _src("https://b.com/1"), _src("https://c.com/1")]
+    b = [_src("https://b.com/1/"), _src("https://c.com/1")]
+    merged = rrf_merge([a, b])
+    urls = [str(s.url).rstrip("/") for s in merged]
+    assert urls[0] == "https://b.com/1"
+    assert urls[1] == "https://c.com/1"
+    assert len(merged) == 3
+
+
+@pytest.mark.asyncio
+async def test_fanout_returns_after_first_n():
+    """Test that fan-out does not wait for a slow provider once enough answered."""
+    providers = {
+        "fast1": _provider(["https://a.com/1"]),
+        "fast2": _provider(["https://b.com/1"]),
+        "slow": _provider(["https://c.com/1"], delay=5),
+    }
+    started = time.monotonic()
+    merged = await fanout_raw(providers, "q", first_n=2, hedge_s=5)
+    assert time.monotonic() - started < 1
+    assert {str(s.url) for s in merged} == {"https://a.com/1", "https://b.com/1"}
+
+
+@pytest.mark.asyncio
+async def test_fanout_hedge_deadline():
+    """Test that after the hedge delay the answers so far are used."""
+    providers = {
+        "fast": _provider(["https://a.com/1"]),
+        "slow": _provider(["https://c.com/1"], delay=5),
+    }
+    started = time.monotonic()
+    merged = await fanout_raw(providers, "q", first_n=2, hedge_s=0.05)
+    assert time.monotonic() - started < 1
+    assert [str(s.url) for s in merged] == ["https://a.com/1"]
+
+
+@pytest.mark.asyncio
+async def test_fanout_tolerates_failures():
+    """Test that a failing provider is skipped, and all failing raises."""
+    ok = await fanout_raw({"bad": _provider([], fail=True), "good": _provider(["https://a.com/1"])}, "q")
+    assert len(ok) == 1
+    with pytest.raises(RuntimeError):
+        await fanout_raw({"bad": _provider([], fail=True)}, "q")
+
+
+@pytest.mark.asyncio
+async def test_fanout_dedupes_by_domain():
+    """Test that the fused list is deduped by domain before returning."""
+    search = fanout({
+        "p1": _provider(["https://a.com/1", "https://a.com/2"]),
+        "p2": _provider(["https://a.com/3", "https://b.com/1"]),
+    })
+    results = await search("q")
+    assert len({s.url.host for s in results}) == len(results) == 2
@@ -0,0 +1,92 @@
+"""Tests for on-demand model loading, idle unloading and the memory budget."""
+import threading
+import time
+
+import pytest
+
+from app.nlp.lifecycle import ModelManager
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _manager(**kw):
+    clock = Clock()
+    mgr = ModelManager(sizer=lambda v: v["bytes"], clock=clock, **kw)
+    return mgr, clock
+
+
+def test_idle_models_are_unloaded_and_reloaded():
+    """Test that sweep drops idle models and the next use reloads them."""
+    mgr, clock = _manager(idle_timeout_s=60)
+    mgr.register("nli", lambda: {"bytes": 100})
+    mgr.get("nli")
+    clock.t = 30
+    assert mgr.sweep() == []
+    clock.t = 95
+    assert mgr.sweep() == ["nli"]
+    assert mgr.resident_bytes() == 0
+    mgr.get("nli")
+    assert mgr.report()["models"]["nli"]["loads"] == 2
+
+
+def test_budget_evicts_least_recently_used():
+    """Test that loading over budget evicts the idle LRU model, never one in use."""
+    mgr, clock = _manager(budget_bytes=250)
+    for name in ("a", "b", "c"):
+        mgr.register(name, lambda: {"bytes": 100})
+    mgr.get("a")
+    clock.t = 1
+    with mgr.use("b"):
+        clock.t = 2
+        mgr.get("c")  # 300 > 250: "a" is idle and oldest
+        loaded = {n for n, m in mgr.report()["models"].items() if m["loaded"]}
+        assert loaded == {"b", "c"}
+        clock.t = 3
+        mgr.get("a")  # "b" is pinned, so "c" goes
+        loaded = {n for n, m in mgr.report()["models"].items() if m["loaded"]}
+        assert loaded == {"a", "b"}
+    assert mgr.resident_bytes() == 200
+
+
+def test_concurrent_cold_loads_share_one_load():
+    """Test single-flight: many callers of a cold model trigger one load."""
+    mgr, _ = _manager()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"bytes": 1}
+
+    mgr.register("embed", slow_loader)
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(mgr.get("embed"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(g is got[0] for g in got)
+
+
+def test_failed_load_reaches_waiters_and_can_retry():
+    """Test that a loader error propagates and the next call tries again."""
+    mgr, _ = _manager()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("weights missing")
+        return {"bytes": 1}
+
+    mgr.register("nli", flaky)
+    with pytest.raises(OSError):
+        mgr.get("nli")
+    assert mgr.get("nli") == {"bytes": 1}
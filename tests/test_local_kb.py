@@ -0,0 +1,103 @@
+"""Tests for the offline knowledge-base provider."""
+import zlib
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.nlp.lexical import BM25, tokenize
+from app.records import Hit
+from app.search import local
+
+DOCS = [
+    {"title": "Earth", "url": "https://kb.example/earth",
+     "text": "The Earth orbits the Sun once every year at an average distance of about 150 million kilometres. " * 3},
+    {"title": "Moon", "url": "https://kb.example/moon",
+     "text": "The Moon is Earth's only natural satellite and is tidally locked, always showing the same face. " * 3},
+    {"title": "Great Wall", "text": "The Great Wall of China is not visible to the naked eye from low Earth orbit. " * 3},
+]
+
+
+def _fake_embed_texts(texts):
+    """Bag-of-words hashing embedder: deterministic and good enough to rank."""
+    out = np.zeros((len(texts), 64), dtype="float32")
+    for i, t in enumerate(texts):
+        for w in tokenize(t):
+            out[i, zlib.crc32(w.encode()) % 64] += 1.0
+        n = np.linalg.norm(out[i])
+        if n:
+            out[i] /= n
+    return out
+
+
+@pytest.fixture
+def kb(tmp_path):
+    with patch.object(local, "embed_texts", _fake_embed_texts), \
+         patch.object(local, "embed_text", lambda t: _fake_embed_texts([t])[0]):
+        local.ingest(DOCS, str(tmp_path))
+        yield local.LocalIndex.load(str(tmp_path))
+
+
+def test_bm25_ranks_matching_doc_first():
+    """Test BM25 scoring and persistence round-trip."""
+    docs = [tokenize(d["text"]) for d in DOCS]
+    bm = BM25.from_dict(BM25.build(docs).to_dict())
+    assert bm.top(tokenize("moon satellite"), 2)[0] == 1
+    assert bm.top(tokenize("zebra"), 2) == []
+
+
+def test_ingest_and_hybrid_search(kb):
+    """Test that retrieval finds the right document with its paragraphs."""
+    with patch.object(local, "embed_text", lambda t: _fake_embed_texts([t])[0]):
+        results = kb.search("Is the Great Wall visible from orbit?")
+    assert results[0].title == "Great Wall"
+    assert str(results[0].url) == "https://en.wikipedia.org/wiki/Great_Wall"
+    assert results[0].paragraphs
+    assert isinstance(kb.vecs, np.memmap)
+
+
+@pytest.mark.asyncio
+async def test_local_sources_skip_fetch():
+    """Test that sources with pre-extracted paragraphs never hit the network."""
+    from app.logic import selector
+
+    async def boom(*args, **kwargs):
+        raise AssertionError("fetch should be skipped")
+
+    src = Hit(title="Earth", url="https://kb.example/earth", paragraphs=["The Earth orbits the Sun."])
+    with patch.object(selector, "get_paragraphs_with_fallback", boom):
+        paras = await selector._fetch_all([src], None)
+    assert paras == [["The Earth orbits the Sun."]]
+
+
+@pytest.mark.asyncio
+async def test_search_dedupes_by_url_off_the_event_loop():
+    """Test that search() drops repeat URLs (canonically compared) and runs retrieval in a worker thread."""
+    import threading
+
+
+    loop_thread = threading.get_ident()
+    ran_in = []
+
+    class FakeIndex:
+        def search(self, query):
+            ran_in.append(threading.get_ident())
+            urls = ["https://kb.example/a", "https://kb.example/a?utm_source=x", "https://kb.example/b"]
+            return [Hit(title=u, url=u) for u in urls]
+
+    with patch.object(local, "get_index", lambda: FakeIndex()):
+        hits = await local.search("anything")
+    assert [h.url for h in hits] == ["https://kb.example/a", "https://kb.example/b"]
+    assert ran_in and ran_in[0] != loop_thread
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_compact_vector_storage_keeps_ranking(tmp_path, dtype):
+    """Test that float16/int8 indexes are smaller and retrieve the same document."""
+    with patch.object(local, "embed_texts", _fake_embed_texts), \
+         patch.object(local, "embed_text", lambda t: _fake_embed_texts([t])[0]):
+        local.ingest(DOCS, str(tmp_path), vector_dtype=dtype)
+        idx = local.LocalIndex.load(str(tmp_path))
+        results = idx.search("Is the Great Wall visible from orbit?")
+    assert idx.vecs.dtype == np.dtype(dtype)
+    assert (idx.scales is not None) == (dtype == "int8")
+    assert results[0].title == "Great Wall"
@@ -0,0 +1,138 @@
+"""Tests for the shared model server and its client fallback."""
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.nlp import protocol
+from app.nlp.client import ModelClient, ModelServerError
+from app.nlp.server import ModelServer
+
+
+def fake_embed(texts):
+    return np.array([[len(t), i, 1.0] for i, t in enumerate(texts)], dtype="float32")
+
+
+def fake_nli(pairs):
+    return np.array([[0.8, 0.1, 0.1] if p == h else [0.1, 0.8, 0.1] for p, h in pairs], dtype="float32")
+
+
+@pytest.fixture
+def server():
+    path = os.path.join(tempfile.mkdtemp(), "models.sock")
+    srv = ModelServer(path, fake_embed, fake_nli, wait_s=0.05)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield srv, path
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_embed_and_nli_round_trip(server):
+    """Test that both ops return the model rows for each request."""
+    _, path = server
+    client = ModelClient(path)
+    vecs = client.embed(["ab", "cde", "ünï"])
+    assert vecs.dtype == np.float32
+    assert vecs[:, 0].tolist() == [2, 3, 3]
+    rows = client.nli([("x", "x"), ("x", "y")])
+    assert rows[:, 0].tolist() == pytest.approx([0.8, 0.1])
+
+
+def test_large_batches_use_shared_memory(server):
+    """Test that results over the threshold come back through shared memory intact."""
+    _, path = server
+    texts = [f"t{i}" for i in range(200)]
+    with patch.object(protocol, "SHM_THRESHOLD", 64):
+        op, payload = protocol.encode_matrix(fake_embed(texts))
+        protocol.release_matrix(op, payload)
+        vecs = ModelClient(path).embed(texts)
+    assert op == protocol.OP_OK_SHM
+    assert np.array_equal(vecs, fake_embed(texts))
+    assert _wait_no_blocks() == []  # unlinked by the server once acknowledged
+
+
+def _our_blocks():
+    if not os.path.isdir(protocol.SHM_DIR):
+        return []
+    mine = f"{protocol.SHM_PREFIX}{os.getpid()}-"
+    return [n for n in os.listdir(protocol.SHM_DIR) if n.startswith(mine)]
+
+
+def _wait_no_blocks(timeout_s=1.0):
+    import time
+
+    end = time.monotonic() + timeout_s
+    while _our_blocks() and time.monotonic() < end:
+        time.sleep(0.02)
+    return _our_blocks()
+
+
+@pytest.mark.skipif(not os.path.isdir(protocol.SHM_DIR), reason="needs /dev/shm")
+def test_unacknowledged_shared_memory_is_unlinked(server):
+    """Test that a client that disconnects before acknowledging doesn't leak the block."""
+    import socket
+
+    _, path = server
+    with patch.object(protocol, "SHM_THRESHOLD", 64):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        protocol.send_frame(sock, protocol.OP_EMBED, protocol.encode_strings([f"t{i}" for i in range(200)]))
+        op, _ = protocol.recv_frame(sock)
+        assert op == protocol.OP_OK_SHM and _our_blocks()
+        sock.close()  # gone without OP_ACK, as after a client timeout
+    assert _wait_no_blocks() == []
+
+
+@pytest.mark.skipif(not os.path.isdir(protocol.SHM_DIR), reason="needs /dev/shm")
+def test_sweep_removes_blocks_of_dead_servers(tmp_path):
+    """Test that blocks named for a pid that no longer runs are swept, and live ones kept."""
+    dead = f"{protocol.SHM_PREFIX}999999999-abc"
+    live = f"{protocol.SHM_PREFIX}{os.getpid()}-abc"
+    for name in (dead, live, "unrelated"):
+        (tmp_path / name).write_bytes(b"x")
+    assert protocol.sweep_stale_blocks(str(tmp_path)) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([live, "unrelated"])
+
+
+def test_requests_from_several_clients_share_a_batch(server):
+    """Test that concurrent clients are served by one model call."""
+    srv, path = server
+    results = {}
+
+    def worker(i):
+        results[i] = ModelClient(path).embed([f"client {i}"] * 2)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert srv.embed.calls < 4
+    assert all(results[i][:, 0].tolist() == [len(f"client {i}")] * 2 for i in range(4))
+
+
+def test_model_errors_are_reported_not_fatal(server):
+    """Test that a failing model call reaches the client and the server keeps serving."""
+    srv, path = server
+    client = ModelClient(path)
+    with patch.object(srv.embed, "run", side_effect=RuntimeError("boom")):
+        with pytest.raises(ModelServerError, match="boom"):
+            client.embed(["x"])
+    assert client.embed(["x"]).shape == (1, 3)
+
+
+def test_embed_texts_falls_back_in_process():
+    """Test that an unreachable server falls back to the local model."""
+    from app.nlp import embed
+
+    client = ModelClient(os.path.join(tempfile.mkdtemp(), "missing.sock"))
+    with patch("app.nlp.embed.get_client", return_value=client), \
+         patch("app.nlp.embed.embed_texts_local", return_value=np.ones((1, 3), dtype="float32")) as local:
+        out = embed.embed_texts(["x"])
+    local.assert_called_once_with(["x"])
+    assert out.shape == (1, 3)
+    assert not client.available  # backs off instead of reconnecting every call
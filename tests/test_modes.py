@@ -0,0 +1,97 @@
+"""Tests for per-request check modes and load-based downgrades."""
+import numpy as np
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from app.logic import modes
+from app.nlp import verdict
+from app.records import Hit
+from app.schemas import CheckRequest, Source
+
+
+def test_resolve_mode_steps_down_under_load():
+    """Test that each multiple of the threshold above it costs one tier, ending in similarity-only."""
+    assert modes.resolve_mode("thorough", load=1.0, threshold=1.5)[0] == "thorough"
+    assert modes.resolve_mode("thorough", load=2.0, threshold=1.5)[0] == "balanced"
+    assert modes.resolve_mode("thorough", load=3.5, threshold=1.5)[0] == "fast"
+    mode, profile = modes.resolve_mode("balanced", load=3.5, threshold=1.5)
+    assert mode == "fast" and profile.nli == "similarity"
+    assert modes.resolve_mode("fast", load=9.0, threshold=0)[1] == modes.PROFILES["fast"]
+
+
+def test_check_request_mode():
+    """Test that the mode field is optional and validated."""
+    assert CheckRequest(claim="A claim long enough").mode is None
+    assert CheckRequest(claim="A claim long enough", mode="fast").mode == "fast"
+    with pytest.raises(Exception):
+        CheckRequest(claim="A claim long enough", mode="instant")
+
+
+@pytest.mark.asyncio
+async def test_fast_mode_skips_fetch_and_uses_distilled_nli():
+    """Test that the fast profile reaches the selector and verdict stages."""
+    from app.logic import orchestrator
+
+    search = AsyncMock(return_value=[])
+    with patch.object(orchestrator, "get_search", return_value=search), \
+         patch.object(orchestrator, "select_evidence", new_callable=AsyncMock, return_value=[]) as select, \
+         patch.object(orchestrator, "make_verdict", return_value=("Unverified", 0.0, "r", {})) as mv, \
+         patch.object(orchestrator, "prewarm") as prewarm, \
+         patch.object(orchestrator, "save_result", return_value="id1"):
+        result = await orchestrator.run_pipeline("A claim long enough", mode="fast")
+    assert result["mode"] == "fast" and not result["degraded"]
+    assert search.call_count == 1  # one query, no reformulations
+    assert search.call_args.kwargs["k"] == 3
+    assert select.call_args.kwargs["fetch"] is False
+    assert select.call_args.kwargs["per_source"] == 1
+    assert mv.call_args.kwargs["nli"] == "distilled"
+    prewarm.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_busy_server_downgrades_and_reports_it():
+    """Test that a backed-up governor serves a cheaper mode and flags the result."""
+    from app.logic import orchestrator
+
+    with patch.object(orchestrator, "get_search", return_value=AsyncMock(return_value=[])), \
+         patch.object(orchestrator, "select_evidence", new_callable=AsyncMock, return_value=[]), \
+         patch.object(orchestrator, "make_verdict", return_value=("Unverified", 0.0, "r", {})), \
+         patch.object(orchestrator.get_pipeline_budget().governor, "load", return_value=2.0), \
+         patch.object(orchestrator, "save_result", return_value="id1"):
+        result = await orchestrator.run_pipeline("A claim long enough", mode="thorough")
+    assert result["mode"] == "balanced"
+    assert result["degraded"] is True
+
+
+@pytest.mark.asyncio
+async def test_snippets_only_selection_fetches_nothing():
+    """Test that fetch=False scores search snippets without downloading pages."""
+    from app.logic import selector
+
+    sources = [Source(title="a", url="https://a.com/x", snippet="The bridge reopened on Monday after repairs.")]
+    fetch_all = AsyncMock()
+    with patch.object(selector, "_fetch_all", fetch_all), \
+         patch.object(selector, "embed_text", lambda t: np.array([1.0, 0.0], dtype=np.float32)), \
+         patch.object(selector, "embed_texts", lambda xs: np.array([[1.0, 0.0]] * len(xs), dtype=np.float32)):
+        picked = await selector.select_evidence("The bridge reopened.", sources, fetch=False)
+    fetch_all.assert_not_called()
+    assert picked[0].evidence == ["The bridge reopened on Monday after repairs."]
+
+
+def test_similarity_verdict_follows_negation():
+    """Test that similarity-only scoring supports paraphrases and flips on a one-sided negation."""
+    text = "The city council approved the new transit budget on Tuesday evening."
+    negated = "The city council did not approve the new transit budget on Tuesday evening."
+    src = lambda ev: [Hit(title="t", url="https://a.com", evidence=[ev], sims=[0.95])]
+    with patch.object(verdict, "score_many") as score_many:
+        assert verdict.make_verdict("The council approved the budget.", src(text), nli="similarity")[0] == "True"
+        assert verdict.make_verdict("The council approved the budget.", src(negated), nli="similarity")[0] == "False"
+    score_many.assert_not_called()
+
+
+def test_distilled_nli_requests_the_small_model():
+    """Test that nli="distilled" asks the scorer for the distilled model."""
+    src = [Source(title="t", url="https://a.com", evidence=["a premise that is comfortably long enough for NLI"])]
+    with patch.object(verdict, "score_many", return_value=[{"entail": 0.9, "contradict": 0.0, "neutral": 0.1}]) as sm:
+        verdict.make_verdict("A claim.", src, early_exit=False, nli="distilled")
+    assert sm.call_args.kwargs["model"] == "distilled"
@@ -0,0 +1,62 @@
+"""Tests for cross-source near-duplicate collapsing."""
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.logic.neardup import NearDupIndex, hamming, simhash
+from app.schemas import Source
+
+WIRE = (
+    "WASHINGTON (AP) - The Federal Reserve held interest rates steady on Wednesday, "
+    "saying inflation had eased but remained above its two percent target, and signalled "
+    "that it expects to cut rates later this year if the labour market continues to cool."
+)
+WIRE_EDITED = WIRE.replace("on Wednesday", "Wednesday") + " Reporting by staff."
+OTHER = (
+    "Researchers in Norway have found that a common garden plant can absorb heavy metals "
+    "from contaminated soil, a discovery that could make cleaning up old industrial sites "
+    "far cheaper than current excavation methods allow."
+)
+
+
+def test_simhash_close_for_near_duplicates():
+    """Test that light edits keep fingerprints within a few bits."""
+    assert hamming(simhash(WIRE), simhash(WIRE_EDITED)) <= 6
+    assert hamming(simhash(WIRE), simhash(OTHER)) > 10
+
+
+def test_index_reports_original_key():
+    """Test that a duplicate resolves to the first indexed copy."""
+    idx = NearDupIndex()
+    assert idx.add("a", WIRE) is None
+    assert idx.add("b", OTHER) is None
+    assert idx.add("c", WIRE_EDITED) == "a"
+    assert idx.find(WIRE) == "a"
+
+
+@pytest.mark.asyncio
+async def test_select_evidence_collapses_cross_source_copies():
+    """Test that mirrored paragraphs are embedded once and provenance is kept."""
+    from app.logic import selector
+
+    sources = [
+        Source(title="AP", url="https://apnews.com/a"),
+        Source(title="Mirror", url="https://mirror.example/a"),
+    ]
+    embedded = []
+
+    async def fake_fetch(srcs, deadline):
+        return [[WIRE, OTHER], [WIRE]]
+
+    def fake_embed_texts(texts):
+        embedded.extend(texts)
+        return np.ones((len(texts), 4), dtype="float32") / 2.0
+
+    with patch.object(selector, "_fetch_all", fake_fetch), \
+         patch.object(selector, "embed_texts", fake_embed_texts), \
+         patch.object(selector, "embed_text", lambda t: np.ones(4, dtype="float32") / 2.0):
+        picked = await selector.select_evidence("The Fed held rates.", sources, per_source=2, max_total=8)
+
+    assert embedded.count(WIRE) == 1
+    assert picked[0].mirrors == ["https://mirror.example/a"]
+    assert picked[1].evidence == []
@@ -59,7 +59,9 @@ async def test_run_pipeline_structure():
         assert result["id"] == "test123"
         
         # Verify all components were called
-        mock_search.assert_called_once_with("Test claim")
+        mock_search.assert_called_once()
+        assert mock_search.call_args.args[0] == "Test claim"
+        assert result["degraded"] is False
         mock_select.assert_called_once()
         mock_make_verdict.assert_called_once()
         mock_build_post.assert_called_once()
@@ -0,0 +1,41 @@
+"""Tests for internal pipeline records and the JSON codec."""
+import numpy as np
+
+from app.codec import dumps, loads
+from app.records import Hit, as_hit, hit_dict, is_http_url
+from app.schemas import Source
+
+
+def test_is_http_url():
+    """Test the lightweight URL check used instead of HttpUrl on provider output."""
+    assert is_http_url("https://example.com/a?b=1")
+    assert not is_http_url("ftp://example.com/file")
+    assert not is_http_url("https:///nohost")
+    assert not is_http_url("https://exa mple.com")
+    assert not is_http_url(None)
+
+
+def test_hit_is_slotted_and_hides_internal_fields():
+    """Test that spans and sims never reach the public payload."""
+    hit = Hit(title="T", url="https://example.com/", evidence=["e"], spans=["s"], sims=[0.5])
+    assert not hasattr(hit, "__dict__")
+    d = hit.to_dict()
+    assert "spans" not in d and "sims" not in d
+    assert Hit.from_dict(d) == Hit(title="T", url="https://example.com/", evidence=["e"])
+
+
+def test_source_and_hit_share_a_public_shape():
+    """Test that API-layer Sources convert to the same dict as Hits, without internal fields."""
+    src = Source(title="T", url="https://example.com/page", snippet="s", evidence=["e"],
+                 mirrors=["https://mirror.example/page"])
+    assert as_hit(src).sims == []
+    assert as_hit(src).mirrors == ["https://mirror.example/page"]
+    assert hit_dict(src) == {**src.model_dump(mode="json"), "paragraphs": []}
+    assert not {"paragraphs", "spans", "sims"} & set(Source.model_fields)
+
+
+def test_codec_round_trips_numpy_scalars():
+    """Test that stored payloads accept numpy floats and stay valid JSON text."""
+    text = dumps({"confidence": np.float32(0.5), "claim": "naïve"})
+    assert isinstance(text, str) and "naïve" in text
+    assert loads(text) == {"confidence": 0.5, "claim": "naïve"}
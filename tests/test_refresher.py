@@ -0,0 +1,291 @@
+"""Tests for the verdict cache and background refresh of hot claims."""
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.logic.admission import Governor
+from app.logic.refresher import ComputeBudget, Refresher
+from app.store import db
+from app.store.verdicts import VerdictCache, claim_key
+
+
+class _Clock:
+    def __init__(self, t: float = 1_000_000.0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+@pytest.fixture
+def verdicts(store):
+    """A verdict cache on top of the throwaway results database, with a settable clock."""
+    clock = _Clock()
+    return VerdictCache(store.DB_PATH, ttl_s=600, clock=clock), clock
+
+
+def _result(mode="balanced", degraded=False, verdict="True"):
+    r = {"claim": "c", "verdict": verdict, "mode": mode, "degraded": degraded, "id": ""}
+    db.save_result(r)
+    return r
+
+
+def test_claim_key_ignores_case_and_punctuation():
+    """Test that cosmetic variants of a claim share one cache entry."""
+    assert claim_key("  The Earth is FLAT?! ") == claim_key("the earth is flat")
+
+
+def test_cached_verdict_expires_and_respects_mode(verdicts):
+    """Test that a fresh result is served to equal or cheaper modes only, until its TTL."""
+    cache, clock = verdicts
+    assert cache.remember("The Earth is flat", _result(mode="balanced"))
+    hit = cache.lookup("the earth is flat.", "fast")
+    assert hit["verdict"] == "True" and hit["cached"] is True
+    assert cache.lookup("the earth is flat", "thorough") is None
+    clock.t += 601
+    assert cache.lookup("the earth is flat", "balanced") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_verdicts_are_shared_through_the_cache_tier(verdicts):
+    """Test that a verdict remembered by one worker is served by another sharing the tier."""
+    from app.cache.base import Cache
+    from app.cache.memory import MemoryBackend
+
+    cache, clock = verdicts
+    tier = Cache("verdicts", MemoryBackend(max_items=16))
+    one = VerdictCache(cache.db_path, ttl_s=600, clock=clock, store=tier)
+    other = VerdictCache(cache.db_path, ttl_s=600, clock=clock, store=tier)
+    assert await one.aremember("The Earth is flat", _result(mode="thorough"))
+    clock.t += 5
+    hit = await other.alookup("the earth is flat", "balanced")
+    assert hit["verdict"] == "True" and hit["cached"] is True and hit["age_s"] == 5.0
+    assert [c for c, _ in other.due(horizon_s=600, min_score=0)] == ["The Earth is flat"]
+
+
+def test_degraded_results_are_not_cached(verdicts):
+    """Test that a cut-short verdict never becomes the cached answer."""
+    cache, _ = verdicts
+    assert not cache.remember("Some claim here", _result(degraded=True))
+    assert cache.lookup("Some claim here", "fast") is None
+
+
+def test_due_lists_hot_claims_near_expiry(verdicts):
+    """Test that only frequently requested claims close to expiry are due, hottest first."""
+    cache, clock = verdicts
+    for claim, n in (("hot claim one", 8), ("warm claim two", 6), ("cold claim three", 1)):
+        for _ in range(n):
+            cache.record_request(claim)
+        cache.remember(claim, _result())
+    assert cache.due(horizon_s=60, min_score=5) == []  # nothing expires within a minute yet
+    clock.t += 560
+    assert [c for c, _ in cache.due(horizon_s=60, min_score=5)] == ["hot claim one", "warm claim two"]
+    clock.t += 3 * 3600  # interest decays
+    assert cache.due(horizon_s=60, min_score=5) == []
+
+
+def test_request_counts_are_buffered_and_flushed_in_one_batch(verdicts):
+    """Test that counted requests reach the claims table only on flush, with their decayed scores."""
+    import sqlite3
+    from app.store.verdicts import FLUSH_EVERY
+
+    cache, clock = verdicts
+    cache.record_request("steady claim")
+    clock.t += 3600  # one half-life
+    assert cache.flush() == 0  # nothing buffered; restarts the flush interval
+    assert not cache.count("steady claim")
+    assert not cache.count("new claim")
+    with sqlite3.connect(db.DB_PATH) as c:
+        assert c.execute("SELECT requests FROM claims WHERE claim = 'steady claim'").fetchone() == (1,)
+    assert cache.flush() == 2
+    with sqlite3.connect(db.DB_PATH) as c:
+        rows = dict(c.execute("SELECT claim, score FROM claims").fetchall())
+    assert rows == {"steady claim": pytest.approx(1.5), "new claim": 1.0}
+    assert any(cache.count("busy claim") for _ in range(FLUSH_EVERY))
+
+
+def test_prune_forgets_cold_and_orphaned_claims(verdicts):
+    """Test that expired claims below the score floor and claims whose result was purged are deleted."""
+    import sqlite3
+
+    cache, clock = verdicts
+    for claim in ("cold expired claim", "still cached claim", "purged result claim"):
+        cache.record_request(claim)
+        cache.remember(claim, _result())
+    for _ in range(20):
+        cache.record_request("hot expired claim")
+    cache.remember("hot expired claim", _result())
+    cache.record_request("never cached claim")
+    orphan = cache.lookup("purged result claim", "fast")["id"]
+    with sqlite3.connect(db.DB_PATH) as c:
+        c.execute("DELETE FROM results WHERE id = ?", (orphan,))
+    assert cache.prune(floor=0.5) == 1
+    clock.t += 2 * 3600  # past every TTL; single requests decay to 0.25, twenty to 5
+    cache.remember("still cached claim", _result())
+    assert cache.prune(floor=0.5, batch=1) == 2
+    with sqlite3.connect(db.DB_PATH) as c:
+        left = {r[0] for r in c.execute("SELECT claim FROM claims")}
+    assert left == {"still cached claim", "hot expired claim"}
+
+
+def test_compute_budget_refills_over_time():
+    """Test that spent refresh time comes back at the hourly rate."""
+    clock = _Clock(0.0)
+    budget = ComputeBudget(36.0, clock=clock)
+    budget.spend(40.0)
+    assert not budget.available()
+    clock.t += 500  # +5 s
+    assert budget.available()
+
+
+@pytest.mark.asyncio
+async def test_refresher_reruns_due_claims_when_idle(verdicts):
+    """Test that a due claim is re-run in its cached mode and the cache is renewed."""
+    cache, clock = verdicts
+    for _ in range(6):
+        cache.record_request("hot claim one")
+    cache.remember("hot claim one", _result(mode="thorough"))
+    clock.t += 590
+
+    async def run(claim, mode=None):
+        return _result(mode=mode, verdict="False")
+
+    run = AsyncMock(side_effect=run)
+    governor = Governor(max_inflight=2, max_queue=4, queue_timeout=1.0)
+    refresher = Refresher(cache, governor, run, interval_s=1, horizon_s=60, min_requests=5,
+                          budget=ComputeBudget(100.0))
+    assert await refresher.tick() == 1
+    assert run.call_args.kwargs["mode"] == "thorough"
+    assert governor.inflight == 0
+    clock.t += 30
+    assert cache.lookup("hot claim one", "thorough")["verdict"] == "False"
+
+
+def test_compute_budget_is_shared_through_the_database(store):
+    """Test that workers using the same database draw on one refresh budget."""
+    clock = _Clock(0.0)
+    one = ComputeBudget(36.0, clock=clock, db_path=store.DB_PATH)
+    other = ComputeBudget(36.0, clock=clock, db_path=store.DB_PATH)
+    assert one.available() and other.available()
+    one.spend(40.0)
+    assert not other.available()
+    clock.t += 500  # +5 s
+    assert other.available() and one.available()
+
+
+def test_lease_lets_one_worker_refresh_a_claim(verdicts):
+    """Test that a leased claim is neither leased again nor listed as due until released or expired."""
+    cache, clock = verdicts
+    other = VerdictCache(cache.db_path, ttl_s=600, clock=clock)
+    for _ in range(6):
+        cache.record_request("hot claim one")
+    cache.remember("hot claim one", _result())
+    clock.t += 590
+    assert cache.lease("hot claim one", 60)
+    assert not other.lease("Hot claim one!", 60)
+    assert other.due(horizon_s=60, min_score=5) == []
+    cache.release("hot claim one", hold_s=30)
+    assert not other.lease("hot claim one", 60)
+    clock.t += 31
+    assert [c for c, _ in other.due(horizon_s=60, min_score=5)] == ["hot claim one"]
+    assert other.lease("hot claim one", 60)
+
+
+@pytest.mark.asyncio
+async def test_refreshers_do_not_duplicate_a_claim(verdicts):
+    """Test that two workers ticking together re-run a due claim once."""
+    import asyncio
+
+    cache, clock = verdicts
+    for _ in range(6):
+        cache.record_request("hot claim one")
+    cache.remember("hot claim one", _result())
+    clock.t += 590
+
+    async def run(claim, mode=None):
+        await asyncio.sleep(0.05)
+        return _result(mode=mode, verdict="False")
+
+    run = AsyncMock(side_effect=run)
+    workers = [
+        Refresher(VerdictCache(cache.db_path, ttl_s=600, clock=clock),
+                  Governor(max_inflight=2, max_queue=4, queue_timeout=1.0), run,
+                  interval_s=1, horizon_s=60, min_requests=5, budget=ComputeBudget(100.0))
+        for _ in range(2)
+    ]
+    assert sorted(await asyncio.gather(*(w.tick() for w in workers))) == [0, 1]
+    assert run.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_refresher_yields_to_live_traffic(verdicts):
+    """Test that nothing is refreshed while every pipeline slot is busy."""
+    cache, clock = verdicts
+    for _ in range(6):
+        cache.record_request("hot claim one")
+    cache.remember("hot claim one", _result())
+    clock.t += 590
+    run = AsyncMock()
+    governor = Governor(max_inflight=1, max_queue=4, queue_timeout=1.0)
+    await governor.acquire()
+    refresher = Refresher(cache, governor, run, interval_s=1, horizon_s=60, min_requests=5,
+                          budget=ComputeBudget(100.0))
+    assert await refresher.tick() == 0
+    run.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_check_claim_serves_cache_hits(verdicts):
+    """Test that a repeated claim is answered without running the pipeline again."""
+    from app.logic import orchestrator
+
+    cache, _ = verdicts
+
+    async def run(claim, mode=None):
+        return _result()
+
+    with patch.object(orchestrator, "get_verdict_cache", return_value=cache), \
+         patch.object(orchestrator, "run_pipeline", AsyncMock(side_effect=run)) as rp:
+        first = await orchestrator.check_claim("Is the bridge open again?")
+        second = await orchestrator.check_claim("is the bridge open again")
+    assert rp.call_count == 1
+    assert second["id"] == first["id"] and second["cached"] is True
+
+
+def test_check_endpoint_answers_cache_hits_without_admission(verdicts):
+    """Test that /check serves a cached verdict even when the pipeline budget would reject it."""
+    from fastapi.testclient import TestClient
+    from app import main
+    from app.logic import orchestrator
+    from app.logic.admission import Rejected
+
+    cache, _ = verdicts
+    result = {**_result(), "confidence": 0.8, "rationale": "r", "post": "p", "sources": []}
+    db.save_result(result)
+    cache.remember("Is the bridge open again?", result)
+    budget = patch.object(main, "get_pipeline_budget")
+    with patch.object(orchestrator, "get_verdict_cache", return_value=cache), budget as get_budget:
+        get_budget.return_value.governor.slot.side_effect = Rejected(503, "busy", 1)
+        client = TestClient(main.app)
+        hit = client.post("/check", json={"claim": "is the bridge open again"})
+        miss = client.post("/check", json={"claim": "Is the river open again?"})
+    assert hit.status_code == 200 and hit.json()["cached"] is True
+    assert miss.status_code == 503
+
+
+def test_check_endpoint_rate_limits_cache_hits(verdicts):
+    """Test that a client over its rate limit is turned away before the verdict cache is consulted."""
+    from fastapi.testclient import TestClient
+    from app import main
+    from app.logic import orchestrator
+    from app.logic.admission import Rejected
+
+    cache, _ = verdicts
+    result = {**_result(), "confidence": 0.8, "rationale": "r", "post": "p", "sources": []}
+    db.save_result(result)
+    cache.remember("Is the bridge open again?", result)
+    budget = patch.object(main, "get_pipeline_budget")
+    with patch.object(orchestrator, "get_verdict_cache", return_value=cache), budget as get_budget:
+        get_budget.return_value.limiter.check.side_effect = Rejected(429, "rate limit exceeded", 1)
+        response = TestClient(main.app).post("/check", json={"claim": "is the bridge open again"})
+    assert response.status_code == 429
+    assert cache._pending == {}
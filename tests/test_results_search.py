@@ -0,0 +1,81 @@
+"""Tests for full-text search over stored results."""
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from app.codec import dumps
+from app.main import app
+from app.store import db
+
+
+def _result(claim, verdict="False", rationale="", evidence=(), rid=None):
+    out = {
+        "claim": claim, "verdict": verdict, "confidence": 0.7, "rationale": rationale,
+        "sources": [{"title": "Source", "url": "https://example.com", "evidence": list(evidence)}],
+    }
+    if rid:
+        out["id"] = rid
+    return out
+
+
+def test_search_ranks_claim_matches_and_highlights(store):
+    """Test that matches in the claim outrank evidence-only matches and come back highlighted."""
+    store.save_result(_result("Unrelated claim about tides", evidence=["The moon landing footage was analysed."]))
+    store.save_result(_result("The moon landing was staged", rationale="Sources contradict the claim."))
+    store.save_result(_result("5G towers spread viruses", evidence=["Radio waves cannot carry viruses."]))
+    for i in range(5):
+        store.save_result(_result(f"Filler claim number {i}"))
+    out = store.search_results("moon landing")
+    assert [i["claim"] for i in out["items"]] == [
+        "The <mark>moon</mark> <mark>landing</mark> was staged", "Unrelated claim about tides",
+    ]
+    assert "<mark>moon</mark>" in out["items"][1]["snippet"]
+    assert out["items"][0]["score"] > out["items"][1]["score"]
+    assert store.search_results("5G")["items"][0]["verdict"] == "False"
+    assert store.search_results("tower")["items"]  # porter stemming: tower ~ towers
+
+
+def test_search_escapes_html_and_ignores_operators(store):
+    """Test that stored text is HTML-escaped and query syntax characters don't raise."""
+    store.save_result(_result("<script>alert(1)</script> vaccines alter DNA"))
+    item = store.search_results('vaccines" (-dna')["items"][0]
+    assert item["claim"].startswith("&lt;script&gt;")
+    assert store.search_results("*** ---") == {"query": "*** ---", "items": [], "offset": 0, "has_more": False}
+    assert store.search_results("vacc*")["items"]
+
+
+def test_search_paginates_and_follows_updates(store):
+    """Test pagination and that re-saving or deleting a result keeps the index in step."""
+    for i in range(5):
+        store.save_result(_result(f"Claim {i} about inflation", rid=f"r{i}"))
+    first, rest = store.search_results("inflation", limit=3), store.search_results("inflation", limit=3, offset=3)
+    assert first["has_more"] and not rest["has_more"]
+    assert len({i["id"] for i in first["items"] + rest["items"]}) == 5
+    store.save_result(_result("Claim 0 about interest rates", rid="r0"))
+    assert "r0" not in {i["id"] for i in store.search_results("inflation")["items"]}
+    assert store.search_results("interest")["items"][0]["id"] == "r0"
+    with sqlite3.connect(store.DB_PATH) as c:
+        c.execute("DELETE FROM results WHERE id = 'r1'")
+    assert len(store.search_results("inflation")["items"]) == 3
+
+
+def test_init_backfills_existing_results(tmp_path, monkeypatch):
+    """Test that results saved before the index existed are indexed when it is created."""
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as c:
+        c.execute("CREATE TABLE results (id TEXT PRIMARY KEY, result_json TEXT NOT NULL, created_at TEXT NOT NULL)")
+        c.execute("INSERT INTO results VALUES ('old1', ?, '2024-01-01T00:00:00+00:00')",
+                  (dumps(_result("Coffee cures cancer", evidence=["No trial supports it."])),))
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.init_db()
+    assert db.search_results("trial")["items"][0]["id"] == "old1"
+
+
+def test_results_search_endpoint(store):
+    """Test the /results/search endpoint and its parameter validation."""
+    store.save_result(_result("Drinking water prevents heatstroke", verdict="True", rid="w1"))
+    client = TestClient(app)
+    r = client.get("/results/search", params={"q": "heatstroke", "limit": 5})
+    assert r.status_code == 200
+    assert r.json()["items"][0]["id"] == "w1"
+    assert client.get("/results/search", params={"q": "heatstroke", "limit": 0}).status_code == 422
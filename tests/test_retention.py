@@ -0,0 +1,91 @@
+"""Tests for results retention, incremental vacuum and the size report."""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from app.codec import dumps
+from app.store.retention import Policy, purge, size_report, vacuum
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def _add(path, rid, days_old, verdict="True", degraded=False, viewed_days_ago=None, filler=0):
+    created = (NOW - timedelta(days=days_old)).isoformat()
+    viewed = (NOW - timedelta(days=viewed_days_ago)).isoformat() if viewed_days_ago is not None else None
+    result = {"id": rid, "claim": f"claim {rid}", "verdict": verdict, "degraded": degraded, "post": "x" * filler}
+    with sqlite3.connect(path) as c:
+        c.execute("INSERT INTO results (id, result_json, created_at, last_viewed_at) VALUES (?, ?, ?, ?)",
+                  (rid, dumps(result), created, viewed))
+
+
+def _ids(path):
+    with sqlite3.connect(path) as c:
+        return {r[0] for r in c.execute("SELECT id FROM results")}
+
+
+def test_policies_by_age_verdict_degraded_and_views(store):
+    """Test that each rule deletes only what it should, and a recent view keeps an old result."""
+    path = store.DB_PATH
+    _add(path, "old", 100)
+    _add(path, "old_viewed", 100, viewed_days_ago=5)
+    _add(path, "new", 10)
+    _add(path, "old_false", 100, verdict="False")  # False keeps 365 days
+    _add(path, "older_false", 400, verdict="False")
+    _add(path, "unverified", 10, verdict="Unverified")  # Unverified keeps 7 days
+    _add(path, "degraded", 3, degraded=True)
+    policy = Policy(max_age_days=30, by_verdict=(("False", 365.0), ("Unverified", 7.0)), degraded_days=2)
+    deleted = purge(policy, batch=1, now=NOW, pause_s=0)
+    assert deleted == {"age": 1, "verdict:False": 1, "verdict:Unverified": 1, "degraded": 1}
+    assert _ids(path) == {"old_viewed", "new", "old_false"}
+    assert purge(Policy(max_age_days=30, keep_viewed=False), now=NOW) == {"age": 2}
+    assert _ids(path) == {"new"}
+    assert Policy().rules() == []
+
+
+def test_purge_pages_past_kept_rows(store):
+    """Test that the keyset scan walks every old row once, deleting by id around rows a rule keeps."""
+    path = store.DB_PATH
+    for i in range(9):
+        _add(path, f"r{i}", 100 + i, verdict="False" if i % 3 == 0 else "True")
+    policy = Policy(max_age_days=30, by_verdict=(("False", 0.0),))
+    assert purge(policy, batch=2, now=NOW, pause_s=0) == {"age": 6}
+    assert _ids(path) == {"r0", "r3", "r6"}
+
+
+def test_purge_keeps_search_index_in_step(store):
+    """Test that purged results drop out of full-text search."""
+    store.save_result({"id": "fresh", "claim": "Tides follow the moon", "verdict": "True"})
+    _add(store.DB_PATH, "stale", 90)
+    with sqlite3.connect(store.DB_PATH) as c:  # the insert trigger indexed the raw row too
+        assert c.execute("SELECT COUNT(*) FROM results_fts").fetchone()[0] == 2
+    purge(Policy(max_age_days=30), now=NOW)
+    assert store.search_results("claim")["items"] == []
+    assert store.search_results("tides")["items"][0]["id"] == "fresh"
+
+
+def test_incremental_vacuum_shrinks_file(store):
+    """Test that a new store is incremental and vacuum hands freed pages back."""
+    path = store.DB_PATH
+    for i in range(200):
+        _add(path, f"r{i}", 100, filler=2000)
+    before = size_report()
+    assert before["auto_vacuum"] == "incremental" and before["results"] == 200
+    purge(Policy(max_age_days=30), now=NOW)
+    assert size_report()["free_pages"] > 0
+    assert vacuum(max_pages=10) == 10
+    assert vacuum() > 0
+    after = size_report(detailed=True)
+    assert after["free_pages"] == 0 and after["results"] == 0
+    assert after["file_bytes"] < before["file_bytes"]
+    assert after["tables"] is None or "results" in after["tables"]
+
+
+def test_record_view_throttles_writes(store):
+    """Test that views set last_viewed_at at most once per resolution window."""
+    store.save_result({"id": "seen", "claim": "Viewed claim", "verdict": "True"})
+    store.record_view("seen")
+    with sqlite3.connect(store.DB_PATH) as c:
+        first = c.execute("SELECT last_viewed_at FROM results WHERE id = 'seen'").fetchone()[0]
+    store.record_view("seen")
+    with sqlite3.connect(store.DB_PATH) as c:
+        assert c.execute("SELECT last_viewed_at FROM results WHERE id = 'seen'").fetchone()[0] == first
+    assert first is not None
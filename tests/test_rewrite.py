@@ -0,0 +1,78 @@
+"""Tests for query expansion and multi-query retrieval."""
+import asyncio
+import pytest
+
+from app.schemas import Source
+from app.search.rewrite import entity_query, expand_queries, keyword_query, negation_neutral, search_many
+
+
+def test_keyword_query_drops_function_words():
+    """Test keyword extraction keeps content words in order."""
+    assert keyword_query("The Great Wall of China is visible from space") == "Great Wall China visible space"
+
+
+def test_negation_neutral():
+    """Test that negations are removed without mangling auxiliaries."""
+    assert negation_neutral("Vaccines do not cause autism.") == "Vaccines cause autism."
+    assert negation_neutral("The Earth isn't flat") == "The Earth is flat"
+    assert negation_neutral("NASA never landed on the Moon") == "NASA landed on the Moon"
+    assert negation_neutral("You can't see it") == "You can see it"
+
+
+def test_entity_query():
+    """Test names, acronyms and numbers are picked; a lone initial word is not."""
+    assert entity_query("Barack Obama was born in Hawaii in 1961") == "Barack Obama Hawaii 1961"
+    assert entity_query("The Great Wall of China") == "Great Wall China"
+    assert entity_query("Vaccines cause autism") == ""
+
+
+def test_expand_queries_distinct_and_capped():
+    """Test that the claim comes first and near-identical variants are dropped."""
+    qs = expand_queries("NASA never landed on the Moon", max_queries=3)
+    assert qs[0] == "NASA never landed on the Moon"
+    assert len(qs) == 3
+    assert len({q.lower() for q in qs}) == 3
+    assert expand_queries("Test claim", max_queries=3) == ["Test claim"]
+    assert expand_queries("NASA never landed on the Moon", max_queries=1) == ["NASA never landed on the Moon"]
+
+
+@pytest.mark.asyncio
+async def test_search_many_runs_concurrently_and_fuses():
+    """Test queries run in parallel and results are deduped by URL and domain."""
+    active = 0
+    peak = 0
+
+    async def search(query, deadline=None, k=5):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if query == "q1":
+            return [Source(title="a", url="https://a.com/1"), Source(title="b", url="https://b.com/1")]
+        return [Source(title="b", url="https://b.com/1"), Source(title="a2", url="https://a.com/2")]
+
+    results = await search_many(search, ["q1", "q2"])
+    assert peak == 2
+    assert [str(s.url) for s in results] == ["https://b.com/1", "https://a.com/1"]
+
+
+@pytest.mark.asyncio
+async def test_search_many_survives_one_failing_query():
+    """Test that a failing reformulation does not sink the search stage."""
+    async def search(query, deadline=None, k=5):
+        if query == "bad":
+            raise RuntimeError("boom")
+        return [Source(title="a", url="https://a.com/1")]
+
+    results = await search_many(search, ["good", "bad"])
+    assert len(results) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_many_passes_k_for_a_single_query():
+    """Test that a lone query still asks the provider for k results."""
+    async def search(query, deadline=None, k=5):
+        return [Source(title=str(i), url=f"https://s{i}.example/a") for i in range(k)]
+
+    assert len(await search_many(search, ["only"], k=8)) == 8
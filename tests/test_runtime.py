@@ -0,0 +1,86 @@
+"""Tests for torch thread planning and the autotune result picker."""
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from app.deps import Settings
+from app.nlp import runtime
+from app.nlp.autotune import pick_best
+from app.nlp.runtime import ThreadPlan, apply_plan, plan_threads
+
+CPUS = tuple(range(8))
+
+
+def test_plan_splits_cores_across_workers():
+    """Test that workers share the cores instead of each taking all of them."""
+    plan = plan_threads(CPUS, workers=4)
+    assert plan.intra_threads == 2
+    assert plan.interop_threads == 1
+    assert plan.cpus is None
+    assert plan_threads(CPUS, workers=16).intra_threads == 1
+
+
+def test_plan_pins_disjoint_slices():
+    """Test that pinned workers get non-overlapping CPU sets."""
+    slices = [plan_threads(CPUS, workers=4, slot=i, pin=True).cpus for i in range(4)]
+    assert slices == [(0, 1), (2, 3), (4, 5), (6, 7)]
+
+
+def test_env_overrides_tune_file():
+    """Test precedence: explicit settings, then the tune file, then the core split."""
+    path = os.path.join(tempfile.mkdtemp(), "tune.json")
+    with open(path, "w") as f:
+        json.dump({"workers": 2, "threads": 3, "nli_batch": 16}, f)
+    settings = Settings(torch_tune_file=path, torch_threads=1)
+    runtime.get_plan.cache_clear()
+    try:
+        with patch("app.nlp.runtime.get_settings", return_value=settings), \
+             patch("app.nlp.runtime.available_cpus", return_value=CPUS):
+            plan = runtime.get_plan()
+    finally:
+        runtime.get_plan.cache_clear()
+    assert (plan.workers, plan.intra_threads, plan.nli_batch) == (2, 1, 16)
+
+
+def test_apply_plan_sets_torch_threads_once():
+    """Test that the first plan configures torch and later ones are ignored."""
+    torch = pytest.importorskip("torch")
+    with patch.object(runtime, "_applied", None), \
+         patch.object(torch, "set_num_threads") as intra, \
+         patch.object(torch, "set_num_interop_threads") as inter:
+        apply_plan(ThreadPlan(workers=2, intra_threads=3, interop_threads=1, nli_batch=8))
+        apply_plan(ThreadPlan(workers=1, intra_threads=8, interop_threads=2, nli_batch=8))
+    intra.assert_called_once_with(3)
+    inter.assert_called_once_with(1)
+
+
+def test_pick_best_prefers_fewer_resources_on_ties():
+    """Test that the fastest configuration wins and ties favour fewer workers."""
+    results = [
+        {"workers": 2, "threads": 2, "nli_batch": 8, "pairs_per_s": 40.0},
+        {"workers": 1, "threads": 4, "nli_batch": 8, "pairs_per_s": 40.0},
+        {"workers": 4, "threads": 1, "nli_batch": 16, "pairs_per_s": 35.0},
+    ]
+    assert pick_best(results)["workers"] == 1
+
+
+def _crashing_worker(plan, batches, seconds, barrier, out):
+    os._exit(1)  # what an OOM kill looks like from the parent
+
+
+def test_autotune_cell_with_crashed_worker_fails_fast():
+    """Test that a dead worker fails its cell instead of hanging the sweep."""
+    import multiprocessing as mp
+    import time
+
+    from app.nlp import autotune
+
+    fork = mp.get_context("fork")
+    t0 = time.monotonic()
+    with patch.object(autotune, "_bench_worker", _crashing_worker), \
+         patch.object(autotune.mp, "get_context", lambda method: fork):
+        assert autotune.run_cell(2, 1, [4], seconds=0.1) is None
+    assert time.monotonic() - t0 < 10
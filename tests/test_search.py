@@ -124,3 +124,69 @@ async def test_serper_search_missing_api_key():
         
         with pytest.raises(RuntimeError, match="SERPER_API_KEY is not set"):
             await serper_search("test query")
+
+
+@pytest.mark.asyncio
+async def test_brave_search_success():
+    """Test Brave results are parsed and highlight tags stripped."""
+    from app.search.brave import search as brave_search
+
+    mock_response = {
+        "web": {
+            "results": [
+                {"title": "<strong>Moon</strong> landing", "url": "https://nasa.gov/apollo", "description": "The <strong>Apollo</strong> 11 mission"},
+                {"title": "Other", "url": "https://history.com/moon", "description": "More"},
+            ]
+        }
+    }
+
+    with patch('httpx.AsyncClient.get') as mock_get, \
+         patch('app.search.brave.get_settings') as mock_settings:
+        mock_settings.return_value.brave_api_key = "test-key"
+        mock_response_obj = MagicMock()
+        mock_response_obj.json.return_value = mock_response
+        mock_response_obj.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response_obj
+
+        results = await brave_search("moon landing")
+
+        assert len(results) == 2
+        assert results[0].title == "Moon landing"
+        assert results[0].snippet == "The Apollo 11 mission"
+        assert mock_get.call_args.kwargs["headers"]["X-Subscription-Token"] == "test-key"
+
+
+@pytest.mark.asyncio
+async def test_google_search_success():
+    """Test Google CSE results are parsed."""
+    from app.search.google import search as google_search
+
+    mock_response = {"items": [{"title": "Result", "link": "https://example.org/a", "snippet": "Snip"}]}
+
+    with patch('httpx.AsyncClient.get') as mock_get, \
+         patch('app.search.google.get_settings') as mock_settings:
+        mock_settings.return_value.google_api_key = "k"
+        mock_settings.return_value.google_cse_id = "cx"
+        mock_response_obj = MagicMock()
+        mock_response_obj.json.return_value = mock_response
+        mock_response_obj.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response_obj
+
+        results = await google_search("query")
+
+        assert len(results) == 1
+        assert results[0].snippet == "Snip"
+        assert mock_get.call_args.kwargs["params"]["cx"] == "cx"
+
+
+@pytest.mark.asyncio
+async def test_google_search_missing_keys():
+    """Test error handling for missing Google credentials."""
+    from app.search.google import search as google_search
+
+    with patch('app.search.google.get_settings') as mock_settings:
+        mock_settings.return_value.google_api_key = None
+        mock_settings.return_value.google_cse_id = None
+
+        with pytest.raises(RuntimeError, match="GOOGLE_API_KEY"):
+            await google_search("query")
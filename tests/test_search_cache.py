@@ -0,0 +1,126 @@
+"""Tests for the search result cache."""
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+
+from app.schemas import Source
+from app.search.cache import SearchCache, cached, normalize_query
+
+
+def _counting_search(delay: float = 0.0):
+    calls = []
+
+    async def search(query, deadline=None, k=5):
+        calls.append(query)
+        if delay:
+            await asyncio.sleep(delay)
+        return [Source(title=f"r{len(calls)}", url="https://example.com/a", snippet="s")]
+
+    return search, calls
+
+
+def test_normalize_query():
+    """Test that cosmetic differences map to the same key."""
+    assert normalize_query("  The Earth   is FLAT? ") == normalize_query("the earth is flat")
+
+
+@pytest.mark.asyncio
+async def test_repeat_queries_hit_cache(tmp_path):
+    """Test that a repeated query is served without calling the provider."""
+    cache = SearchCache(ttl_s=60, stale_s=60, max_items=8, db_path=str(tmp_path / "c.db"))
+    search, calls = _counting_search()
+    wrapped = cached(cache, "serper", search)
+    first = await wrapped("The Earth is flat")
+    second = await wrapped("the earth is flat.")
+    assert len(calls) == 1
+    assert first[0].title == second[0].title
+
+
+@pytest.mark.asyncio
+async def test_inflight_queries_are_coalesced(tmp_path):
+    """Test that concurrent identical misses share one upstream call."""
+    cache = SearchCache(ttl_s=60, stale_s=60, max_items=8, db_path=str(tmp_path / "c.db"))
+    search, calls = _counting_search(delay=0.05)
+    wrapped = cached(cache, "serper", search)
+    results = await asyncio.gather(*(wrapped("same claim here") for _ in range(5)))
+    assert len(calls) == 1
+    assert all(r[0].title == "r1" for r in results)
+
+
+@pytest.mark.asyncio
+async def test_persistent_tier_survives_new_instance(tmp_path):
+    """Test that SQLite-backed entries are visible to a fresh process-level cache."""
+    path = str(tmp_path / "c.db")
+    search, calls = _counting_search()
+    await cached(SearchCache(60, 60, 8, path), "serper", search)("persisted claim")
+    await cached(SearchCache(60, 60, 8, path), "serper", search)("persisted claim")
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_revalidating(tmp_path):
+    """Test stale-while-revalidate: old data returns immediately, refresh runs behind it."""
+    cache = SearchCache(ttl_s=60, stale_s=600, max_items=8, db_path=None)
+    search, calls = _counting_search()
+    wrapped = cached(cache, "serper", search)
+    await wrapped("aging claim")
+    later = time.time() + 120
+
+    with patch("app.search.cache.time.time", return_value=later):
+        stale = await wrapped("aging claim")
+        assert stale[0].title == "r1"
+        await asyncio.sleep(0.01)
+    assert len(calls) == 2
+    assert cache.store.get("serper:5:aging claim")[0] == later
+
+
+@pytest.mark.asyncio
+async def test_providers_do_not_share_entries(tmp_path):
+    """Test that the provider is part of the cache key."""
+    cache = SearchCache(ttl_s=60, stale_s=60, max_items=8, db_path=None)
+    search, calls = _counting_search()
+    await cached(cache, "serper", search)("shared claim")
+    await cached(cache, "brave", search)("shared claim")
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_result_count_is_part_of_the_key(tmp_path):
+    """Test that k reaches the provider and a smaller cached answer is not served for a larger k."""
+    cache = SearchCache(ttl_s=60, stale_s=60, max_items=8, db_path=None)
+    ks = []
+
+    async def search(query, deadline=None, k=5):
+        ks.append(k)
+        return [Source(title=str(i), url=f"https://s{i}.example/a") for i in range(k)]
+
+    wrapped = cached(cache, "serper", search)
+    assert len(await wrapped("sized claim", k=3)) == 3
+    assert len(await wrapped("sized claim", k=8)) == 8
+    assert len(await wrapped("sized claim", k=3)) == 3
+    assert ks == [3, 8]
+
+
+@pytest.mark.asyncio
+async def test_shared_fill_outlives_a_short_deadline(tmp_path):
+    """Test that a caller's deadline bounds only its own wait, not the coalesced upstream call."""
+    from app.logic.deadline import Deadline
+
+    cache = SearchCache(ttl_s=60, stale_s=60, max_items=8, db_path=None)
+    deadlines = []
+
+    async def search(query, deadline=None, k=5):
+        deadlines.append(deadline)
+        await asyncio.sleep(0.1)
+        return [Source(title="slow", url="https://example.com/a")]
+
+    wrapped = cached(cache, "serper", search)
+    hurried = Deadline(0.01)
+    patient = asyncio.ensure_future(wrapped("slow claim here", deadline=Deadline(5.0)))
+    with pytest.raises(asyncio.TimeoutError):
+        await wrapped("slow claim here", deadline=hurried)
+    assert hurried.degraded and hurried.reasons == ["search"]
+    assert (await patient)[0].title == "slow"
+    assert deadlines == [None]
+    assert (await wrapped("slow claim here"))[0].title == "slow"
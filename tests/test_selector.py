@@ -0,0 +1,93 @@
+"""Tests for global evidence selection."""
+import threading
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.logic.selector import _mmr_select
+from app.schemas import Source
+
+
+def _unit(*xs):
+    v = np.array(xs, dtype="float32")
+    return v / np.linalg.norm(v)
+
+
+def test_mmr_prefers_novel_evidence():
+    """Test that a near-copy of an already picked paragraph loses to a distinct one."""
+    vecs = np.stack([_unit(1, 0, 0), _unit(1, 0.01, 0), _unit(0, 1, 0)])
+    sims = np.array([0.9, 0.89, 0.6], dtype="float32")
+    owners = np.array([0, 1, 2])
+    picked = _mmr_select(sims, vecs, owners, k=2, per_source_max=2)
+    assert picked == [0, 2]
+
+
+def test_mmr_respects_per_source_max_and_threshold():
+    """Test quotas cap any single source and weak matches are never picked."""
+    vecs = np.eye(5, dtype="float32")
+    sims = np.array([0.9, 0.85, 0.8, 0.5, 0.1], dtype="float32")
+    owners = np.array([0, 0, 0, 1, 2])
+    picked = _mmr_select(sims, vecs, owners, k=5, per_source_max=2)
+    assert picked == [0, 1, 3]
+
+
+def test_mmr_min_quota_serves_each_source():
+    """Test that a per-source minimum pulls in lower-ranked sources first."""
+    vecs = np.eye(4, dtype="float32")
+    sims = np.array([0.9, 0.85, 0.8, 0.4], dtype="float32")
+    owners = np.array([0, 0, 0, 1])
+    picked = _mmr_select(sims, vecs, owners, k=2, per_source_max=3, per_source_min=1)
+    assert sorted(picked) == [0, 3]
+
+
+@pytest.mark.asyncio
+async def test_select_evidence_caps_total_globally():
+    """Test that max_total keeps the globally best paragraphs, not the first sources'."""
+    from app.logic import selector
+
+    sources = [Source(title=str(i), url=f"https://s{i}.com/a") for i in range(3)]
+    paras = [[f"paragraph {i}-{j} " * 20 for j in range(2)] for i in range(3)]
+    rank = {p: 0.3 + 0.1 * (i * 2 + j) for i, ps in enumerate(paras) for j, p in enumerate(ps)}
+    threads = []
+
+    async def fake_fetch(srcs, deadline):
+        return paras
+
+    def fake_embed_texts(texts):
+        threads.append(threading.get_ident())
+        out = np.zeros((len(texts), 8), dtype="float32")
+        for n, t in enumerate(texts):
+            out[n, 0] = rank[t]
+            out[n, n + 1] = np.sqrt(1 - rank[t] ** 2)
+        return out
+
+    claim_vec = np.zeros(8, dtype="float32")
+    claim_vec[0] = 1.0
+    with patch.object(selector, "_fetch_all", fake_fetch), \
+         patch.object(selector, "embed_texts", fake_embed_texts), \
+         patch.object(selector, "embed_text", lambda t: claim_vec):
+        picked = await selector.select_evidence("claim text", sources, per_source=2, max_total=3)
+
+    assert [len(s.evidence) for s in picked] == [0, 1, 2]
+    assert picked[2].evidence[0].startswith("paragraph 2-1")
+    assert threads and threading.get_ident() not in threads  # the paragraph batch is embedded off the loop
+
+
+def test_lexical_prefilter_reaches_deep_chunks():
+    """Test that a relevant chunk far down a long page survives pre-ranking."""
+    from app.logic.selector import _lexical_prefilter
+
+    filler = [f"Unrelated section {i} about gardening tips and seasonal weather patterns." for i in range(40)]
+    filler[30] = "The bridge over the river reopened to traffic on Monday after long repairs."
+    kept = _lexical_prefilter("The bridge reopened to traffic", filler, m=5)
+    assert len(kept) == 5
+    assert filler[30] in kept
+    assert _lexical_prefilter("anything", filler[:3], m=5) == filler[:3]
+
+
+def test_lexical_prefilter_without_overlap_keeps_leading_chunks():
+    """Test the positional fallback when nothing matches lexically."""
+    from app.logic.selector import _lexical_prefilter
+
+    paras = [f"chunk number {i}" for i in range(20)]
+    assert _lexical_prefilter("zebra giraffe", paras, m=4) == paras[:4]
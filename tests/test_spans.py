@@ -0,0 +1,68 @@
+"""Tests for sentence-level evidence spans."""
+import numpy as np
+from unittest.mock import patch
+
+from app.nlp import spans
+from app.nlp.spans import approx_tokens, best_spans, split_sentences
+from app.records import Hit
+
+
+def _fake_embed(relevant: str):
+    def embed(texts):
+        out = np.zeros((len(texts), 2), dtype="float32")
+        for i, t in enumerate(texts):
+            out[i] = [1.0, 0.0] if relevant in t else [0.0, 1.0]
+        return out
+    return embed
+
+
+FILLER = "The committee met in the afternoon to discuss several unrelated budget items at length."
+KEY = "Officials confirmed the bridge reopened to traffic on Monday after repairs."
+
+
+def test_split_sentences():
+    """Test sentence splitting on terminal punctuation."""
+    assert split_sentences("One thing. Two things! Three?") == ["One thing.", "Two things!", "Three?"]
+
+
+def test_short_paragraph_kept_whole():
+    """Test that paragraphs within budget are not split."""
+    with patch.object(spans, "embed_texts", _fake_embed("bridge")):
+        assert best_spans(np.array([1.0, 0.0]), [KEY]) == [KEY]
+
+
+def test_long_paragraph_reduced_to_best_window():
+    """Test that only the claim-relevant window of a long paragraph is kept."""
+    para = " ".join([FILLER] * 4 + [KEY] + [FILLER] * 4)
+    with patch.object(spans, "embed_texts", _fake_embed("bridge")):
+        out = best_spans(np.array([1.0, 0.0], dtype="float32"), [para], token_budget=40)
+    assert out == [KEY]
+    assert approx_tokens(out[0]) < approx_tokens(para) / 5
+
+
+def test_verdict_uses_spans_as_premises():
+    """Test that make_verdict sends spans, not paragraphs, to NLI."""
+    from app.nlp import verdict
+
+    seen = []
+
+    def fake_score_many(premises, claim, batch_size=8):
+        seen.extend(premises)
+        return [{"entail": 0.9, "contradict": 0.05, "neutral": 0.05} for _ in premises]
+
+    para = " ".join([FILLER] * 3 + [KEY])
+    src = Hit(title="t", url="https://a.com", evidence=[para], spans=[KEY])
+    with patch.object(verdict, "score_many", fake_score_many):
+        verdict.make_verdict("The bridge reopened.", [src])
+    assert seen == [KEY]
+    assert "spans" not in src.to_dict()
+
+
+def test_short_span_falls_back_to_paragraph():
+    """Test that a span too short to be a premise is replaced by its paragraph, not dropped."""
+    from app.nlp import verdict
+
+    para = f"{FILLER} Bridge open."
+    src = Hit(title="t", url="https://a.com", evidence=[para], spans=["Bridge open."])
+    premises, owners, _ = verdict._flatten_evidence([src])
+    assert premises == [para] and owners == [0]
@@ -47,3 +47,39 @@ def test_check_endpoint_validation():
     # Test very short claim (caught by Pydantic min_length=8)
     response = client.post("/check", json={"claim": "short"})
     assert response.status_code == 422  # Pydantic validation error (5 chars < 8)
+
+
+def test_check_response_follows_check_result():
+    """Test that /check serializes through CheckResult, keeping mirrors and dropping page text."""
+    from unittest.mock import patch
+
+    result = {
+        "claim": "The bridge reopened on Monday.", "verdict": "True", "confidence": 0.7,
+        "rationale": "r", "post": "p", "id": "x", "cached": True, "age_s": 3.0,
+        "sources": [{"title": "t", "url": "https://a.com/x", "snippet": None, "evidence": ["e"],
+                     "paragraphs": ["page text"], "mirrors": ["https://b.com/x"]}],
+    }
+
+    client = TestClient(app)
+    with patch("app.logic.orchestrator.cached_verdict", return_value=result):
+        data = client.post("/check", json={"claim": result["claim"]}).json()
+    assert data["sources"] == [{"title": "t", "url": "https://a.com/x", "snippet": None, "evidence": ["e"],
+                                "mirrors": ["https://b.com/x"]}]
+    assert data["cached"] and data["age_s"] == 3.0 and data["mode"] == "balanced"
+
+
+def test_ui_check_renders_mirrors():
+    """Test that the HTMX result block links the mirrors of each source."""
+    from unittest.mock import patch
+
+    result = {
+        "claim": "The bridge reopened on Monday.", "verdict": "True", "confidence": 0.7,
+        "rationale": "r", "post": "p", "id": "x",
+        "sources": [{"title": "t", "url": "https://a.com/x", "snippet": None, "evidence": ["e"],
+                     "mirrors": ["https://b.com/x"]}],
+    }
+
+    client = TestClient(app)
+    with patch("app.logic.orchestrator.cached_verdict", return_value=result):
+        html = client.post("/ui/check", data={"claim": result["claim"]}).text
+    assert 'href="https://b.com/x"' in html
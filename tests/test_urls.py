@@ -0,0 +1,92 @@
+"""Tests for URL canonicalization and the redirect map."""
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.records import Hit
+from app.search.base import dedupe_by_domain
+from app.urls import RedirectMap, canonicalize, url_key
+
+
+@pytest.mark.parametrize("raw,canonical", [
+    ("https://Example.COM:443/a?utm_source=x&b=2&a=1#top", "https://example.com/a?a=1&b=2"),
+    ("https://m.example.com/news/story?fbclid=abc", "https://example.com/news/story"),
+    ("https://example.com/news/story/amp/", "https://example.com/news/story"),
+    ("https://example.com/amp/news/story", "https://example.com/news/story"),
+    ("https://example.com/world/story.amp.html", "https://example.com/world/story.html"),
+    ("https://www.google.com/amp/s/www.example.com/news/amp/story", "https://www.example.com/news/story"),
+    ("https://www-example-com.cdn.ampproject.org/c/s/www.example.com/a.amp.html", "https://www.example.com/a.html"),
+])
+def test_canonicalize(raw, canonical):
+    """Test tracking, AMP, mobile, port, case and query-order normalization."""
+    assert canonicalize(raw) == canonical
+
+
+def test_canonicalize_leaves_lookalikes_alone():
+    """Test that paths merely starting with 'amp' and non-http URLs are untouched."""
+    assert canonicalize("https://example.com/amplify/x?id=7") == "https://example.com/amplify/x?id=7"
+    assert canonicalize("mailto:someone@example.com") == "mailto:someone@example.com"
+
+
+def test_url_key_ignores_scheme_www_and_trailing_slash():
+    """Test that presentation-only differences map to one key."""
+    assert url_key("http://www.example.com/a/") == url_key("https://m.example.com/a?utm_medium=x")
+
+
+def test_dedupe_treats_mobile_host_as_same_site():
+    """Test that m. and www. variants count as one domain."""
+    hits = [Hit(title="a", url="https://www.example.com/a"), Hit(title="b", url="https://m.example.com/b"),
+            Hit(title="c", url="https://other.org/c")]
+    assert [h.title for h in dedupe_by_domain(hits)] == ["a", "c"]
+
+
+def test_redirect_map_persists_and_expires(tmp_path):
+    """Test that learned redirects survive a restart and respect the TTL."""
+    db = str(tmp_path / "r.db")
+    RedirectMap(3600, db).record("https://t.co/abc?utm_source=x", "https://example.com/story")
+    fresh = RedirectMap(3600, db)
+    assert fresh.resolve("https://t.co/abc") == "https://example.com/story"
+    with patch("app.urls.time.time", return_value=4e12):
+        assert fresh.resolve("https://t.co/abc") == "https://t.co/abc"
+
+
+@pytest.mark.asyncio
+async def test_fetch_goes_straight_to_known_destination(tmp_path):
+    """Test that fetch_html records a redirect and reuses it next time."""
+    from app.fetch import fetcher
+
+    redirects = RedirectMap(3600, str(tmp_path / "r.db"))
+    resp = MagicMock(status_code=200, text="<html></html>", headers={"Content-Type": "text/html"},
+                     url="https://example.com/final", raise_for_status=MagicMock())
+    with patch.object(fetcher, "get_redirects", return_value=redirects), \
+         patch("httpx.AsyncClient.get", return_value=resp) as get:
+        await fetcher.fetch_html("https://short.example/x?utm_campaign=y")
+        await fetcher.fetch_html("https://short.example/x")
+    assert [c.args[0] for c in get.call_args_list] == ["https://short.example/x", "https://example.com/final"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_retries_original_url_when_canonical_fails():
+    """Test that a 4xx or transport error on the canonical URL falls back to the URL as given."""
+    import httpx
+    from app.fetch import fetcher
+
+    seen = []
+
+    def handler(request):
+        seen.append(str(request.url))
+        if request.url.host == "down.example":
+            raise httpx.ConnectError("refused", request=request)
+        if request.url.host == "example.com":  # only the mobile host serves this page
+            return httpx.Response(404, headers={"Content-Type": "text/html"}, text="gone")
+        return httpx.Response(200, headers={"Content-Type": "text/html"}, text="<p>story</p>")
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    redirects = RedirectMap(3600, None)
+    redirects.record("https://m.other.com/s", "https://down.example/s")
+    with patch.object(fetcher, "get_redirects", return_value=redirects), \
+         patch.object(fetcher, "get_fetch_client", return_value=client):
+        assert await fetcher.fetch_html("https://m.example.com/s") == "<p>story</p>"
+        assert await fetcher.fetch_html("https://m.other.com/s") == "<p>story</p>"
+    assert seen == ["https://example.com/s", "https://m.example.com/s",
+                    "https://down.example/s", "https://m.other.com/s"]
+    assert redirects.resolve("https://m.other.com/s") == "https://other.com/s"  # the dead redirect is forgotten
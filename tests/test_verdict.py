@@ -1 +1,65 @@
 """Tests for verdict logic."""
+import random
+import pytest
+from unittest.mock import patch
+
+from app.nlp import verdict
+from app.records import Hit
+
+
+def _sources(probs):
+    """One source per premise; the premise text encodes its index."""
+    out = []
+    for i, _ in enumerate(probs):
+        text = f"premise number {i:03d} with enough characters to pass the length filter"
+        out.append(Hit(title="t", url=f"https://s{i}.com", evidence=[text], sims=[1.0 - i / 100]))
+    return out
+
+
+def _fake_scorer(probs, calls):
+    def score_many(premises, claim, batch_size=8):
+        calls.append(len(premises))
+        out = []
+        for p in premises:
+            e, c = probs[int(p.split()[2])]
+            out.append({"entail": e, "contradict": c, "neutral": max(0.0, 1 - e - c)})
+        return out
+    return score_many
+
+
+def test_settled_label_bounds():
+    """Test the label is only settled when no completion can change it."""
+    # 6 of 8 scored, all strongly entailing: remaining two cannot flip it
+    assert verdict._settled_label(6 * 0.95, 6 * 0.02, 6, 8) == "True"
+    # 2 of 8 scored: anything can still happen
+    assert verdict._settled_label(2 * 0.95, 2 * 0.02, 2, 8) is None
+
+
+def test_early_exit_scores_fewer_pairs():
+    """Test that a clear-cut case stops before scoring every premise."""
+    probs = [(0.97, 0.01)] * 12
+    calls = []
+    stats = {}
+    with patch.object(verdict, "score_many", _fake_scorer(probs, calls)):
+        label, _, _, _ = verdict.make_verdict("claim", _sources(probs), early_exit=True, stats=stats)
+    assert label == "True"
+    assert stats["premises"] == 12
+    assert stats["nli_pairs"] == sum(calls) < 12
+
+
+def test_early_exit_parity_with_exhaustive():
+    """Test that early exit never changes the label versus scoring everything."""
+    rng = random.Random(7)
+    for _ in range(300):
+        n = rng.randint(1, 10)
+        bias = rng.random()
+        probs = []
+        for _ in range(n):
+            e = min(1.0, max(0.0, rng.gauss(bias, 0.25)))
+            c = min(1.0 - e, max(0.0, rng.gauss(1 - bias, 0.25)))
+            probs.append((e, c))
+        sources = _sources(probs)
+        with patch.object(verdict, "score_many", _fake_scorer(probs, [])):
+            full = verdict.make_verdict("claim", sources, early_exit=False)
+            fast = verdict.make_verdict("claim", sources, early_exit=True)
+        assert fast[0] == full[0], probs